@@ -6,5 +6,8 @@ $python = "C:/Program Files/Python313/python.exe"
 # One-dir (recommended for debugging)
 & $python -m PyInstaller --windowed --add-data "config_gui.json;." --add-data "logger.txt;." noita_launcher_gui.py
 
+# Console tool for Steam launch options and scheduled tasks (no tkinter inside)
+& $python -m PyInstaller --console --add-data "config_gui.json;." noita_cli.py
+
 # One-file (single exe) - uncomment to use
 # & $python -m PyInstaller --onefile --windowed --add-data "config_gui.json;." --add-data "logger.txt;." noita_launcher_gui.py
@@ -0,0 +1,316 @@
+"""Бенчмарк операций со слотами на синтетическом save00.
+
+Работает без GUI (только noita_core) и не трогает настоящие save00, слоты и
+конфиг: всё создаётся во временной папке. Пример:
+
+    python noita_bench.py --chunks 3000 --slots 40 --strategies auto,readinto
+    python noita_bench.py --output new.json --baseline old.json
+
+Каждая операция замеряется «холодной» (файлы вытеснены из кэша страниц) и
+«тёплой» (повтор сразу после). Результаты пишутся в JSON; с --baseline
+сравниваются с прошлым прогоном, и при замедлении больше --threshold код
+возврата 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import noita_core as core
+
+
+# ---------- Синтетический save00 ----------
+
+def generate_save(root: Path, chunks: int, chunk_kb: int, seed: int = 0) -> tuple[int, int]:
+    """Создать дерево, похожее на save00 Noita, и вернуть (байт, файлов).
+
+    world/ — чанки мира (world_X_Y.png_petri и entities_N.bin) около chunk_kb КБ,
+    наполовину сжимаемые, как настоящие; плюс player.xml, world_state.xml,
+    persistent/flags и stats/sessions с мелкими файлами.
+    """
+    rnd = random.Random(seed)
+    total = count = 0
+
+    def _write(path: Path, data: bytes):
+        nonlocal total, count
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        total += len(data)
+        count += 1
+
+    def _chunk(size: int) -> bytes:
+        noise = rnd.randbytes(size // 2)
+        return noise + bytes(size - len(noise))
+
+    side = max(1, int(chunks ** 0.5))
+    for i in range(chunks):
+        x, y = (i % side - side // 2) * 512, (i // side - side // 2) * 512
+        size = max(1, int(chunk_kb * 1024 * rnd.uniform(0.5, 1.5)))
+        name = f"world_{x}_{y}.png_petri" if i % 4 else f"entities_{i}.bin"
+        _write(root / "world" / name, _chunk(size))
+    _write(root / "player.xml", b"<Entity>" + b"<Component/>" * 20000 + b"</Entity>")
+    _write(root / "world_state.xml", b"<WorldStateComponent>" + b"<flag/>" * 50000 + b"</WorldStateComponent>")
+    _write(root / "session_numbers.salakieli", rnd.randbytes(256))
+    _write(root / "mod_config.xml", b"<Mods/>")
+    for i in range(200):
+        _write(root / "persistent" / "flags" / f"card_unlocked_{i}", b"")
+    for i in range(50):
+        _write(root / "stats" / "sessions" / f"{i:04d}_stats.xml", b"<Stats/>" * 100)
+    return total, count
+
+
+def mutate_save(root: Path, fraction: float, seed: int):
+    """Изменить долю чанков мира, как это делает одна игровая сессия."""
+    rnd = random.Random(seed)
+    chunks = sorted((root / "world").iterdir())
+    for path in rnd.sample(chunks, max(1, int(len(chunks) * fraction))):
+        data = bytearray(path.read_bytes())
+        data[: min(len(data), 64)] = rnd.randbytes(min(len(data), 64))
+        path.write_bytes(bytes(data))
+
+
+def drop_cache(*roots: Path):
+    """Вытеснить файлы деревьев из кэша страниц (без root: posix_fadvise DONTNEED)."""
+    os.sync()
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for root in roots:
+        if not root.exists():
+            continue
+        for dirpath, _, names in os.walk(root):
+            for name in names:
+                try:
+                    fd = os.open(os.path.join(dirpath, name), os.O_RDONLY)
+                except OSError:
+                    continue
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                finally:
+                    os.close(fd)
+
+
+# ---------- Замеры ----------
+
+def _timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def measure(setup, run, cache_roots, repeat: int) -> dict:
+    """Один холодный и repeat тёплых прогонов; setup выполняется перед каждым и не замеряется."""
+    setup()
+    drop_cache(*cache_roots)
+    cold = _timed(run)
+    warm = []
+    for _ in range(repeat):
+        setup()
+        warm.append(_timed(run))
+    return {"cold": cold, "warm": warm, "warm_median": statistics.median(warm)}
+
+
+def bench_strategy(work: Path, args, strategy: str) -> dict[str, dict]:
+    save = work / "save00"
+    saves = work / "saves"
+    core.set_paths(save_path=save, saves_dir=saves)
+    core.config.update(
+        copy_strategy=strategy,
+        slot_storage=args.storage,
+        incremental_backups=args.incremental,
+        copy_workers=args.workers,
+        max_backups=0,
+        auto_backup_on_load=False,
+        auto_backup_on_run=False,
+    )
+    results: dict[str, dict] = {}
+    counter = iter(range(10**9))
+
+    copy_dst = work / "copy"
+    results["copy_dir"] = measure(
+        lambda: shutil.rmtree(copy_dst, ignore_errors=True),
+        lambda: core.copy_dir(save, copy_dst),
+        [save],
+        args.repeat,
+    )
+    shutil.rmtree(copy_dst, ignore_errors=True)
+
+    # Уборка после бэкапа идёт в фоне — дожидаемся её вне замера
+    results["make_backup"] = measure(
+        core.wait_prune,
+        lambda: core.make_backup(f"bench_{next(counter)}"),
+        [save, saves],
+        args.repeat,
+    )
+
+    base = core.make_backup("bench_base")
+    seeds = iter(range(10**9))
+    results["load_slot"] = measure(
+        lambda: mutate_save(save, args.changed, next(seeds)),
+        lambda: core.load_slot(base),
+        [save, saves],
+        args.repeat,
+    )
+
+    # Загрузка после прогрева слота (как при выборе его в списке GUI): кэш
+    # сбрасывается до прогрева, поэтому «холодный» замер здесь — прогретый
+    def _prewarm():
+        mutate_save(save, args.changed, next(seeds))
+        drop_cache(save, saves)
+        core.prewarm_slot(base, core.Event())
+
+    results["load_slot_prewarmed"] = measure(_prewarm, lambda: core.load_slot(base), [], args.repeat)
+
+    # Два слота, различающихся долей --changed чанков: решает манифест, хэшируются
+    # только файлы одного размера с разным mtime
+    mutate_save(save, args.changed, next(seeds))
+    other = core.make_backup("bench_other")
+    results["diff_slots"] = measure(lambda: None, lambda: core.diff_slots(base, other), [saves], args.repeat)
+
+    # Полная проверка читает все файлы слотов (каждый inode один раз), повторная — из кэша хэшей
+    results["verify_slots"] = measure(
+        lambda: None, lambda: core.verify_slots(full=True), [saves, core.store_dir()], args.repeat
+    )
+    results["verify_slots_cached"] = measure(lambda: None, core.verify_slots, [saves], args.repeat)
+
+    # Экспорт сжимает в пуле процессов, импорт распаковывает прямо в папку слотов
+    export_file = work / f"bench{core.EXPORT_EXT}"
+    results["export_slot"] = measure(lambda: None, lambda: core.export_slot(base, export_file), [saves], args.repeat)
+    imported = iter(range(10**9))
+    results["import_slot"] = measure(
+        lambda: None,
+        lambda: core.import_slot(export_file, f"bench_import_{next(imported)}"),
+        [work],
+        args.repeat,
+    )
+
+    # Слоты для уборки: копии базового слота жёсткими ссылками — удаляются они
+    # так же, как настоящие, а создаются за доли секунды
+    base_path = core.slot_path(base)
+
+    def _fill_slots():
+        autos = [name for name in core.list_slots() if core.slot_kind(name) != "manual"]
+        for _ in range(max(0, args.slots - len(autos))):
+            # Уборка трогает только автокопии
+            name = f"auto_run_fill_{next(counter)}"
+            if base_path.is_dir():
+                shutil.copytree(base_path, saves / name, copy_function=os.link)
+            else:
+                os.link(base_path, saves / f"{name}{core.ARCHIVE_EXT}")
+        core.config["max_backups"] = max(1, args.slots // 2)
+
+    results["cleanup_old_backups"] = measure(
+        _fill_slots,
+        core.cleanup_old_backups,
+        [saves],
+        args.repeat,
+    )
+    core.config["max_backups"] = 0
+
+    index_file = saves / core.SLOT_INDEX_FILE
+
+    def _forget_index():
+        index_file.unlink(missing_ok=True)
+        core.slot_index(reload=True)
+
+    results["index_rebuild"] = measure(_forget_index, core.list_slots, [saves], args.repeat)
+    # Как refresh_slots_list в GUI: сверка индекса с папкой без описания новых слотов
+    results["refresh_slots_list"] = measure(
+        lambda: None,
+        lambda: (core.slot_index().reconcile(describe=False), core.slot_index().entries()),
+        [saves],
+        args.repeat,
+    )
+    return results
+
+
+def run(args) -> dict:
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "chunks": args.chunks,
+            "chunk_kb": args.chunk_kb,
+            "slots": args.slots,
+            "changed": args.changed,
+            "storage": args.storage,
+            "incremental": args.incremental,
+            "workers": args.workers,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    for strategy in strategies:
+        work = Path(tempfile.mkdtemp(prefix="noita-bench-", dir=args.workdir))
+        try:
+            size, files = generate_save(work / "save00", args.chunks, args.chunk_kb, args.seed)
+            report["meta"]["save_bytes"] = size
+            report["meta"]["save_files"] = files
+            for op, res in bench_strategy(work, args, strategy).items():
+                report["results"][f"{op}[{strategy}]"] = res
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+    return report
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[str]:
+    """Строки сравнения с базой; регрессии помечены REGRESSION."""
+    lines = []
+    for key, res in report["results"].items():
+        old = baseline.get("results", {}).get(key)
+        if not old:
+            continue
+        for metric in ("cold", "warm_median"):
+            ratio = res[metric] / old[metric] if old[metric] else 1.0
+            mark = "  REGRESSION" if ratio > 1 + threshold else ""
+            lines.append(f"{key:<40}{metric:<12}{old[metric]:9.3f}s -> {res[metric]:9.3f}s  x{ratio:.2f}{mark}")
+    return lines
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="noita_bench", description="Benchmark slot operations on a synthetic save00.")
+    parser.add_argument("--chunks", type=int, default=2000, help="world chunk files (default 2000)")
+    parser.add_argument("--chunk-kb", type=int, default=48, help="average chunk size in KB (default 48)")
+    parser.add_argument("--slots", type=int, default=20, help="slots present for cleanup_old_backups (default 20)")
+    parser.add_argument("--changed", type=float, default=0.1, help="share of chunks changed before each load (default 0.1)")
+    parser.add_argument("--strategies", default="auto", help="comma-separated copy strategies, e.g. auto,readinto")
+    parser.add_argument("--storage", choices=["folder", "store", "archive"], default="folder")
+    parser.add_argument("--incremental", action="store_true", help="enable incremental_backups")
+    parser.add_argument("--workers", type=int, default=0, help="copy_workers (0 = automatic)")
+    parser.add_argument("--repeat", type=int, default=3, help="warm runs per operation (default 3)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="where to create the temporary tree (default: system temp)")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--baseline", help="previous JSON results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown vs baseline (default 0.2)")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    report = run(args)
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    meta = report["meta"]
+    print(f"save00: {meta['save_files']} files, {meta['save_bytes'] / (1024 * 1024):.1f} MB")
+    for key, res in report["results"].items():
+        print(f"{key:<40}cold {res['cold']:8.3f}s   warm {res['warm_median']:8.3f}s")
+    if not args.baseline:
+        return 0
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    lines = compare(report, baseline, args.threshold)
+    print()
+    print("\n".join(lines))
+    return 1 if any(line.endswith("REGRESSION") for line in lines) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
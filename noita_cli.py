@@ -0,0 +1,252 @@
+"""Консольные команды Noita Launcher без GUI.
+
+Не импортирует tkinter, поэтому подходит для параметров запуска Steam и планировщика:
+
+    python noita_cli.py save [имя]
+    python noita_cli.py load <слот>
+    python noita_cli.py launch <слот>
+    python noita_cli.py list --json
+    python noita_cli.py diff <слот> [другой слот]
+    python noita_cli.py verify [слоты...] [--full]
+    python noita_cli.py export <слот> [файл]
+    python noita_cli.py import <файл> [--name имя]
+    python noita_cli.py prune
+
+Пути и настройки берутся из того же config_gui.json, что и у GUI; --save-path,
+--exe-path и --saves-dir переопределяют их на один запуск.
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import noita_core as core
+
+
+def _auto_backup(args, key: str, prefix: str) -> str | None:
+    enabled = core.config.get(key, False) if args.backup is None else args.backup
+    return prefix if enabled else None
+
+
+def _traced(op: str, slot: str | None, func):
+    """Выполнить func(progress) и записать операцию с её фазами в perf.log."""
+    progress = core.Progress()
+    started = time.perf_counter()
+    status = "failed"
+    try:
+        result = func(progress)
+        status = "done"
+        return result
+    finally:
+        core.log_operation(op, progress, status, time.perf_counter() - started, slot)
+
+
+def cmd_save(args) -> int:
+    print(_traced("save", args.name, lambda progress: core.make_backup(args.name, progress=progress)))
+    return 0
+
+
+def cmd_load(args) -> int:
+    core.recover_staging(core.NOITA_SAVE)
+    auto = _auto_backup(args, "auto_backup_on_load", "auto_load_")
+    _traced("load", args.slot, lambda progress: core.restore_slot(args.slot, auto_backup=auto, progress=progress))
+    print(core.t("status_loaded").format(slot=args.slot))
+    return 0
+
+
+def cmd_launch(args) -> int:
+    # Без игры слот не подменяем
+    if not Path(core.NOITA_EXE).exists():
+        raise RuntimeError(core.t("noita_missing").format(path=core.NOITA_EXE))
+    core.recover_staging(core.NOITA_SAVE)
+    auto = _auto_backup(args, "auto_backup_on_run", "auto_run_")
+
+    def _launch(progress):
+        core.restore_slot(args.slot, auto_backup=auto, progress=progress)
+        with core.span(progress, "spawn"):
+            return core.launch_noita()
+
+    process = _traced("launch", args.slot, _launch)
+    print(core.t("status_run").format(slot=args.slot))
+    if args.monitor:
+        _monitor(process)
+    return 0
+
+
+def _monitor(process):
+    """Остаться до выхода игры, делая автоснимки save00 (как GUI)."""
+
+    def _snapshot(func):
+        try:
+            name = _traced("snapshot", None, func)
+        except Exception as exc:
+            print(f"{core.t('error')}: {exc}", file=sys.stderr)
+            raise
+        print(core.t("status_snapshot").format(slot=name))
+
+    try:
+        minutes = float(core.config.get("session_snapshot_minutes", 10))
+    except (TypeError, ValueError):
+        minutes = 10.0
+    monitor = core.SessionMonitor(process, interval=max(1.0, minutes) * 60, run=_snapshot)
+    monitor.start()
+    monitor.wait()
+    print(core.t("status_noita_exited"))
+
+
+def cmd_list(args) -> int:
+    entries = core.list_slots()
+    names = sorted(entries, key=lambda name: entries[name].get("created", 0))
+    if args.json:
+        json.dump([{"name": name, **entries[name]} for name in names], sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+    for name in names:
+        info = entries[name]
+        created = info.get("created", 0)
+        date = datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M") if created else ""
+        print(f"{name}\t{date}\t{info.get('size', 0)}\t{info.get('kind', '')}")
+    return 0
+
+
+def cmd_diff(args) -> int:
+    # Без второго слота — что изменится в save00 при загрузке слота
+    old, new = args.other, args.slot
+    if args.reverse:
+        old, new = new, old
+    changes = _traced("diff", args.slot, lambda progress: core.diff_slots(old, new, progress=progress))
+    if args.json:
+        json.dump(changes, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+    marks = {"added": "+", "removed": "-", "changed": "~"}
+    for change in changes:
+        print(f"{marks[change['status']]}\t{change['path']}\t{change['delta']:+d}")
+    print(core.t("diff_summary").format(**core.diff_summary(changes)) if changes else core.t("diff_same"))
+    return 0
+
+
+def cmd_verify(args) -> int:
+    report = _traced(
+        "verify", None, lambda progress: core.verify_slots(args.slots or None, full=args.full, progress=progress)
+    )
+    if args.json:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    damaged = [name for name, info in report.items() if info["missing"] or info["corrupt"]]
+    if not args.json:
+        for name in damaged:
+            info = report[name]
+            print(core.t("verify_slot_line").format(slot=name, missing=len(info["missing"]), corrupt=len(info["corrupt"])))
+            # Пустой путь — слот целиком (нет папки или архив не прошёл CRC)
+            for mark, rels in (("-", info["missing"]), ("!", info["corrupt"])):
+                for rel in rels:
+                    print(f"{mark}\t{name}/{rel}" if rel else f"{mark}\t{name}")
+        if not damaged:
+            print(core.t("verify_ok").format(count=len(report)))
+        unhashed = sum(info["unhashed"] for info in report.values())
+        if unhashed:
+            print(core.t("verify_unhashed").format(count=unhashed))
+    return 1 if damaged else 0
+
+
+def cmd_export(args) -> int:
+    dst = Path(args.file) if args.file else Path(f"{args.slot}{core.EXPORT_EXT}")
+    print(_traced("export", args.slot, lambda progress: core.export_slot(args.slot, dst, progress=progress)))
+    return 0
+
+
+def cmd_import(args) -> int:
+    src = Path(args.file)
+    name = args.name or core.export_slot_name(src)
+    print(_traced("import", name, lambda progress: core.import_slot(src, name, progress=progress)))
+    return 0
+
+
+def cmd_prune(args) -> int:
+    def _prune(progress):
+        with core.span(progress, "prune"):
+            return core.cleanup_old_backups()
+
+    for name in _traced("prune", None, _prune):
+        print(name)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="noita_cli", description="Noita save slots without the GUI.")
+    parser.add_argument("--save-path", help="save00 folder (overrides config)")
+    parser.add_argument("--exe-path", help="Noita.exe (overrides config)")
+    parser.add_argument("--saves-dir", help="slots folder (overrides config)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("save", help="back up save00 into a slot")
+    p.add_argument("name", nargs="?", help="slot name (default: save_name_format)")
+    p.set_defaults(func=cmd_save)
+
+    for name, func, help_text in (
+        ("load", cmd_load, "restore a slot into save00"),
+        ("launch", cmd_launch, "restore a slot and start Noita"),
+    ):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("slot")
+        p.add_argument(
+            "--backup",
+            action=argparse.BooleanOptionalAction,
+            default=None,
+            help="auto backup save00 first (default: from config)",
+        )
+        p.set_defaults(func=func)
+    p.add_argument("--monitor", action="store_true", help="stay until Noita exits, taking snapshots of save00")
+
+    p = sub.add_parser("list", help="list slots")
+    p.add_argument("--json", action="store_true", help="machine-readable output")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("diff", help="files that differ between two slots or a slot and save00")
+    p.add_argument("slot")
+    p.add_argument("other", nargs="?", help="slot to compare with (default: save00)")
+    p.add_argument("--reverse", action="store_true", help="changes from slot to other instead")
+    p.add_argument("--json", action="store_true", help="machine-readable output")
+    p.set_defaults(func=cmd_diff)
+
+    p = sub.add_parser("verify", help="check slot files against the hashes in their manifests")
+    p.add_argument("slots", nargs="*", help="slots to check (default: all)")
+    p.add_argument("--full", action="store_true", help="re-read every file instead of trusting the hash cache")
+    p.add_argument("--json", action="store_true", help="machine-readable output")
+    p.set_defaults(func=cmd_verify)
+
+    p = sub.add_parser("export", help="pack a slot into one .tar.gz file")
+    p.add_argument("slot")
+    p.add_argument("file", nargs="?", help="output file (default: <slot>.tar.gz)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("import", help="add a slot from a file made by export")
+    p.add_argument("file")
+    p.add_argument("--name", help="slot name (default: from the file name)")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("prune", help="delete auto backups by the retention settings")
+    p.set_defaults(func=cmd_prune)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    core.set_paths(args.save_path, args.exe_path, args.saves_dir)
+    try:
+        return args.func(args)
+    except Exception as exc:
+        print(f"{core.t('error')}: {exc}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    # Экспорт сжимает в пуле процессов; в собранном exe дочерний процесс должен
+    # остановиться здесь, а не разбирать аргументы командной строки заново
+    from multiprocessing import freeze_support
+
+    freeze_support()
+    sys.exit(main())
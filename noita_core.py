@@ -0,0 +1,4117 @@
+"""Логика слотов Noita Launcher без интерфейса.
+
+Модуль не импортирует tkinter и при импорте ничего не пишет на диск, поэтому его
+используют и GUI (noita_launcher_gui.py), и консольная утилита (noita_cli.py).
+Рабочие пути NOITA_SAVE, NOITA_EXE и SAVES_DIR меняются через set_paths().
+"""
+
+import atexit
+import json
+import shutil
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from threading import Thread, Lock, Event, Condition, get_ident, get_native_id, local
+from pathlib import Path
+import sys
+import os
+import time
+import errno
+
+# subprocess, zipfile, hashlib, concurrent.futures, ctypes, select и struct
+# импортируются внутри функций: на старте они не нужны, а время запуска заметно
+
+# ---------- Конфиг ----------
+
+# Определяем базовую папку в зависимости от режима (frozen при сборке PyInstaller)
+if getattr(sys, "frozen", False):
+    BASE_DIR = Path(sys._MEIPASS)
+else:
+    BASE_DIR = Path(__file__).resolve().parent
+
+# Ресурсный конфиг, который может быть упакован рядом с exe
+PACKAGED_CONFIG = BASE_DIR / "config_gui.json"
+
+# Путь для пользовательских данных (в Windows используем %APPDATA%)
+USER_DATA_DIR = Path(os.getenv("APPDATA", Path.home())) / "noita_launcher"
+
+# Файл конфигурации, в который мы читаем/пишем (пользовательский)
+CONFIG_FILE = USER_DATA_DIR / "config_gui.json"
+
+
+def init_user_data():
+    """Создать папку пользовательских данных и скопировать туда упакованный конфиг.
+
+    Вызывается при старте GUI, а не при импорте: консольным командам это не нужно.
+    """
+    USER_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    if not CONFIG_FILE.exists() and PACKAGED_CONFIG.exists():
+        try:
+            shutil.copy2(PACKAGED_CONFIG, CONFIG_FILE)
+        except Exception:
+            pass
+
+
+# Схема конфига: ключ -> (значение по умолчанию, проверка). Проверка — тип
+# (bool, int — целое не меньше нуля, str) или кортеж допустимых значений.
+# Ключи вне схемы сохраняются как есть.
+CONFIG_SCHEMA = {
+    "noita_save_path": (str(Path.home() / "AppData" / "LocalLow" / "Nolla_Games_Noita" / "save00"), str),
+    "noita_exe_path": (r"C:\Games\Noita\noita.exe", str),
+    "saves_dir": ("saves", str),
+    # Формат имени по умолчанию для слота (используется datetime.strftime)
+    "save_name_format": ("%Y-%m-%d_%H-%M-%S", str),
+    # Тема интерфейса
+    "theme": ("light", ("light", "dark")),
+    "language": ("ru", ("ru", "en")),
+    # Подтверждать удаление слота
+    "confirm_on_delete": (True, bool),
+    # Авто-бэкап перед запуском игры и перед загрузкой слота
+    "auto_backup_on_run": (False, bool),
+    "auto_backup_on_load": (False, bool),
+    # Максимум бэкапов (0 — без ограничения)
+    "max_backups": (0, int),
+    # Формат хранения новых слотов: 'folder' (полная копия), 'store' (дедупликация) или 'archive'
+    "slot_storage": ("folder", ("folder", "store", "archive")),
+    # Копировать в слот только файлы, изменившиеся с прошлого бэкапа
+    "incremental_backups": (False, bool),
+    # Способ копирования файлов
+    "copy_strategy": ("auto", ("auto", "reflink", "copy_file_range", "sendfile", "readinto")),
+    # Потоков для копирования файлов (0 = автоматически)
+    "copy_workers": (0, int),
+    # При загрузке слота сверять совпадающие по размеру файлы ещё и по хэшу
+    "restore_verify_hash": (False, bool),
+    # Сжатие для слотов-архивов
+    "archive_compression": ("deflate", ("deflate", "lzma", "bzip2")),
+    # Читать выбранный в списке слот в кэш заранее, до загрузки
+    "prewarm_slots": (True, bool),
+    # Хэши файлов в манифесте слота при бэкапе (для проверки целостности)
+    "backup_hashes": (True, bool),
+    # Собирать save00 во временной папке и подменять переименованием
+    "staged_restore": (True, bool),
+    # Писать длительность фаз операций в perf.log
+    "perf_log": (True, bool),
+    # Автоснимки save00, пока запущенная из лаунчера игра работает
+    "session_snapshots": (True, bool),
+    # Не чаще одного автоснимка за столько минут
+    "session_snapshot_minutes": (10, int),
+    # Уборка автокопий по ярусам: все за последние часы, по одной в час, по одной в день
+    "retention_tiered": (False, bool),
+    "retention_all_hours": (1, int),
+    "retention_hourly_days": (1, int),
+    "retention_daily_days": (30, int),
+    # Предел суммарного размера автокопий в МБ (0 — без предела)
+    "retention_max_mb": (0, int),
+}
+
+
+def validate_config_value(key: str, value):
+    """Проверить значение по CONFIG_SCHEMA; ValueError, если оно не подходит."""
+    rule = CONFIG_SCHEMA.get(key)
+    if rule is None:
+        return value
+    check = rule[1]
+    if isinstance(check, tuple):
+        ok = value in check
+    elif check is int:
+        ok = isinstance(value, int) and not isinstance(value, bool) and value >= 0
+    else:
+        ok = isinstance(value, check)
+    if not ok:
+        raise ValueError(f"{key}: {value!r}")
+    return value
+
+
+def coerce_config_value(key: str, value):
+    """Привести значение из старого конфига к типу схемы ("5" -> 5, "true" -> True).
+
+    ValueError, если привести нельзя или результат не проходит проверку.
+    """
+    rule = CONFIG_SCHEMA.get(key)
+    if rule is None:
+        return value
+    check = rule[1]
+    if check is bool and isinstance(value, (str, int, float)):
+        text = str(value).strip().lower()
+        if text in ("1", "1.0", "true", "yes", "on"):
+            value = True
+        elif text in ("0", "0.0", "false", "no", "off"):
+            value = False
+    elif check is int and isinstance(value, (str, float)):
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError(f"{key}: {value!r}") from None
+        if not number.is_integer():
+            raise ValueError(f"{key}: {value!r}")
+        value = int(number)
+    elif check is str and isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    return validate_config_value(key, value)
+
+
+class ConfigStore(dict):
+    """Конфиг в памяти: значения, проверенные по CONFIG_SCHEMA, и подписчики.
+
+    Читается как обычный dict. Присваивание проверяет значение и сообщает
+    подписчикам, какие ключи изменились, — производное состояние (пути, язык,
+    способ копирования) обновляется без перечитывания файла. На диск ничего не
+    пишется до save(): она откладывает запись на SAVE_DELAY секунд и сводит
+    серию изменений в одну. Файл пишется во временный рядом и подменяется
+    os.replace, поэтому два запущенных лаунчера не оставят обрезанный JSON.
+    """
+
+    SAVE_DELAY = 0.5
+
+    def __init__(self, path: Path):
+        super().__init__()
+        self.path = path
+        self._lock = Lock()
+        self._write_lock = Lock()
+        self._subscribers: list[tuple[object, frozenset | None]] = []
+        self._timer = None
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        """Прочитать файл (до первого запуска GUI — упакованный конфиг); неверные значения — по умолчанию."""
+        values = {key: default for key, (default, _) in CONFIG_SCHEMA.items()}
+        source = self.path if self.path.exists() else PACKAGED_CONFIG
+        try:
+            data = json.loads(source.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        if isinstance(data, dict):
+            for key, value in data.items():
+                try:
+                    values[key] = validate_config_value(key, value)
+                    continue
+                except ValueError:
+                    pass
+                try:
+                    # Старые конфиги хранили числа и флаги как попало — пробуем привести
+                    values[key] = coerce_config_value(key, value)
+                except ValueError:
+                    import logging
+
+                    logging.getLogger("noita_launcher.config").warning(
+                        "config %s: invalid value %r, using default %r", key, value, values[key]
+                    )
+        changed = {key for key, value in values.items() if self.get(key) != value}
+        with self._lock:
+            dict.clear(self)
+            dict.update(self, values)
+        self._notify(changed)
+
+    def __setitem__(self, key, value):
+        self.update({key: value})
+
+    def update(self, other=(), **kwargs):
+        values = dict(other, **kwargs)
+        for key, value in values.items():
+            validate_config_value(key, value)
+        with self._lock:
+            changed = {key for key, value in values.items() if key not in self or self[key] != value}
+            dict.update(self, values)
+        self._notify(changed)
+
+    def subscribe(self, callback, keys=None):
+        """callback(changed_keys) после изменения любого из keys (None — любых ключей)."""
+        self._subscribers.append((callback, frozenset(keys) if keys is not None else None))
+
+    def _notify(self, changed: set):
+        if not changed:
+            return
+        for callback, keys in list(self._subscribers):
+            if keys is None or keys & changed:
+                try:
+                    callback(changed)
+                except Exception:
+                    pass
+
+    def save(self):
+        """Записать конфиг через SAVE_DELAY секунд; повторные вызовы до записи сливаются."""
+        from threading import Timer
+
+        with self._lock:
+            self._dirty = True
+            if self._timer is None:
+                self._timer = Timer(self.SAVE_DELAY, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Записать отложенные изменения сейчас (при выходе из программы тоже)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            data = json.dumps(dict(self), indent=2, ensure_ascii=False)
+        with self._write_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.{get_ident()}.tmp")
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                # В Windows подмена не удаётся, пока файл открыт другим процессом на чтение
+                for attempt in range(5):
+                    try:
+                        os.replace(tmp, self.path)
+                        break
+                    except PermissionError:
+                        if attempt == 4:
+                            raise
+                        time.sleep(0.05)
+            finally:
+                tmp.unlink(missing_ok=True)
+
+
+config = ConfigStore(CONFIG_FILE)
+# Отложенная запись не должна потеряться при выходе
+atexit.register(config.flush)
+
+NOITA_SAVE = Path(config["noita_save_path"])
+NOITA_EXE = config["noita_exe_path"]
+SAVES_DIR = Path(config["saves_dir"])
+
+
+def set_paths(save_path=None, exe_path=None, saves_dir=None):
+    """Сменить рабочие пути: save00, Noita.exe и папку слотов (None — оставить прежний)."""
+    global NOITA_SAVE, NOITA_EXE, SAVES_DIR
+    if save_path is not None:
+        NOITA_SAVE = Path(save_path)
+    if exe_path is not None:
+        NOITA_EXE = str(exe_path)
+    if saves_dir is not None:
+        SAVES_DIR = Path(saves_dir)
+
+
+def _on_paths_changed(keys: set):
+    set_paths(
+        config["noita_save_path"] if "noita_save_path" in keys else None,
+        config["noita_exe_path"] if "noita_exe_path" in keys else None,
+        config["saves_dir"] if "saves_dir" in keys else None,
+    )
+
+
+config.subscribe(_on_paths_changed, ("noita_save_path", "noita_exe_path", "saves_dir"))
+TRANSLATIONS = {
+    "ru": {
+        "title": "Менеджер сохранений Noita",
+        "subtitle": "Резервные копии save00 и быстрый выбор слотов для Noita.",
+        "settings": "Настройки...",
+        "browse": "Выбрать",
+        "language": "Язык:",
+        "save_path": "Путь к save00:",
+        "exe_path": "Путь к Noita.exe:",
+        "saves_dir": "Папка для слотов:",
+        "open_logs": "Открыть журнал",
+        "slots_label": "Слоты:",
+        "rename_slot": "Переименовать",
+        "delete_slot": "Удалить",
+        "entry_label": "Имя для нового слота (опционально):",
+        "save_btn": "Сохранить текущий прогресс",
+        "load_btn": "Загрузить слот в save00",
+        "overwrite_btn": "Перезаписать слот",
+        "run_btn": "Запустить Noita с этим слотом",
+        "warning": "Предупреждение",
+        "confirm": "Подтверждение",
+        "error": "Ошибка",
+        "info": "Готово",
+        "select_slot": "Сначала выберите слот в списке.",
+        "save_missing": "Папка save00 не найдена:\n{path}",
+        "save_swap_failed": "Не удалось подменить save00 — возможно, его файлы открыты игрой или антивирусом. save00 не изменён.\n{path}\n{reason}",
+        "slot_missing": "Слот не найден:\n{path}",
+        "name_empty": "Имя не может быть пустым.",
+        "backup_done": "Слот сохранен: {slot}",
+        "load_done": "Слот \"{slot}\" восстановлен в save00.\nЗапустите Noita, чтобы продолжить.",
+        "overwrite_confirm": "Перезаписать слот \"{slot}\" текущим save00? Старые файлы будут заменены.",
+        "overwrite_done": "Слот \"{slot}\" обновлен.",
+        "delete_confirm": "Удалить слот \"{slot}\"? Действие необратимо.",
+        "rename_prompt": "Новое имя слота:",
+        "rename_title": "Переименовать слот",
+        "rename_exists": "Слот \"{slot}\" уже существует.",
+        "log_title": "Журнал",
+        "refresh": "Обновить",
+        "close": "Закрыть",
+        "noita_missing": "Noita.exe не найден:\n{path}\nУкажите путь в настройках.",
+        "run_done": "Слот \"{slot}\" восстановлен. Noita запускается.",
+        "auto_backup_fail": "Не удалось создать автокопию: {error}",
+        "save00_label": "Путь к текущему save00:",
+        "exe_label": "Путь к Noita.exe:",
+        "saves_dir_label": "Каталог для слотов:",
+        "format_label": "Шаблон имени слота (strftime):",
+        "format_example": "Пример:",
+        "theme_label": "Тема:",
+        "language_label": "Язык:",
+        "confirm_delete_label": "Спрашивать подтверждение перед удалением слотов",
+        "auto_backup_run_label": "Автобэкап перед запуском Noita",
+        "auto_backup_load_label": "Автобэкап перед загрузкой слота",
+        "max_backups_label": "Максимум автокопий (0 = без лимита):",
+        "retention_tiered_label": "Прореживать автокопии по времени (ручные слоты не удаляются)",
+        "retention_tiers_label": "Все за, ч / по одной в час, дн / в день, дн:",
+        "retention_max_mb_label": "Предел размера автокопий, МБ (0 = без лимита):",
+        "slot_storage_label": "Хранение новых слотов:",
+        "incremental_label": "Инкрементальные бэкапы (копировать только изменённые файлы)",
+        "filter_label": "Фильтр:",
+        "col_name": "Слот",
+        "col_date": "Дата",
+        "col_size": "Размер",
+        "col_kind": "Тип",
+        "kind_manual": "ручной",
+        "kind_auto_run": "авто (запуск)",
+        "kind_auto_load": "авто (загрузка)",
+        "kind_auto_session": "авто (сессия)",
+        "progress_detail": "{percent}% · {speed} МБ/с · осталось {eta}",
+        "queue_label": "Очередь операций:",
+        "cancel_job": "Отменить",
+        "job_queued": "в очереди",
+        "job_running": "выполняется",
+        "job_save": "Сохранение в «{slot}»",
+        "job_load": "Загрузка «{slot}»",
+        "job_overwrite": "Перезапись «{slot}»",
+        "job_run": "Запуск с «{slot}»",
+        "job_delete": "Удаление «{slot}»",
+        "job_rename": "Переименование «{slot}»",
+        "status_cancelled": "Операция отменена.",
+        "perf_title": "Производительность",
+        "perf_recent": "Последние операции",
+        "perf_phases": "Фазы выбранной операции",
+        "perf_summary": "Перцентили (успешные операции)",
+        "col_op": "Операция",
+        "col_status": "Итог",
+        "col_duration": "Время, с",
+        "col_phase": "Фаза",
+        "col_files": "Файлы",
+        "log_follow": "Следить за концом",
+        "log_goto": "Строка:",
+        "log_lines": "Строки {first}… из {count}",
+        "log_indexing": "Индексация… строк: {count}",
+        "log_missing": "logger.txt не найден.",
+        "session_snapshots_label": "Автоснимки во время игры, не чаще раза в (мин):",
+        "job_snapshot": "Автоснимок сессии",
+        "job_recover": "Восстановление после прерванной загрузки",
+        "status_snapshot": "Автоснимок сессии: {slot}",
+        "status_noita_exited": "Noita закрыта.",
+        "log_matches": "Найдено строк: {count}",
+        "log_searching": "Поиск…",
+        "log_search": "Поиск:",
+        "log_filter_all": "Все строки",
+        "log_filter_errors": "Ошибки",
+        "log_filter_problems": "Ошибки и предупреждения",
+        "log_filter_assets": "Не найденные ресурсы",
+        "log_filter_lua": "Lua",
+        "log_filter_mods": "Моды",
+        "log_all_sessions": "Все сессии",
+        "log_session_counts": "ошибок {errors}, предупр. {warnings}, ресурсов {assets}",
+        "store_blob_missing": "В хранилище слотов не найден объект для файла:\n{path}",
+        "diff_slot": "Сравнить",
+        "diff_title": "Сравнение слотов",
+        "diff_with": "Сравнить с:",
+        "diff_swap": "Поменять местами",
+        "diff_header": "Изменения от «{old}» к «{new}»",
+        "diff_summary": "Добавлено {added}, удалено {removed}, изменено {changed}, прирост {delta}",
+        "diff_same": "Различий нет.",
+        "diff_added": "добавлен",
+        "diff_removed": "удалён",
+        "diff_changed": "изменён",
+        "col_path": "Файл",
+        "col_old_size": "Было",
+        "col_new_size": "Стало",
+        "col_delta": "Разница",
+        "job_diff": "Сравнение «{slot}»",
+        "verify_slots": "Проверить",
+        "verify_full_prompt": "Перечитать все файлы, чтобы найти порчу данных на диске?\n«Нет» — проверить только файлы, изменившиеся с прошлой проверки (быстро).",
+        "job_verify": "Проверка слотов",
+        "verify_ok": "Все слоты целы ({count}).",
+        "verify_damaged": "Повреждённые слоты ({count}):",
+        "verify_slot_line": "{slot}: нет файлов — {missing}, повреждено — {corrupt}",
+        "verify_unhashed": "Файлов без хэшей (проверен только размер): {count}",
+        "backup_hashes_label": "Хэши файлов в слотах для проверки целостности",
+        "prewarm_label": "Заранее читать выбранный слот с диска (быстрее первая загрузка)",
+        "export_slot": "Экспорт",
+        "import_slot": "Импорт",
+        "export_filetype": "Слот Noita",
+        "job_export": "Экспорт «{slot}»",
+        "job_import": "Импорт «{slot}»",
+        "export_done": "Слот {slot} экспортирован в\n{path}",
+        "import_done": "Слот {slot} импортирован.",
+        "import_prompt": "Имя нового слота:",
+        "import_invalid": "Файл не подходит для импорта слота:\n{reason}",
+        "export_corrupt": "Файл слота не совпадает с хэшем из его манифеста:\n{path}",
+        "reset_paths": "Сбросить пути по умолчанию",
+        "reset_other": "Сбросить оформление и опции",
+        "save_settings": "Сохранить",
+        "cancel": "Отмена",
+        "settings_saved": "Настройки сохранены.",
+        "paths_header": "Пути",
+        "list_header": "Слоты",
+        "actions_header": "Действия",
+        "status_idle": "Выберите слот или создайте новый.",
+        "status_saved": "Создан слот {slot}.",
+        "status_loaded": "Слот {slot} восстановлен.",
+        "status_deleted": "Слот {slot} удален.",
+        "status_renamed": "Слот переименован в {slot}.",
+        "status_updated": "Слот {slot} обновлен.",
+        "status_run": "Слот {slot} восстановлен, запуск Noita...",
+    },
+    "en": {
+        "title": "Noita Save Manager",
+        "subtitle": "Back up save00 and switch slots quickly for Noita.",
+        "settings": "Settings...",
+        "browse": "Browse",
+        "language": "Language:",
+        "save_path": "save00 path:",
+        "exe_path": "Noita.exe path:",
+        "saves_dir": "Slots folder:",
+        "open_logs": "Open logs",
+        "slots_label": "Slots:",
+        "rename_slot": "Rename",
+        "delete_slot": "Delete",
+        "entry_label": "Name for a new slot (optional):",
+        "save_btn": "Save current progress",
+        "load_btn": "Load slot into save00",
+        "overwrite_btn": "Overwrite slot",
+        "run_btn": "Launch Noita with this slot",
+        "warning": "Warning",
+        "confirm": "Confirm",
+        "error": "Error",
+        "info": "Done",
+        "select_slot": "Select a slot from the list first.",
+        "save_missing": "save00 folder not found:\n{path}",
+        "save_swap_failed": "Could not replace save00 — its files may be open in the game or an antivirus. save00 was not changed.\n{path}\n{reason}",
+        "slot_missing": "Slot not found:\n{path}",
+        "name_empty": "Name cannot be empty.",
+        "backup_done": "Slot created: {slot}",
+        "load_done": "Slot \"{slot}\" restored to save00. Start Noita to continue.",
+        "overwrite_confirm": "Overwrite slot \"{slot}\" with current save00? Existing files will be replaced.",
+        "overwrite_done": "Slot \"{slot}\" updated.",
+        "delete_confirm": "Delete slot \"{slot}\"? This cannot be undone.",
+        "rename_prompt": "New slot name:",
+        "rename_title": "Rename slot",
+        "rename_exists": "Slot \"{slot}\" already exists.",
+        "log_title": "Logs",
+        "refresh": "Refresh",
+        "close": "Close",
+        "noita_missing": "Noita.exe not found:\n{path}\nUpdate the path in settings.",
+        "run_done": "Slot \"{slot}\" restored and Noita is launching.",
+        "auto_backup_fail": "Auto-backup failed: {error}",
+        "save00_label": "Path to current save00:",
+        "exe_label": "Path to Noita.exe:",
+        "saves_dir_label": "Directory for slots:",
+        "format_label": "Slot name pattern (strftime):",
+        "format_example": "Example:",
+        "theme_label": "Theme:",
+        "language_label": "Language:",
+        "confirm_delete_label": "Ask before deleting slots",
+        "auto_backup_run_label": "Auto-backup before launching Noita",
+        "auto_backup_load_label": "Auto-backup before loading slot",
+        "max_backups_label": "Max auto-backups (0 = unlimited):",
+        "retention_tiered_label": "Thin out auto backups by age (manual slots are never deleted)",
+        "retention_tiers_label": "All for, h / hourly for, days / daily for, days:",
+        "retention_max_mb_label": "Auto backups size limit, MB (0 = unlimited):",
+        "slot_storage_label": "Storage for new slots:",
+        "incremental_label": "Incremental backups (copy only changed files)",
+        "filter_label": "Filter:",
+        "col_name": "Slot",
+        "col_date": "Date",
+        "col_size": "Size",
+        "col_kind": "Type",
+        "kind_manual": "manual",
+        "kind_auto_run": "auto (launch)",
+        "kind_auto_load": "auto (load)",
+        "kind_auto_session": "auto (session)",
+        "progress_detail": "{percent}% · {speed} MB/s · ETA {eta}",
+        "queue_label": "Operation queue:",
+        "cancel_job": "Cancel",
+        "job_queued": "queued",
+        "job_running": "running",
+        "job_save": "Saving to “{slot}”",
+        "job_load": "Loading “{slot}”",
+        "job_overwrite": "Overwriting “{slot}”",
+        "job_run": "Launching with “{slot}”",
+        "job_delete": "Deleting “{slot}”",
+        "job_rename": "Renaming “{slot}”",
+        "status_cancelled": "Operation cancelled.",
+        "perf_title": "Performance",
+        "perf_recent": "Recent operations",
+        "perf_phases": "Phases of the selected operation",
+        "perf_summary": "Percentiles (successful operations)",
+        "col_op": "Operation",
+        "col_status": "Result",
+        "col_duration": "Time, s",
+        "col_phase": "Phase",
+        "col_files": "Files",
+        "log_follow": "Follow",
+        "log_goto": "Line:",
+        "log_lines": "Lines {first}… of {count}",
+        "log_indexing": "Indexing… {count} lines",
+        "log_missing": "logger.txt not found.",
+        "session_snapshots_label": "Snapshots while playing, at most every (min):",
+        "job_snapshot": "Session snapshot",
+        "job_recover": "Recovering from an interrupted load",
+        "status_snapshot": "Session snapshot: {slot}",
+        "status_noita_exited": "Noita closed.",
+        "log_matches": "{count} matching lines",
+        "log_searching": "Searching…",
+        "log_search": "Search:",
+        "log_filter_all": "All lines",
+        "log_filter_errors": "Errors",
+        "log_filter_problems": "Errors and warnings",
+        "log_filter_assets": "Missing assets",
+        "log_filter_lua": "Lua",
+        "log_filter_mods": "Mods",
+        "log_all_sessions": "All sessions",
+        "log_session_counts": "{errors} errors, {warnings} warnings, {assets} assets",
+        "store_blob_missing": "Slot store object is missing for file:\n{path}",
+        "diff_slot": "Compare",
+        "diff_title": "Compare slots",
+        "diff_with": "Compare with:",
+        "diff_swap": "Swap",
+        "diff_header": "Changes from “{old}” to “{new}”",
+        "diff_summary": "{added} added, {removed} removed, {changed} changed, delta {delta}",
+        "diff_same": "No differences.",
+        "diff_added": "added",
+        "diff_removed": "removed",
+        "diff_changed": "changed",
+        "col_path": "File",
+        "col_old_size": "Before",
+        "col_new_size": "After",
+        "col_delta": "Delta",
+        "job_diff": "Comparing “{slot}”",
+        "verify_slots": "Verify",
+        "verify_full_prompt": "Re-read every file to find data damaged on disk?\n“No” checks only files changed since the last check (fast).",
+        "job_verify": "Verifying slots",
+        "verify_ok": "All {count} slots are intact.",
+        "verify_damaged": "Damaged slots ({count}):",
+        "verify_slot_line": "{slot}: {missing} missing, {corrupt} corrupt",
+        "verify_unhashed": "Files without hashes (size checked only): {count}",
+        "backup_hashes_label": "Store file hashes in slots for integrity checks",
+        "prewarm_label": "Read the selected slot from disk in advance (faster first load)",
+        "export_slot": "Export",
+        "import_slot": "Import",
+        "export_filetype": "Noita slot",
+        "job_export": "Exporting “{slot}”",
+        "job_import": "Importing “{slot}”",
+        "export_done": "Slot {slot} exported to\n{path}",
+        "import_done": "Slot {slot} imported.",
+        "import_prompt": "Name for the new slot:",
+        "import_invalid": "Not a valid slot export:\n{reason}",
+        "export_corrupt": "Slot file does not match the hash in its manifest:\n{path}",
+        "reset_paths": "Reset paths to default",
+        "reset_other": "Reset look and options",
+        "save_settings": "Save",
+        "cancel": "Cancel",
+        "settings_saved": "Settings saved.",
+        "paths_header": "Paths",
+        "list_header": "Slots",
+        "actions_header": "Actions",
+        "status_idle": "Pick a slot or create a new one.",
+        "status_saved": "Slot {slot} created.",
+        "status_loaded": "Slot {slot} restored.",
+        "status_deleted": "Slot {slot} removed.",
+        "status_renamed": "Slot renamed to {slot}.",
+        "status_updated": "Slot {slot} updated.",
+        "status_run": "Slot {slot} restored, launching Noita...",
+        "status_saving": "Saving current save...",
+        "status_loading": "Loading slot...",
+        "status_overwrite": "Updating slot...",
+        "status_running": "Preparing slot and launching...",
+    },
+}
+
+# Строки текущего языка; меняются подпиской на "language", а не поиском в config на каждый вызов
+_strings = TRANSLATIONS.get(config["language"], TRANSLATIONS["en"])
+
+
+def _on_language_changed(_keys: set):
+    global _strings
+    _strings = TRANSLATIONS.get(config["language"], TRANSLATIONS["en"])
+
+
+config.subscribe(_on_language_changed, ("language",))
+
+
+def t(key: str) -> str:
+    text = _strings.get(key)
+    return text if text is not None else TRANSLATIONS["en"].get(key, key)
+
+
+
+
+# ---------- Логика слотов ----------
+
+# Служебные файлы и папки внутри SAVES_DIR начинаются с точки и слотами не считаются
+SLOT_MANIFEST = ".slot_manifest.json"
+STORE_DIR_NAME = ".objects"
+STORE_REFS_FILE = "refs.json"
+LAST_BACKUP_FILE = ".last_backup"
+# Индекс лежит в подпапке: его перезапись не меняет mtime самой SAVES_DIR
+SLOT_INDEX_FILE = ".index/slots.json"
+# Постоянный кэш хэшей файлов слотов: (устройство, inode) -> размер, mtime_ns, хэш
+HASH_CACHE_FILE = ".index/hashes.json"
+# Слот-архив: один zip-файл с центральным каталогом (доступ к любому файлу без распаковки)
+ARCHIVE_EXT = ".slot.zip"
+# Слоты в процессе удаления
+TRASH_PREFIX = ".trash-"
+# Папки корзины, которые этот процесс сейчас удаляет: уборка их не трогает
+# (меняется под _store_lock)
+_trash_in_flight: set[str] = set()
+# Слоты, которые ещё собираются (бэкап, импорт); брошенные убирает уборка
+TEMP_PREFIX = ".tmp-"
+# Временный слот старше этого точно брошен: живой обновляется непрерывно
+STALE_TEMP_SECONDS = 6 * 3600
+# Временная папка внутри обновляемого дерева для двухфазного обновления на месте
+PENDING_DIR = ".launcher_pending"
+# Уже сжатые форматы кладём в архив без повторного сжатия
+_STORED_SUFFIXES = {".png", ".jpg", ".ogg", ".zip"}
+HASH_CHUNK = 1024 * 1024
+
+_store_lock = Lock()
+# Объекты, которые идущий бэкап уже нашёл или пишет: ссылки на них появятся
+# только с его манифестом, а до тех пор удалять их нельзя (digest -> число бэкапов)
+_store_pins: dict[str, int] = {}
+# Кэш хэшей в памяти: (путь, размер, mtime_ns) -> digest
+_hash_cache: "OrderedDict[tuple[str, int, int], str]" = OrderedDict()
+_hash_cache_lock = Lock()
+# Сколько хэшей помнить: с запасом на несколько save00, старые вытесняются первыми
+HASH_CACHE_SIZE = 50_000
+# Буфер чтения для хэширования — свой у каждого потока, выделяется один раз
+_hash_buffers = local()
+
+
+# ---------- Копирование файлов ----------
+
+# ioctl FICLONE (Linux): reflink-копия на CoW-файловых системах (btrfs, XFS)
+FICLONE = 0x40049409
+COPY_BUFFER = 4 * 1024 * 1024
+
+# Ошибки, после которых стратегия считается неподдерживаемой для этой пары ФС
+_UNSUPPORTED_ERRNOS = {
+    errno.EOPNOTSUPP, errno.ENOTSUP, errno.EXDEV, errno.EINVAL,
+    errno.ENOSYS, errno.ENOTTY, errno.EBADF,
+}
+
+
+class _StrategyUnsupported(Exception):
+    pass
+
+
+class CopyEngine:
+    """Копирование файлов самым быстрым доступным способом.
+
+    Стратегии пробуются по порядку: reflink, copy_file_range, sendfile, readinto.
+    Первая сработавшая запоминается для пары файловых систем (st_dev источника и
+    приёмника) и дальше используется сразу.
+    """
+
+    STRATEGIES = ("reflink", "copy_file_range", "sendfile", "readinto")
+
+    def __init__(self, strategy: str = "auto"):
+        self.strategy = strategy
+        self._by_fs: dict[tuple[int, int], int] = {}
+        self._lock = Lock()
+
+    def available(self) -> list[str]:
+        names = []
+        for name in self.STRATEGIES:
+            if name == "reflink" and not _HAS_FCNTL:
+                continue
+            if name == "copy_file_range" and not hasattr(os, "copy_file_range"):
+                continue
+            if name == "sendfile" and (not hasattr(os, "sendfile") or sys.platform == "win32"):
+                continue
+            names.append(name)
+        return names
+
+    def strategy_for(self, src_dev: int, dst_dev: int) -> str | None:
+        idx = self._by_fs.get((src_dev, dst_dev))
+        return None if idx is None else self.STRATEGIES[idx]
+
+    def copyfile(self, src, dst):
+        """Скопировать содержимое файла (аналог shutil.copyfile)."""
+        with open(src, "rb", buffering=0) as fsrc, open(dst, "wb", buffering=0) as fdst:
+            src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+            key = (os.fstat(src_fd).st_dev, os.fstat(dst_fd).st_dev)
+            for idx in self._candidates(key):
+                try:
+                    getattr(self, f"_copy_{self.STRATEGIES[idx]}")(fsrc, fdst)
+                except _StrategyUnsupported:
+                    # Откатываем частично записанное и пробуем следующую стратегию
+                    os.lseek(src_fd, 0, os.SEEK_SET)
+                    os.lseek(dst_fd, 0, os.SEEK_SET)
+                    os.ftruncate(dst_fd, 0)
+                    continue
+                if self._by_fs.get(key) != idx:
+                    with self._lock:
+                        self._by_fs[key] = idx
+                return dst
+        return dst
+
+    def copy2(self, src, dst):
+        """Скопировать файл вместе с временем изменения (аналог shutil.copy2)."""
+        if os.path.isdir(dst):
+            dst = os.path.join(dst, os.path.basename(src))
+        self.copyfile(src, dst)
+        shutil.copystat(src, dst)
+        return dst
+
+    def streams(self, src, dst) -> bool:
+        """Пойдёт ли копирование src в dst через буфер процесса (стратегия readinto)."""
+        key = (os.stat(src).st_dev, os.stat(os.path.dirname(dst) or ".").st_dev)
+        return self.STRATEGIES[self._candidates(key)[0]] == "readinto"
+
+    def copy2_hashed(self, src, dst) -> str:
+        """copy2 через буфер процесса, заодно считающий хэш содержимого; возвращает хэш.
+
+        Имеет смысл, только когда копирование и так идёт через readinto (см. streams):
+        быстрые стратегии данных процессу не показывают.
+        """
+        with open(src, "rb", buffering=0) as fsrc, open(dst, "wb", buffering=0) as fdst:
+            digest = hash_stream(fsrc, fdst)
+        shutil.copystat(src, dst)
+        return digest
+
+    def _candidates(self, key: tuple[int, int]) -> list[int]:
+        available = [self.STRATEGIES.index(name) for name in self.available()]
+        fallback = self.STRATEGIES.index("readinto")
+        if self.strategy != "auto" and self.strategy in self.STRATEGIES:
+            # Заданная стратегия может быть недоступна на этой платформе (reflink
+            # без fcntl, sendfile в Windows) — тогда сразу readinto
+            forced = self.STRATEGIES.index(self.strategy)
+            return [forced, fallback] if forced in available and forced != fallback else [fallback]
+        cached = self._by_fs.get(key)
+        if cached is not None:
+            return [i for i in available if i >= cached]
+        return available
+
+    @staticmethod
+    def _unsupported(exc: OSError):
+        if exc.errno in _UNSUPPORTED_ERRNOS:
+            raise _StrategyUnsupported() from exc
+        raise exc
+
+    def _copy_reflink(self, fsrc, fdst):
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError as exc:
+            self._unsupported(exc)
+
+    def _copy_copy_file_range(self, fsrc, fdst):
+        size = os.fstat(fsrc.fileno()).st_size
+        try:
+            while os.copy_file_range(fsrc.fileno(), fdst.fileno(), max(size, COPY_BUFFER)):
+                pass
+        except OSError as exc:
+            self._unsupported(exc)
+
+    def _copy_sendfile(self, fsrc, fdst):
+        size = os.fstat(fsrc.fileno()).st_size
+        offset = 0
+        try:
+            while True:
+                n = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, max(size - offset, COPY_BUFFER))
+                if n == 0:
+                    break
+                offset += n
+        except OSError as exc:
+            self._unsupported(exc)
+
+    def _copy_readinto(self, fsrc, fdst):
+        buf = bytearray(COPY_BUFFER)
+        view = memoryview(buf)
+        while True:
+            n = fsrc.readinto(buf)
+            if not n:
+                break
+            written = 0
+            while written < n:
+                written += fdst.write(view[written:n])
+
+
+try:
+    import fcntl
+    _HAS_FCNTL = sys.platform.startswith("linux")
+except ImportError:
+    _HAS_FCNTL = False
+
+COPY_ENGINE = CopyEngine(config.get("copy_strategy", "auto"))
+
+
+def _warn_copy_strategy(engine: CopyEngine):
+    if engine.strategy != "auto" and engine.strategy not in engine.available():
+        import logging
+
+        logging.getLogger("noita_launcher.config").warning(
+            "copy_strategy %s is not supported on this platform, using readinto", engine.strategy
+        )
+
+
+_warn_copy_strategy(COPY_ENGINE)
+
+
+def _on_copy_strategy_changed(_keys: set):
+    global COPY_ENGINE
+    COPY_ENGINE = CopyEngine(config["copy_strategy"])
+    _warn_copy_strategy(COPY_ENGINE)
+
+
+config.subscribe(_on_copy_strategy_changed, ("copy_strategy",))
+
+
+def copy_workers() -> int:
+    """Число потоков для копирования (0 в конфиге = подобрать автоматически)."""
+    if getattr(_io_mode, "background", False):
+        return 1
+    try:
+        workers = int(config.get("copy_workers", 0) or 0)
+    except (TypeError, ValueError):
+        workers = 0
+    if workers <= 0:
+        workers = min(8, os.cpu_count() or 4)
+    return workers
+
+
+# Режим ввода-вывода текущего потока (см. background_io)
+_io_mode = local()
+
+# SetThreadPriority: фоновый режим потока (понижает и приоритет ввода-вывода)
+_THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+_THREAD_MODE_BACKGROUND_END = 0x00020000
+# ioprio_set в Linux: номер системного вызова по архитектуре, класс IDLE
+_IOPRIO_SET = {"x86_64": 251, "aarch64": 30}
+_IOPRIO_GET = {"x86_64": 252, "aarch64": 31}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_IDLE = 3 << 13
+
+
+def _lower_thread_io_priority():
+    """Понизить приоритет ввода-вывода текущего потока; вернуть функцию возврата."""
+    try:
+        import ctypes
+
+        if sys.platform == "win32":
+            kernel32 = ctypes.windll.kernel32
+            thread = kernel32.GetCurrentThread()
+            if kernel32.SetThreadPriority(thread, _THREAD_MODE_BACKGROUND_BEGIN):
+                return lambda: kernel32.SetThreadPriority(thread, _THREAD_MODE_BACKGROUND_END)
+        elif sys.platform.startswith("linux"):
+            import platform
+
+            machine = platform.machine()
+            if machine in _IOPRIO_SET:
+                libc = ctypes.CDLL(None, use_errno=True)
+                tid = get_native_id()
+                old = libc.syscall(_IOPRIO_GET[machine], _IOPRIO_WHO_PROCESS, tid)
+                if old >= 0 and libc.syscall(_IOPRIO_SET[machine], _IOPRIO_WHO_PROCESS, tid, _IOPRIO_CLASS_IDLE) == 0:
+                    return lambda: libc.syscall(_IOPRIO_SET[machine], _IOPRIO_WHO_PROCESS, tid, old)
+    except Exception:
+        pass
+    return lambda: None
+
+
+@contextmanager
+def background_io():
+    """Копировать в текущем потоке без пула и с пониженным приоритетом ввода-вывода.
+
+    Для снимков во время игры: диск нужен Noita для подгрузки чанков мира.
+    """
+    restore = _lower_thread_io_priority()
+    _io_mode.background = True
+    try:
+        yield
+    finally:
+        _io_mode.background = False
+        restore()
+
+
+class OperationCancelled(Exception):
+    """Операция отменена пользователем; цель осталась в прежнем или в новом виде, не в промежуточном."""
+
+
+class Progress:
+    """Счётчики прогресса длинной операции.
+
+    Рабочие потоки только прибавляют байты и файлы; интерфейс сам читает
+    snapshot() с нужной ему частотой, поэтому стоимость на файл — одно сложение.
+    Через тот же объект операцию можно отменить: cancel() выставляет флаг,
+    копирование проверяет его между файлами. span() замеряет фазы операции
+    (скан, копирование, удаление...) для журнала производительности.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.phase = ""
+        self.total_bytes = 0
+        self.total_files = 0
+        self.done_bytes = 0
+        self.done_files = 0
+        self.started = time.monotonic()
+        self._cancel = Event()
+        self.created = time.perf_counter()
+        # Счётчики advance() без сброса в begin(): из них берутся байты и файлы фаз
+        self._all_bytes = 0
+        self._all_files = 0
+        self.spans: list[dict] = []
+        self._open_spans: list[str] = []
+
+    @contextmanager
+    def span(self, phase: str):
+        """Замерить фазу: длительность и сколько байт/файлов прошло через advance() за неё.
+
+        Вложенные фазы получают имя с префиксом внешней: "auto_backup/scan".
+        """
+        name = "/".join(self._open_spans + [phase])
+        self._open_spans.append(phase)
+        start = time.perf_counter()
+        with self._lock:
+            bytes0, files0 = self._all_bytes, self._all_files
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._open_spans.pop()
+            with self._lock:
+                self.spans.append({
+                    "phase": name,
+                    "start": round(start - self.created, 4),
+                    "duration": round(end - start, 4),
+                    "bytes": self._all_bytes - bytes0,
+                    "files": self._all_files - files0,
+                })
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check(self):
+        """Бросить OperationCancelled, если операцию отменили."""
+        if self._cancel.is_set():
+            raise OperationCancelled()
+
+    def trace(self) -> dict:
+        """Фазы и общее число байт/файлов за всю операцию (для perf.log)."""
+        with self._lock:
+            return {"bytes": self._all_bytes, "files": self._all_files, "spans": list(self.spans)}
+
+    def begin(self, total_bytes: int, total_files: int, phase: str = ""):
+        with self._lock:
+            self.phase = phase
+            self.total_bytes = total_bytes
+            self.total_files = total_files
+            self.done_bytes = 0
+            self.done_files = 0
+            self.started = time.monotonic()
+
+    def advance(self, nbytes: int, nfiles: int = 1):
+        with self._lock:
+            self.done_bytes += nbytes
+            self.done_files += nfiles
+            self._all_bytes += nbytes
+            self._all_files += nfiles
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            done, total = self.done_bytes, self.total_bytes
+            snap = {
+                "phase": self.phase,
+                "done_bytes": done,
+                "total_bytes": total,
+                "done_files": self.done_files,
+                "total_files": self.total_files,
+                "elapsed": elapsed,
+            }
+        snap["fraction"] = min(1.0, done / total) if total else (1.0 if snap["total_files"] == 0 else 0.0)
+        snap["speed"] = done / elapsed if elapsed > 0 else 0.0
+        snap["eta"] = (total - done) / snap["speed"] if snap["speed"] > 0 and total > done else 0.0
+        return snap
+
+
+def span(progress: Progress | None, phase: str):
+    """Progress.span(), если progress передан; иначе пустой контекст."""
+    return progress.span(phase) if progress is not None else nullcontext()
+
+
+def run_parallel(
+    func,
+    items,
+    workers: int | None = None,
+    progress: Progress | None = None,
+    size_of=None,
+) -> list[tuple[object, Exception]]:
+    """Выполнить func(item) для всех элементов в пуле потоков.
+
+    Ошибки не прерывают работу: возвращается список (item, exception).
+    Если передан progress, после каждого элемента к нему прибавляется size_of(item) байт;
+    после отмены через progress оставшиеся элементы пропускаются и бросается OperationCancelled.
+    """
+    items = list(items)
+    workers = workers or copy_workers()
+    errors: list[tuple[object, Exception]] = []
+
+    def _call(item):
+        if progress is not None and progress.cancelled:
+            return
+        try:
+            func(item)
+        except Exception as exc:
+            errors.append((item, exc))
+        if progress is not None:
+            progress.advance(size_of(item) if size_of else 0)
+
+    if workers <= 1 or len(items) <= 1:
+        for item in items:
+            _call(item)
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="copy") as pool:
+            # map с ограниченным пулом: список задач в памяти, но не больше workers потоков
+            for _ in pool.map(_call, items):
+                pass
+    if progress is not None:
+        progress.check()
+    return errors
+
+
+def raise_copy_errors(errors: list[tuple[object, Exception]]):
+    """Собрать ошибки копирования в одно исключение shutil.Error (как copytree)."""
+    if not errors:
+        return
+    details = []
+    for item, exc in errors:
+        if isinstance(item, tuple) and len(item) == 2:
+            details.append((str(item[0]), str(item[1]), str(exc)))
+        else:
+            details.append((str(item), "", str(exc)))
+    raise shutil.Error(details)
+
+
+def copy_dir(
+    src: Path,
+    dst: Path,
+    files: dict | None = None,
+    dirs: list[str] | None = None,
+    progress: Progress | None = None,
+    copy=None,
+):
+    """Скопировать дерево src в dst: один обход, папки заранее, файлы в пуле потоков.
+
+    copy(src, dst) копирует один файл (по умолчанию COPY_ENGINE.copy2).
+    """
+    if files is None or dirs is None:
+        files, dirs = scan_tree(src)
+    if progress is not None:
+        progress.begin(sum(size for size, _ in files.values()), len(files), "copy")
+    if dst.exists():
+        shutil.rmtree(dst)
+    dst.mkdir(parents=True)
+    for rel in sorted(dirs):
+        (dst / rel).mkdir(parents=True, exist_ok=True)
+    # Манифест слота — служебный файл, scan_tree его пропускает, в save00 он не попадёт
+    copy = copy or COPY_ENGINE.copy2
+    errors = run_parallel(
+        lambda job: copy(src / job, dst / job),
+        files,
+        progress=progress,
+        size_of=lambda rel: files[rel][0],
+    )
+    raise_copy_errors([((src / rel, dst / rel), exc) for rel, exc in errors])
+
+
+def iter_slot_dirs() -> list[Path]:
+    """Все папки слотов в SAVES_DIR (без служебных)."""
+    if not SAVES_DIR.exists():
+        return []
+    return [d for d in SAVES_DIR.iterdir() if d.is_dir() and not d.name.startswith(".")]
+
+
+def is_archive_slot(path: Path) -> bool:
+    return path.name.endswith(ARCHIVE_EXT)
+
+
+def slot_name_of(path: Path) -> str:
+    return path.name[: -len(ARCHIVE_EXT)] if is_archive_slot(path) else path.name
+
+
+def iter_slots() -> list[Path]:
+    """Все слоты в SAVES_DIR: папки и архивы."""
+    if not SAVES_DIR.exists():
+        return []
+    slots = []
+    for entry in SAVES_DIR.iterdir():
+        if entry.name.startswith("."):
+            continue
+        if entry.is_dir() or (is_archive_slot(entry) and entry.is_file()):
+            slots.append(entry)
+    return slots
+
+
+def slot_path(slot_name: str) -> Path:
+    """Путь к слоту: папка, если есть, иначе архив (иначе путь будущей папки)."""
+    folder = SAVES_DIR / slot_name
+    if folder.is_dir():
+        return folder
+    archive = SAVES_DIR / f"{slot_name}{ARCHIVE_EXT}"
+    if archive.is_file():
+        return archive
+    return folder
+
+
+def slot_exists(slot_name: str) -> bool:
+    return slot_path(slot_name).exists()
+
+
+def slot_format(slot_name: str) -> str | None:
+    """'folder', 'store', 'archive' или None, если слота нет."""
+    path = slot_path(slot_name)
+    if not path.exists():
+        return None
+    if is_archive_slot(path):
+        return "archive"
+    return "store" if is_store_slot(path) else "folder"
+
+
+def scan_tree(root: Path) -> tuple[dict[str, tuple[int, int]], list[str]]:
+    """Обойти дерево и вернуть {rel_path: (size, mtime_ns)} и список подпапок."""
+    files: dict[str, tuple[int, int]] = {}
+    dirs: list[str] = []
+    stack = [(root, "")]
+    while stack:
+        current, prefix = stack.pop()
+        with os.scandir(current) as it:
+            for entry in it:
+                if not prefix and (entry.name.startswith(SLOT_MANIFEST) or entry.name == PENDING_DIR):
+                    continue
+                rel = f"{prefix}{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(rel)
+                    stack.append((Path(entry.path), rel + "/"))
+                elif entry.is_file():
+                    st = entry.stat()
+                    files[rel] = (st.st_size, st.st_mtime_ns)
+    return files, dirs
+
+
+def hash_stream(f, out=None) -> str:
+    """Хэш содержимого открытого файла (или файла внутри zip), кусками HASH_CHUNK.
+
+    out — файл, куда те же куски пишутся по пути (копирование с хэшем за одно чтение).
+    """
+    import hashlib
+    h = hashlib.blake2b(digest_size=20)
+    buf = getattr(_hash_buffers, "buf", None)
+    if buf is None:
+        buf = _hash_buffers.buf = bytearray(HASH_CHUNK)
+    view = memoryview(buf)
+    while True:
+        n = f.readinto(buf)
+        if not n:
+            break
+        h.update(view[:n])
+        if out is not None:
+            written = 0
+            while written < n:
+                written += out.write(view[written:n])
+    return h.hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    with open(path, "rb", buffering=0) as f:
+        return hash_stream(f)
+
+
+def _cached_hash(path: Path, size: int, mtime_ns: int) -> str:
+    key = (str(path), size, mtime_ns)
+    with _hash_cache_lock:
+        digest = _hash_cache.get(key)
+        if digest is not None:
+            _hash_cache.move_to_end(key)
+            return digest
+    digest = hash_file(path)
+    with _hash_cache_lock:
+        _hash_cache[key] = digest
+        if len(_hash_cache) > HASH_CACHE_SIZE:
+            _hash_cache.popitem(last=False)
+    return digest
+
+
+def read_manifest(slot_dir: Path) -> dict | None:
+    if is_archive_slot(slot_dir):
+        import zipfile
+        try:
+            with zipfile.ZipFile(slot_dir) as zf:
+                return json.loads(zf.read(SLOT_MANIFEST).decode("utf-8"))
+        except Exception:
+            return None
+    path = slot_dir / SLOT_MANIFEST
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+
+def write_manifest(slot_dir: Path, manifest: dict):
+    path = slot_dir / SLOT_MANIFEST
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _manifest_files(manifest: dict | None) -> dict[str, tuple[int, int]] | None:
+    if not manifest or "files" not in manifest:
+        return None
+    return {rel: (e["size"], e["mtime_ns"]) for rel, e in manifest["files"].items()}
+
+
+def _same_tree(manifest: dict | None, files: dict, dirs: list[str]) -> bool:
+    return _manifest_files(manifest) == files and sorted(manifest.get("dirs", [])) == sorted(dirs)
+
+
+def _folder_manifest(files: dict, dirs: list[str], hashes: dict[str, str] | None = None) -> dict:
+    entries = {rel: {"size": size, "mtime_ns": mtime_ns} for rel, (size, mtime_ns) in files.items()}
+    for rel, digest in (hashes or {}).items():
+        entries[rel]["hash"] = digest
+    return {
+        "version": 1,
+        "format": "folder",
+        "created": time.time(),
+        "files": entries,
+        "dirs": sorted(dirs),
+    }
+
+
+def is_store_slot(slot_dir: Path) -> bool:
+    if is_archive_slot(slot_dir):
+        return False
+    manifest = read_manifest(slot_dir)
+    return bool(manifest and manifest.get("format") == "store")
+
+
+# ---------- Хранилище объектов (дедупликация слотов) ----------
+
+def store_dir() -> Path:
+    return SAVES_DIR / STORE_DIR_NAME
+
+
+def _blob_path(digest: str) -> Path:
+    return store_dir() / digest[:2] / digest[2:]
+
+
+def _load_refs() -> dict[str, int]:
+    refs_file = store_dir() / STORE_REFS_FILE
+    if refs_file.exists():
+        try:
+            return json.loads(refs_file.read_text(encoding="utf-8"))
+        except Exception:
+            pass
+    # Счётчики потеряны или повреждены — пересчитываем по манифестам
+    return _count_refs()
+
+
+def _ensure_refs():
+    """Зафиксировать счётчики до изменения манифестов, чтобы пересчёт не задвоил ссылки."""
+    with _store_lock:
+        if not (store_dir() / STORE_REFS_FILE).exists():
+            _save_refs(_load_refs())
+
+
+def _save_refs(refs: dict[str, int]):
+    refs_file = store_dir() / STORE_REFS_FILE
+    refs_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = refs_file.with_name(refs_file.name + ".tmp")
+    tmp.write_text(json.dumps(refs), encoding="utf-8")
+    os.replace(tmp, refs_file)
+
+
+def _count_refs() -> dict[str, int]:
+    refs: dict[str, int] = {}
+    for d in iter_slot_dirs():
+        manifest = read_manifest(d)
+        if not manifest or manifest.get("format") != "store":
+            continue
+        for entry in manifest.get("files", {}).values():
+            refs[entry["hash"]] = refs.get(entry["hash"], 0) + 1
+    return refs
+
+
+def _manifest_hashes(manifest: dict | None) -> list[str]:
+    if not manifest or manifest.get("format") != "store":
+        return []
+    return [entry["hash"] for entry in manifest.get("files", {}).values()]
+
+
+def _update_refs(added: list[str], removed: list[str]):
+    """Изменить счётчики ссылок и удалить объекты, на которые больше никто не ссылается."""
+    with _store_lock:
+        _apply_refs(added, removed)
+
+
+def _apply_refs(added: list[str], removed: list[str]):
+    """_update_refs под уже взятым _store_lock."""
+    refs = _load_refs()
+    for digest in added:
+        refs[digest] = refs.get(digest, 0) + 1
+    for digest in removed:
+        refs[digest] = refs.get(digest, 0) - 1
+    dead = [digest for digest, count in refs.items() if count <= 0]
+    for digest in dead:
+        del refs[digest]
+        if digest in _store_pins:
+            # Объект нужен идущему бэкапу — ссылку на него добавит его манифест
+            continue
+        try:
+            _blob_path(digest).unlink()
+        except FileNotFoundError:
+            pass
+    _save_refs(refs)
+
+
+def _unpin_blobs(digests: list[str]):
+    with _store_lock:
+        for digest in digests:
+            count = _store_pins.get(digest, 0) - 1
+            if count > 0:
+                _store_pins[digest] = count
+            else:
+                _store_pins.pop(digest, None)
+
+
+def gc_store() -> int:
+    """Полная сборка мусора: пересчитать ссылки и удалить осиротевшие объекты.
+
+    Убирает и недописанные объекты прерванных бэкапов, и пустые папки .objects/xx;
+    объекты, закреплённые идущим бэкапом, не трогает.
+    """
+    root = store_dir()
+    if not root.exists():
+        return 0
+    removed = 0
+    with _store_lock:
+        refs = _count_refs()
+        busy = {digest[:2] for digest in _store_pins}
+        for sub in root.iterdir():
+            if not sub.is_dir():
+                continue
+            for blob in sub.iterdir():
+                # Недописанный объект: <имя>.<pid>-<поток>.tmp
+                digest = sub.name + blob.name.split(".", 1)[0]
+                if digest in refs or digest in _store_pins:
+                    continue
+                try:
+                    blob.unlink()
+                    removed += 1
+                except Exception:
+                    pass
+            if sub.name not in busy:
+                try:
+                    sub.rmdir()
+                except OSError:
+                    pass
+        _save_refs(refs)
+    return removed
+
+
+def store_backup(src: Path, dst: Path, files: dict, dirs: list[str], progress: Progress | None = None):
+    """Сохранить src в слот dst: новые объекты в хранилище, в слоте только манифест."""
+    _ensure_refs()
+    entries = {}
+    if progress is not None:
+        progress.begin(sum(size for size, _ in files.values()), len(files), "store")
+
+    # Закреплённые объекты: до записи манифеста их не удалит ни удаление
+    # другого слота, ни сборка мусора
+    pinned: list[str] = []
+
+    def _store_file(rel: str):
+        size, mtime_ns = files[rel]
+        path = src / rel
+        digest = _cached_hash(path, size, mtime_ns)
+        with _store_lock:
+            _store_pins[digest] = _store_pins.get(digest, 0) + 1
+            pinned.append(digest)
+        blob = _blob_path(digest)
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            tmp = blob.with_name(f"{blob.name}.{os.getpid()}-{get_ident()}.tmp")
+            COPY_ENGINE.copyfile(path, tmp)
+            os.replace(tmp, blob)
+        entries[rel] = {"size": size, "mtime_ns": mtime_ns, "hash": digest}
+
+    try:
+        raise_copy_errors(run_parallel(_store_file, files, progress=progress, size_of=lambda rel: files[rel][0]))
+        manifest = {
+            "version": 1,
+            "format": "store",
+            "created": time.time(),
+            "files": entries,
+            "dirs": sorted(dirs),
+        }
+        # Манифест и счётчики меняются вместе: сборка мусора, считающая ссылки
+        # по манифестам, не увидит слот без его ссылок или наоборот
+        with _store_lock:
+            old_hashes = _manifest_hashes(read_manifest(dst)) if dst.exists() else []
+            if dst.exists():
+                shutil.rmtree(dst)
+            dst.mkdir(parents=True)
+            write_manifest(dst, manifest)
+            _apply_refs(_manifest_hashes(manifest), old_hashes)
+    finally:
+        # Объекты прерванного бэкапа остаются без ссылок — их уберёт gc_store
+        _unpin_blobs(pinned)
+
+
+def store_restore(slot_dir: Path, dst: Path, progress: Progress | None = None) -> tuple[int, int]:
+    """Восстановить папку dst из объектов хранилища по манифесту слота."""
+    manifest = read_manifest(slot_dir) or {}
+    entries = manifest.get("files", {})
+    missing = [rel for rel, e in entries.items() if not _blob_path(e["hash"]).exists()]
+    if missing:
+        raise RuntimeError(t("store_blob_missing").format(path=missing[0]))
+
+    def _fetch(rel: str, target: Path):
+        entry = entries[rel]
+        COPY_ENGINE.copyfile(_blob_path(entry["hash"]), target)
+        os.utime(target, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+
+    return sync_dir(
+        dst,
+        _manifest_files(manifest) or {},
+        manifest.get("dirs", []),
+        _fetch,
+        source_hash=lambda rel: entries[rel]["hash"],
+        progress=progress,
+    )
+
+
+# ---------- Слоты-архивы ----------
+
+def _archive_compression() -> tuple[int, int | None]:
+    import zipfile
+    name = config.get("archive_compression", "deflate")
+    if name == "lzma":
+        return zipfile.ZIP_LZMA, None
+    if name == "bzip2":
+        return zipfile.ZIP_BZIP2, 9
+    return zipfile.ZIP_DEFLATED, 6
+
+
+def archive_backup(src: Path, dst: Path, files: dict, dirs: list[str], progress: Progress | None = None):
+    """Упаковать src в архив слота потоково (файлы читаются кусками, не целиком)."""
+    import zipfile
+    compression, level = _archive_compression()
+    if progress is not None:
+        progress.begin(sum(size for size, _ in files.values()), len(files), "archive")
+    tmp = dst.with_name(f"{TEMP_PREFIX}{dst.name}")
+    try:
+        with zipfile.ZipFile(
+            tmp, "w", compression=compression, compresslevel=level, strict_timestamps=False
+        ) as zf:
+            for rel in sorted(dirs):
+                zf.writestr(zipfile.ZipInfo(rel + "/"), b"")
+            for rel in sorted(files):
+                if progress is not None:
+                    progress.check()
+                stored = Path(rel).suffix.lower() in _STORED_SUFFIXES
+                zf.write(src / rel, rel, compress_type=zipfile.ZIP_STORED if stored else None)
+                if progress is not None:
+                    progress.advance(files[rel][0])
+            # zip хранит время с точностью 2 секунды — точные mtime_ns держим в манифесте
+            manifest = _folder_manifest(files, dirs)
+            manifest["format"] = "archive"
+            zf.writestr(SLOT_MANIFEST, json.dumps(manifest, ensure_ascii=False))
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _zip_mtime_ns(info) -> int:
+    """Время файла из каталога zip (местное, с точностью 2 секунды) в наносекундах."""
+    return int(time.mktime((*info.date_time, 0, 0, -1))) * 1_000_000_000
+
+
+def archive_restore(archive: Path, dst: Path, progress: Progress | None = None) -> tuple[int, int]:
+    """Восстановить dst из архива слота, распаковывая только отличающиеся файлы."""
+    import zipfile
+    with zipfile.ZipFile(archive) as zf:
+        try:
+            manifest = json.loads(zf.read(SLOT_MANIFEST).decode("utf-8"))
+        except KeyError:
+            # Архив без манифеста (например, собранный вручную) — берём список из каталога zip
+            manifest = {"files": {}, "dirs": []}
+            for info in zf.infolist():
+                name = info.filename.rstrip("/")
+                if info.is_dir():
+                    manifest["dirs"].append(name)
+                else:
+                    manifest["files"][name] = {"size": info.file_size, "mtime_ns": _zip_mtime_ns(info)}
+        entries = manifest.get("files", {})
+
+        def _fetch(rel: str, target: Path):
+            # Поток из архива в файл кусками COPY_BUFFER: память ограничена при любом размере слота
+            with zf.open(rel) as fsrc, open(target, "wb") as fdst:
+                shutil.copyfileobj(fsrc, fdst, COPY_BUFFER)
+            os.utime(target, ns=(entries[rel]["mtime_ns"], entries[rel]["mtime_ns"]))
+
+        return sync_dir(dst, _manifest_files(manifest) or {}, manifest.get("dirs", []), _fetch, progress=progress)
+
+
+def read_slot_file(slot_name: str, rel: str) -> bytes:
+    """Прочитать один файл слота (например, player.xml), не восстанавливая весь слот."""
+    import zipfile
+    path = slot_path(slot_name)
+    if is_archive_slot(path):
+        with zipfile.ZipFile(path) as zf:
+            return zf.read(rel)
+    manifest = read_manifest(path)
+    if manifest and manifest.get("format") == "store":
+        return _blob_path(manifest["files"][rel]["hash"]).read_bytes()
+    return (path / rel).read_bytes()
+
+
+def rename_slot(slot_name: str, new_name: str):
+    src = slot_path(slot_name)
+    if is_archive_slot(src):
+        src.rename(SAVES_DIR / f"{new_name}{ARCHIVE_EXT}")
+    else:
+        src.rename(SAVES_DIR / new_name)
+    slot_index().rename(slot_name, new_name)
+
+
+# ---------- Восстановление с синхронизацией ----------
+
+def _staging_dir(dst: Path) -> Path:
+    return dst.with_name(f"{dst.name}.staging")
+
+
+def _old_dirs(dst: Path) -> list[Path]:
+    """Старые копии dst, ещё не удалённые после подмены (новые в конце)."""
+    return sorted(dst.parent.glob(f"{dst.name}.old-*"))
+
+
+def swap_dirs(staging: Path, dst: Path):
+    """Подменить dst готовой папкой staging двумя переименованиями на одном томе."""
+    # Уникальное имя: предыдущая старая копия может ещё удаляться в фоне
+    old = dst.with_name(f"{dst.name}.old-{time.time_ns()}")
+    try:
+        # В Windows переименование не удаётся, пока игра или антивирус держит
+        # открытым файл в dst
+        if dst.exists():
+            dst.rename(old)
+        staging.rename(dst)
+    except Exception as exc:
+        # Не удалось поставить новую папку — возвращаем прежнюю на место; если
+        # не вышло и это, прежнюю папку вернёт recover_staging при следующем запуске
+        try:
+            if old.exists() and not dst.exists():
+                old.rename(dst)
+        except OSError:
+            pass
+        shutil.rmtree(staging, ignore_errors=True)
+        if isinstance(exc, OSError):
+            raise RuntimeError(t("save_swap_failed").format(path=dst, reason=exc)) from exc
+        raise
+    # Старую копию удаляем в фоне: пользователь уже видит новый save00
+    Thread(target=shutil.rmtree, args=(old,), kwargs={"ignore_errors": True}, daemon=True).start()
+
+
+def recover_staging(dst: Path):
+    """Убрать следы прерванной подмены: вернуть save00 или удалить временные папки."""
+    staging = _staging_dir(dst)
+    try:
+        old_dirs = _old_dirs(dst)
+        if not dst.exists() and old_dirs:
+            # Сбой между двумя переименованиями: прежний save00 цел, возвращаем его
+            old_dirs.pop().rename(dst)
+        if staging.exists():
+            shutil.rmtree(staging, ignore_errors=True)
+        if (dst / PENDING_DIR).exists():
+            shutil.rmtree(dst / PENDING_DIR, ignore_errors=True)
+        for old in old_dirs:
+            shutil.rmtree(old, ignore_errors=True)
+    except Exception:
+        pass
+
+def apply_in_place(
+    dst: Path,
+    changed: list[str],
+    fetch,
+    stale_files,
+    stale_dirs,
+    dirs: list[str],
+    progress: Progress | None = None,
+    size_of=None,
+):
+    """Обновить дерево dst на месте в две фазы.
+
+    Сначала изменённые файлы пишутся в PENDING_DIR внутри dst — эту фазу можно
+    отменить, и тогда dst остаётся прежним. Затем лишнее удаляется, а новые файлы
+    переносятся на место переименованием, что занимает доли секунды.
+    """
+    pending = dst / PENDING_DIR
+    if pending.exists():
+        shutil.rmtree(pending)
+    pending.mkdir(parents=True)
+    staged = {rel: pending / str(i) for i, rel in enumerate(changed)}
+    try:
+        with span(progress, "copy"):
+            errors = run_parallel(lambda rel: fetch(rel, staged[rel]), changed, progress=progress, size_of=size_of)
+        raise_copy_errors([((rel, staged[rel]), exc) for rel, exc in errors])
+    except BaseException:
+        shutil.rmtree(pending, ignore_errors=True)
+        raise
+    with span(progress, "delete"):
+        # Файлы, которых нет в источнике (или на их месте в источнике папка)
+        for rel in stale_files:
+            try:
+                (dst / rel).unlink()
+            except FileNotFoundError:
+                pass
+        # Лишние папки удаляем от самых глубоких; на месте папки в источнике может быть файл
+        for rel in sorted(stale_dirs, key=lambda r: r.count("/"), reverse=True):
+            shutil.rmtree(dst / rel, ignore_errors=True)
+    with span(progress, "apply"):
+        for rel in sorted(dirs):
+            (dst / rel).mkdir(parents=True, exist_ok=True)
+        for rel in changed:
+            os.replace(staged[rel], dst / rel)
+    shutil.rmtree(pending, ignore_errors=True)
+
+
+def sync_dir(
+    dst: Path,
+    files: dict,
+    dirs: list[str],
+    fetch,
+    source_hash=None,
+    progress: Progress | None = None,
+) -> tuple[int, int]:
+    """Привести dst к состоянию источника, трогая только отличающиеся файлы.
+
+    files/dirs описывают источник, fetch(rel, target) записывает файл источника
+    в target вместе с mtime. Файлы с одинаковыми размером и mtime_ns считаются
+    совпадающими; при restore_verify_hash совпадение проверяется хэшем.
+    При staged_restore результат собирается рядом и подменяет dst переименованием.
+    Возвращает (скопировано, удалено).
+    """
+    dst.mkdir(parents=True, exist_ok=True)
+    want_dirs = set(dirs)
+    verify = bool(config.get("restore_verify_hash", False))
+
+    def _differs(rel: str) -> bool:
+        cur = cur_files.get(rel)
+        if cur is None:
+            return True
+        if cur[0] != files[rel][0]:
+            return True
+        if not verify:
+            return cur[1] != files[rel][1]
+        src_digest = source_hash(rel) if source_hash else None
+        if src_digest is None:
+            return cur[1] != files[rel][1]
+        return _cached_hash(dst / rel, *cur) != src_digest
+
+    with span(progress, "compare"):
+        cur_files, cur_dirs = scan_tree(dst)
+        changed = [rel for rel in files if _differs(rel)]
+    deleted = len(cur_files.keys() - files.keys())
+    if progress is not None:
+        # Объём работы — только отличающиеся файлы
+        progress.begin(sum(files[rel][0] for rel in changed), len(changed), "restore")
+
+    def size_of(rel: str) -> int:
+        return files[rel][0]
+
+    if config.get("staged_restore", True):
+        staging = _staging_dir(dst)
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir()
+        for rel in sorted(want_dirs):
+            (staging / rel).mkdir(parents=True, exist_ok=True)
+        changed_set = set(changed)
+        try:
+            # Неизменные файлы: жёсткие ссылки на текущие, старая папка всё равно будет удалена
+            with span(progress, "link"):
+                errors = run_parallel(
+                    lambda rel: _link_or_copy(dst / rel, staging / rel),
+                    [rel for rel in files if rel not in changed_set],
+                )
+            with span(progress, "copy"):
+                errors += run_parallel(
+                    lambda rel: fetch(rel, staging / rel), changed, progress=progress, size_of=size_of
+                )
+            raise_copy_errors(errors)
+        except BaseException:
+            # Ошибка или отмена: dst не тронут, недособранную копию убираем
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        with span(progress, "swap"):
+            swap_dirs(staging, dst)
+        return len(changed), deleted
+
+    apply_in_place(
+        dst,
+        changed,
+        fetch,
+        cur_files.keys() - files.keys(),
+        set(cur_dirs) - want_dirs,
+        dirs,
+        progress=progress,
+        size_of=size_of,
+    )
+    return len(changed), deleted
+
+
+def delete_slot(slot_name: str):
+    """Удалить слот и освободить объекты хранилища, на которые он ссылался."""
+    slot_index().remove(slot_name)
+    archive = SAVES_DIR / f"{slot_name}{ARCHIVE_EXT}"
+    if archive.is_file():
+        archive.unlink()
+    _discard_slot_dir(SAVES_DIR / slot_name)
+
+
+def _discard_slot_dir(target: Path):
+    """Удалить папку слота (folder или store) без изменения индекса."""
+    if not target.exists():
+        return
+    hashes = _manifest_hashes(read_manifest(target))
+    if hashes:
+        _ensure_refs()
+    # Сначала убираем слот из списка переименованием: прерванное удаление не
+    # оставит полуслот, а остаток подчистит следующая уборка. Переименование и
+    # счётчики ссылок меняются под одной блокировкой с gc_store
+    trash = SAVES_DIR / f"{TRASH_PREFIX}{target.name}-{os.getpid()}-{time.time_ns()}"
+    with _store_lock:
+        try:
+            target.rename(trash)
+            _trash_in_flight.add(trash.name)
+        except OSError:
+            shutil.rmtree(target)
+            trash = None
+        if hashes:
+            _apply_refs([], hashes)
+    if trash is not None:
+        _remove_trash(trash)
+
+
+def _remove_trash(trash: Path):
+    """Удалить папку корзины; остаток после сбоя подчистит уборка."""
+    try:
+        shutil.rmtree(trash, ignore_errors=True)
+    finally:
+        with _store_lock:
+            _trash_in_flight.discard(trash.name)
+
+
+# ---------- Индекс слотов ----------
+
+def slot_kind(slot_name: str) -> str:
+    """Тип слота по имени: manual, auto_run, auto_load или auto_session."""
+    for kind in ("auto_run", "auto_load", "auto_session"):
+        if slot_name.startswith(f"{kind}_"):
+            return kind
+    return "manual"
+
+
+def _slot_info(path: Path) -> dict:
+    """Собрать запись индекса для слота, которого в индексе ещё нет."""
+    manifest = read_manifest(path)
+    if manifest and "files" in manifest:
+        sizes = [e["size"] for e in manifest["files"].values()]
+        created = manifest.get("created") or path.stat().st_mtime
+    elif is_archive_slot(path):
+        import zipfile
+        with zipfile.ZipFile(path) as zf:
+            sizes = [i.file_size for i in zf.infolist() if not i.is_dir()]
+        created = path.stat().st_mtime
+    else:
+        files, _ = scan_tree(path)
+        sizes = [size for size, _ in files.values()]
+        created = path.stat().st_mtime
+    name = slot_name_of(path)
+    return {
+        "created": created,
+        "size": sum(sizes),
+        "files": len(sizes),
+        "kind": slot_kind(name),
+        "format": "archive" if is_archive_slot(path) else (manifest or {}).get("format", "folder"),
+    }
+
+
+class SlotIndex:
+    """Постоянный индекс слотов в SAVES_DIR/.index/slots.json.
+
+    Операции со слотами обновляют индекс точечно; reconcile() сверяет его с
+    папкой одним проходом scandir и только если изменился mtime самой SAVES_DIR.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.path = root / SLOT_INDEX_FILE
+        self._lock = Lock()
+        self._slots: dict[str, dict] = {}
+        self._dir_mtime_ns = 0
+        self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self._slots = data.get("slots", {})
+            self._dir_mtime_ns = data.get("dir_mtime_ns", 0)
+        except Exception:
+            self._slots = {}
+            self._dir_mtime_ns = 0
+
+    def _save(self):
+        data = {"version": 1, "dir_mtime_ns": self._dir_mtime_ns, "slots": self._slots}
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            self.path.parent.mkdir(exist_ok=True)
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except Exception:
+            pass
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return sorted(self._slots)
+
+    def entries(self) -> dict[str, dict]:
+        with self._lock:
+            return {name: dict(info) for name, info in self._slots.items()}
+
+    def get(self, slot_name: str) -> dict | None:
+        with self._lock:
+            info = self._slots.get(slot_name)
+            return dict(info) if info else None
+
+    def put(self, slot_name: str, info: dict):
+        with self._lock:
+            self._slots[slot_name] = info
+            self._save()
+
+    def remove(self, slot_name: str):
+        with self._lock:
+            if self._slots.pop(slot_name, None) is not None:
+                self._save()
+
+    def rename(self, slot_name: str, new_name: str):
+        with self._lock:
+            info = self._slots.pop(slot_name, None)
+            if info is not None:
+                info["kind"] = slot_kind(new_name)
+                self._slots[new_name] = info
+                self._save()
+
+    def reconcile(self, force: bool = False, describe: bool = True) -> bool:
+        """Сверить индекс с содержимым SAVES_DIR. Возвращает True, если что-то изменилось.
+
+        describe=False добавляет новые слоты только с именем (pending), а размер и
+        дату потом заполняет describe_pending() — например, в фоновом потоке.
+        """
+        try:
+            dir_mtime_ns = self.root.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if not force and dir_mtime_ns == self._dir_mtime_ns:
+            if describe:
+                self.describe_pending()
+            return False
+
+        # scandir отдаёт тип записи без отдельного stat на каждый слот
+        on_disk: dict[str, Path] = {}
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                path = Path(entry.path)
+                if entry.is_dir() or (is_archive_slot(path) and entry.is_file()):
+                    on_disk.setdefault(slot_name_of(path), path)
+
+        with self._lock:
+            known = set(self._slots)
+        added = {name: on_disk[name] for name in on_disk.keys() - known}
+        removed = known - on_disk.keys()
+        infos = {
+            name: {"created": 0, "size": 0, "files": 0, "kind": slot_kind(name), "format": "", "pending": True}
+            for name in added
+        }
+
+        with self._lock:
+            for name in removed:
+                self._slots.pop(name, None)
+            self._slots.update(infos)
+            self._dir_mtime_ns = dir_mtime_ns
+            self._save()
+        if describe:
+            self.describe_pending()
+        return bool(added or removed)
+
+    def has_pending(self) -> bool:
+        with self._lock:
+            return any(info.get("pending") for info in self._slots.values())
+
+    def describe_pending(self) -> list[str]:
+        """Заполнить размер, число файлов и дату для слотов, найденных без описания."""
+        with self._lock:
+            pending = [name for name, info in self._slots.items() if info.get("pending")]
+        if not pending:
+            return []
+        infos = {}
+        for name in pending:
+            try:
+                infos[name] = _slot_info(slot_path(name))
+            except Exception:
+                infos[name] = {"created": 0, "size": 0, "files": 0, "kind": slot_kind(name), "format": "folder"}
+        with self._lock:
+            for name, info in infos.items():
+                # Слот могли удалить, пока мы его описывали
+                if name in self._slots:
+                    self._slots[name] = info
+            self._save()
+        return pending
+
+
+_slot_index: SlotIndex | None = None
+
+
+def slot_index(reload: bool = False) -> SlotIndex:
+    """Индекс для текущей SAVES_DIR (пересоздаётся, если папку сменили в настройках).
+
+    reload=True заново читает индекс с диска.
+    """
+    global _slot_index
+    if reload or _slot_index is None or _slot_index.root != SAVES_DIR:
+        _slot_index = SlotIndex(SAVES_DIR)
+    return _slot_index
+
+
+def _index_backup(slot_name: str, files: dict, storage: str):
+    slot_index().put(
+        slot_name,
+        {
+            "created": time.time(),
+            "size": sum(size for size, _ in files.values()),
+            "files": len(files),
+            "kind": slot_kind(slot_name),
+            "format": storage,
+        },
+    )
+
+
+# ---------- Наблюдение за папкой слотов ----------
+
+# inotify (Linux): создание, удаление и переименование записей в папке
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_IGNORED = 0x00008000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+# struct inotify_event: wd, mask, cookie, len
+_INOTIFY_EVENT_FORMAT = "iIII"
+
+
+class SavesWatcher:
+    """Фоновое наблюдение за SAVES_DIR.
+
+    На Linux использует inotify, иначе раз в poll_interval сверяет mtime папки.
+    Пачка событий сводится в один вызов on_change после debounce секунд тишины.
+    Служебные записи (с точкой в начале имени) игнорируются.
+    """
+
+    def __init__(self, root: Path, on_change, debounce: float = 0.3, poll_interval: float = 1.0):
+        self.root = root
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+    def start(self):
+        self._thread = Thread(target=self._run, name="saves-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        try:
+            if sys.platform.startswith("linux") and self._run_inotify():
+                return
+        except Exception:
+            pass
+        self._run_polling()
+
+    def _run_inotify(self) -> bool:
+        """Цикл на inotify. False — inotify недоступен, нужен опрос."""
+        import ctypes
+        import select
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return False
+        try:
+            mask = _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE_SELF | _IN_MOVE_SELF
+            if libc.inotify_add_watch(fd, os.fsencode(self.root), mask) < 0:
+                return False
+            deadline = None
+            while not self._stop.is_set():
+                timeout = 0.5 if deadline is None else max(0.0, deadline - time.monotonic())
+                ready, _, _ = select.select([fd], [], [], timeout)
+                if ready:
+                    relevant, gone = self._read_events(fd)
+                    if gone:
+                        # Саму папку удалили или перенесли — дальше только опрос
+                        self.on_change()
+                        return False
+                    if relevant:
+                        deadline = time.monotonic() + self.debounce
+                elif deadline is not None and time.monotonic() >= deadline:
+                    deadline = None
+                    self.on_change()
+            return True
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _read_events(fd: int) -> tuple[bool, bool]:
+        import struct
+
+        event = struct.Struct(_INOTIFY_EVENT_FORMAT)
+        relevant = gone = False
+        while True:
+            try:
+                data = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + event.size <= len(data):
+                _, mask, _, length = event.unpack_from(data, offset)
+                name = data[offset + event.size: offset + event.size + length].rstrip(b"\0")
+                offset += event.size + length
+                if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED):
+                    gone = True
+                elif name and not name.startswith(b"."):
+                    relevant = True
+        return relevant, gone
+
+    def _run_polling(self):
+        def _mtime():
+            try:
+                return self.root.stat().st_mtime_ns
+            except OSError:
+                return None
+
+        last = _mtime()
+        while not self._stop.wait(self.poll_interval):
+            current = _mtime()
+            if current != last:
+                # Ждём, пока серия изменений закончится
+                while not self._stop.wait(self.debounce):
+                    settled = _mtime()
+                    if settled == current:
+                        break
+                    current = settled
+                last = current
+                self.on_change()
+
+
+# ---------- Инкрементальные бэкапы ----------
+
+def _last_backup_slot() -> Path | None:
+    """Слот, сохранённый последним (база для инкрементального бэкапа)."""
+    pointer = SAVES_DIR / LAST_BACKUP_FILE
+    try:
+        name = pointer.read_text(encoding="utf-8").strip()
+    except Exception:
+        return None
+    if not name:
+        return None
+    slot = slot_path(name)
+    if slot.exists() and read_manifest(slot):
+        return slot
+    return None
+
+
+def _set_last_backup(slot_name: str):
+    try:
+        (SAVES_DIR / LAST_BACKUP_FILE).write_text(slot_name, encoding="utf-8")
+    except Exception:
+        pass
+
+
+def _link_or_copy(src: Path, dst: Path, copy=None):
+    """Жёсткая ссылка, а если нельзя — копия через copy(src, dst) (по умолчанию COPY_ENGINE.copy2)."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        (copy or COPY_ENGINE.copy2)(src, dst)
+
+
+def _copy_into_slot(src: Path, dst: Path):
+    """Скопировать файл в слот движком копирования.
+
+    Если движок для этой пары файловых систем и так копирует через буфер
+    (readinto), а backup_hashes включён, хэш считается по пути и сразу попадает
+    в кэш хэшей — _hash_slot_files не читает файл второй раз. Reflink,
+    copy_file_range и sendfile не заменяются: такие копии хэширует
+    _hash_slot_files (после copy_file_range файл обычно ещё в кэше страниц).
+    """
+    if config.get("backup_hashes", True) and COPY_ENGINE.streams(src, dst):
+        digest = COPY_ENGINE.copy2_hashed(src, dst)
+        hash_cache().put(os.stat(dst), digest)
+        return
+    COPY_ENGINE.copy2(src, dst)
+
+
+def incremental_backup(src: Path, dst: Path, files: dict, dirs: list[str], progress: Progress | None = None):
+    """Обновить слот dst по src, копируя только изменившиеся файлы.
+
+    Существующий слот обновляется на месте по его манифесту. Новый слот собирается
+    во временной папке: неизменные файлы берутся жёсткими ссылками из последнего
+    бэкапа, остальные копируются.
+    """
+    manifest = read_manifest(dst) if dst.exists() else None
+    old_files = _manifest_files(manifest) if manifest and manifest.get("format") == "folder" else None
+
+    if old_files is not None:
+        changed = [rel for rel, stat in files.items() if old_files.get(rel) != stat or not (dst / rel).exists()]
+        if progress is not None:
+            progress.begin(sum(files[rel][0] for rel in changed), len(changed), "backup")
+        # Новые версии пишутся отдельными файлами и заменяют старые переименованием,
+        # поэтому жёсткие ссылки из других слотов не портятся
+        apply_in_place(
+            dst,
+            changed,
+            lambda rel, target: _copy_into_slot(src / rel, target),
+            old_files.keys() - files.keys(),
+            set(manifest.get("dirs", [])) - set(dirs),
+            dirs,
+            progress=progress,
+            size_of=lambda rel: files[rel][0],
+        )
+        write_manifest(dst, _folder_manifest(files, dirs, _hash_slot_files(dst, files, progress)))
+        return
+
+    base = _last_backup_slot()
+    base_manifest = read_manifest(base) if base else None
+    base_files = {}
+    if base_manifest and base_manifest.get("format") == "folder":
+        base_files = _manifest_files(base_manifest) or {}
+
+    tmp = SAVES_DIR / f"{TEMP_PREFIX}{dst.name}"
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+    for rel in sorted(dirs):
+        (tmp / rel).mkdir(parents=True, exist_ok=True)
+
+    linked = [rel for rel in files if base_files.get(rel) == files[rel]]
+    copied = [rel for rel in files if base_files.get(rel) != files[rel]]
+    if progress is not None:
+        progress.begin(sum(files[rel][0] for rel in copied), len(copied), "backup")
+    try:
+        errors = run_parallel(lambda rel: _link_or_copy(base / rel, tmp / rel, _copy_into_slot), linked)
+        errors += run_parallel(
+            lambda rel: _copy_into_slot(src / rel, tmp / rel),
+            copied,
+            progress=progress,
+            size_of=lambda rel: files[rel][0],
+        )
+        raise_copy_errors([((src / rel, tmp / rel), exc) for rel, exc in errors])
+        write_manifest(tmp, _folder_manifest(files, dirs, _hash_slot_files(tmp, files, progress)))
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    _commit_slot_dir(tmp, dst)
+
+
+def _commit_slot_dir(tmp: Path, dst: Path):
+    """Поставить собранную во временной папке копию на место слота dst.
+
+    Старый слот сначала переименовывается в корзину и удаляется, только когда
+    новый уже на месте; если новый поставить не удалось, старый возвращается.
+    """
+    hashes = _manifest_hashes(read_manifest(dst)) if dst.exists() else []
+    if hashes:
+        _ensure_refs()
+    trash = None
+    # Под блокировкой хранилища: gc_store и уборка корзины не увидят промежуточного состояния
+    with _store_lock:
+        if dst.exists():
+            trash = SAVES_DIR / f"{TRASH_PREFIX}{dst.name}-{os.getpid()}-{time.time_ns()}"
+            dst.rename(trash)
+            _trash_in_flight.add(trash.name)
+        try:
+            tmp.rename(dst)
+        except BaseException:
+            if trash is not None:
+                trash.rename(dst)
+                _trash_in_flight.discard(trash.name)
+            raise
+        if hashes:
+            _apply_refs([], hashes)
+    if trash is not None:
+        _remove_trash(trash)
+
+
+def plan_retention(entries: dict[str, dict], now: float | None = None) -> list[str]:
+    """Какие автокопии удалить по правилам уборки (старые первыми); ручные слоты не трогаются.
+
+    С retention_tiered сохраняются все автокопии за retention_all_hours часов,
+    самая новая в каждом часе за retention_hourly_days дней и в каждом дне за
+    retention_daily_days дней, остальные удаляются. Затем из оставшихся
+    остаются не больше max_backups самых новых и не больше retention_max_mb
+    мегабайт (самая новая автокопия остаётся всегда). Решение принимается
+    только по записям индекса, без обращения к диску.
+    """
+    import heapq
+
+    now = time.time() if now is None else now
+    autos = sorted(
+        (
+            (info.get("created", 0), name, info.get("size", 0))
+            for name, info in entries.items()
+            if slot_kind(name).startswith("auto_") and not info.get("pending")
+        ),
+        reverse=True,
+    )
+    keep: list[tuple[float, str, int]] = []
+    drop: list[str] = []
+    if config.get("retention_tiered", False):
+        keep_all = config.get("retention_all_hours", 1) * 3600
+        hourly = config.get("retention_hourly_days", 1) * 86400
+        daily = config.get("retention_daily_days", 30) * 86400
+        seen: set = set()
+        for created, name, size in autos:
+            age = now - created
+            if age < keep_all:
+                bucket = None
+            elif age < hourly:
+                bucket = ("hour", int(created // 3600))
+            elif age < daily:
+                bucket = ("day", time.localtime(created)[:3])
+            else:
+                drop.append(name)
+                continue
+            if bucket is not None and bucket in seen:
+                drop.append(name)
+                continue
+            seen.add(bucket)
+            keep.append((created, name, size))
+    else:
+        keep = list(autos)
+
+    max_b = int(config.get("max_backups", 0) or 0)
+    if max_b > 0 and len(keep) > max_b:
+        drop.extend(name for _, name, _ in keep[max_b:])
+        keep = keep[:max_b]
+
+    budget = int(config.get("retention_max_mb", 0) or 0) * 1024 * 1024
+    total = sum(size for _, _, size in keep)
+    if budget > 0 and total > budget:
+        # Куча по дате: снимаем самые старые, пока не уложимся; самую новую не трогаем
+        heap = list(keep[1:])
+        heapq.heapify(heap)
+        while heap and total > budget:
+            _, name, size = heapq.heappop(heap)
+            drop.append(name)
+            total -= size
+
+    order = {name: created for created, name, _ in autos}
+    return sorted(drop, key=order.__getitem__)
+
+
+def cleanup_old_backups() -> list[str]:
+    """Удалить автокопии по правилам уборки (plan_retention) и вернуть их имена."""
+    if not SAVES_DIR.exists():
+        return []
+    # Остатки прерванных удалений и брошенные временные слоты (сбой посреди
+    # бэкапа или импорта); корзину, которую сейчас удаляет delete_slot, и свежие
+    # временные слоты (возможно, ещё собираются) не трогаем
+    stale = time.time() - STALE_TEMP_SECONDS
+    leftovers = []
+    with _store_lock, os.scandir(SAVES_DIR) as it:
+        for entry in it:
+            try:
+                if (entry.name.startswith(TRASH_PREFIX) and entry.name not in _trash_in_flight) or (
+                    entry.name.startswith(TEMP_PREFIX) and entry.stat(follow_symlinks=False).st_mtime < stale
+                ):
+                    leftovers.append(entry)
+            except OSError:
+                pass
+    for entry in leftovers:
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+    # Решение принимается по индексу, без stat каждого слота
+    index = slot_index()
+    index.reconcile()
+    deleted = []
+    for name in plan_retention(index.entries()):
+        if resource_busy(slot_resource(name)):
+            # Слот сейчас загружается или меняется другой задачей — удалим в следующий раз
+            continue
+        try:
+            delete_slot(name)
+            deleted.append(name)
+        except Exception:
+            pass
+    # Объекты хранилища без ссылок: от отменённых бэкапов и прерванных удалений
+    try:
+        gc_store()
+    except Exception:
+        pass
+    return deleted
+
+
+_prune_lock = Lock()
+_prune_thread: Thread | None = None
+_prune_again = False
+
+
+def request_prune():
+    """Запустить cleanup_old_backups в фоне: бэкап не ждёт уборки.
+
+    Запросы во время уборки сливаются в один повторный проход. Поток не
+    демонический — при выходе программа дождётся конца удаления.
+    """
+    global _prune_thread, _prune_again
+    with _prune_lock:
+        if _prune_thread is not None:
+            _prune_again = True
+            return
+        _prune_thread = Thread(target=_prune_loop, name="prune")
+        _prune_thread.start()
+
+
+def _prune_loop():
+    global _prune_thread, _prune_again
+    while True:
+        try:
+            cleanup_old_backups()
+        except Exception:
+            pass
+        with _prune_lock:
+            if not _prune_again:
+                _prune_thread = None
+                return
+            _prune_again = False
+
+
+def wait_prune():
+    """Дождаться фоновой уборки, если она идёт."""
+    with _prune_lock:
+        thread = _prune_thread
+    if thread is not None:
+        thread.join()
+
+
+def generate_auto_name(prefix: str) -> str:
+    from datetime import datetime
+    fmt = config.get("save_name_format", "%Y-%m-%d_%H-%M-%S")
+    try:
+        suffix = datetime.now().strftime(fmt)
+    except Exception:
+        suffix = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    return f"{prefix}{suffix}"
+
+
+def make_backup(
+    slot_name: str | None = None,
+    skip_unchanged: bool = False,
+    progress: Progress | None = None,
+) -> str:
+    """Сохранить текущий save00 в слот.
+
+    skip_unchanged: если save00 не менялся с последнего бэкапа, новый слот не
+    создаётся и возвращается имя последнего слота (для автокопий).
+    progress: счётчики байт/файлов для индикатора (необязательно).
+    """
+    from datetime import datetime
+
+    if not NOITA_SAVE.exists():
+        raise RuntimeError(t("save_missing").format(path=NOITA_SAVE))
+    SAVES_DIR.mkdir(parents=True, exist_ok=True)
+
+    if not slot_name or slot_name.strip() == "":
+        # используем формат из config (strftime)
+        fmt = config.get("save_name_format", "%Y-%m-%d_%H-%M-%S")
+        try:
+            slot_name = datetime.now().strftime(fmt)
+        except Exception:
+            slot_name = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+    dst = SAVES_DIR / slot_name
+    with span(progress, "scan"):
+        files, dirs = scan_tree(NOITA_SAVE)
+    if skip_unchanged:
+        last = _last_backup_slot()
+        if last is not None and _same_tree(read_manifest(last), files, dirs):
+            return slot_name_of(last)
+
+    storage = config.get("slot_storage", "folder")
+    # Слот с этим именем в другом формате удаляется только после того, как
+    # новый собран: сбой или отмена бэкапа его не потеряют. Папки folder и
+    # store заменяют друг друга сами (_commit_slot_dir, store_backup)
+    existing = slot_format(slot_name)
+
+    with span(progress, f"copy:{storage}"):
+        if storage == "store":
+            store_backup(NOITA_SAVE, dst, files, dirs, progress)
+        elif storage == "archive":
+            archive_backup(NOITA_SAVE, SAVES_DIR / f"{slot_name}{ARCHIVE_EXT}", files, dirs, progress)
+        elif config.get("incremental_backups", False):
+            incremental_backup(NOITA_SAVE, dst, files, dirs, progress)
+        else:
+            # Полная копия собирается рядом: отмена не оставит полупустой слот
+            tmp = SAVES_DIR / f"{TEMP_PREFIX}{slot_name}"
+            try:
+                copy_dir(NOITA_SAVE, tmp, files, dirs, progress, copy=_copy_into_slot)
+                write_manifest(tmp, _folder_manifest(files, dirs, _hash_slot_files(tmp, files, progress)))
+            except BaseException:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+            _commit_slot_dir(tmp, dst)
+    if existing is not None and existing != storage and "archive" in (existing, storage):
+        with span(progress, "delete"):
+            if existing == "archive":
+                (SAVES_DIR / f"{slot_name}{ARCHIVE_EXT}").unlink(missing_ok=True)
+            else:
+                _discard_slot_dir(dst)
+    with span(progress, "index"):
+        _index_backup(slot_name, files, storage)
+        _set_last_backup(slot_name)
+    request_prune()
+    return slot_name
+
+
+def load_slot(slot_name: str, progress: Progress | None = None):
+    src = slot_path(slot_name)
+    if not src.exists():
+        raise RuntimeError(f"Слот не найден:\n{src}")
+    if is_archive_slot(src):
+        archive_restore(src, NOITA_SAVE, progress)
+        return
+    if is_store_slot(src):
+        store_restore(src, NOITA_SAVE, progress)
+        return
+    with span(progress, "scan"):
+        files, dirs = scan_tree(src)
+    sync_dir(
+        NOITA_SAVE,
+        files,
+        dirs,
+        lambda rel, target: COPY_ENGINE.copy2(src / rel, target),
+        source_hash=lambda rel: _cached_hash(src / rel, *files[rel]),
+        progress=progress,
+    )
+
+
+def restore_slot(slot_name: str, auto_backup: str | None = None, progress: Progress | None = None):
+    """Загрузить слот в save00.
+
+    auto_backup — префикс автокопии ("auto_load_", "auto_run_"), которая снимается
+    с текущего save00 перед загрузкой; None — без автокопии.
+    """
+    if auto_backup:
+        with span(progress, "auto_backup"):
+            make_backup(generate_auto_name(auto_backup), skip_unchanged=True, progress=progress)
+    load_slot(slot_name, progress=progress)
+
+
+def launch_noita():
+    """Запустить Noita.exe из его папки и вернуть процесс."""
+    import subprocess
+    exe_path = Path(NOITA_EXE)
+    if not exe_path.exists():
+        raise RuntimeError(t("noita_missing").format(path=exe_path))
+    try:
+        return subprocess.Popen(
+            [str(exe_path)],
+            cwd=str(exe_path.parent),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except Exception as proc_err:
+        raise RuntimeError(f"Failed to start Noita: {proc_err}")
+
+
+# ---------- Прогрев слота ----------
+
+PREWARM_CHUNK = 1024 * 1024
+# Больше этого читать заранее нет смысла: поздние куски вытеснят из кэша ранние
+PREWARM_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+
+def slot_read_paths(slot_name: str) -> list[tuple[Path, int]]:
+    """Файлы, которые прочитает загрузка слота, в порядке обхода папки: (путь, размер)."""
+    path = slot_path(slot_name)
+    if not path.exists():
+        return []
+    if is_archive_slot(path):
+        return [(path, path.stat().st_size)]
+    manifest = read_manifest(path)
+    if manifest and manifest.get("format") == "store":
+        # Объекты хранилища — по порядку имён, так они разложены по папкам .objects
+        blobs = {e["hash"]: e["size"] for e in manifest["files"].values()}
+        return [(_blob_path(digest), blobs[digest]) for digest in sorted(blobs)]
+    files, _ = scan_tree(path)
+    return [(path / rel, size) for rel, (size, _) in files.items()]
+
+
+def prewarm_slot(slot_name: str, cancel: Event) -> int:
+    """Прочитать файлы слота заранее, чтобы загрузка нашла их в кэше страниц.
+
+    Файлы читаются по одному и последовательно; где есть posix_fadvise, ядро
+    сначала получает WILLNEED на весь файл и читает его крупными запросами.
+    Между кусками проверяется cancel. Возвращает число прочитанных байт.
+    """
+    done = 0
+    buf = bytearray(PREWARM_CHUNK)
+    for path, _size in slot_read_paths(slot_name):
+        if cancel.is_set() or done >= PREWARM_MAX_BYTES:
+            break
+        try:
+            with open(path, "rb", buffering=0) as f:
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                while not cancel.is_set():
+                    n = f.readinto(buf)
+                    if not n:
+                        break
+                    done += n
+        except OSError:
+            continue
+    return done
+
+
+class SlotPrewarmer:
+    """Прогрев выбранного слота в фоне; start() отменяет предыдущий прогрев.
+
+    Читает один поток с фоновым приоритетом ввода-вывода (background_io), так
+    что операциям со слотами и игре диск уступается.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._cancel: Event | None = None
+
+    def start(self, slot_name: str):
+        cancel = Event()
+        with self._lock:
+            if self._cancel is not None:
+                self._cancel.set()
+            self._cancel = cancel
+        Thread(target=self._run, args=(slot_name, cancel), name="prewarm", daemon=True).start()
+
+    def cancel(self):
+        with self._lock:
+            if self._cancel is not None:
+                self._cancel.set()
+                self._cancel = None
+
+    @staticmethod
+    def _run(slot_name: str, cancel: Event):
+        try:
+            with background_io():
+                prewarm_slot(slot_name, cancel)
+        except Exception:
+            # Прогрев — только подсказка кэшу: ошибка чтения ничего не ломает
+            pass
+
+
+# ---------- Сессия игры ----------
+
+# Префикс автоснимков, сделанных во время игры
+SESSION_SNAPSHOT_PREFIX = "auto_session_"
+
+
+class SessionMonitor:
+    """Автоснимки save00, пока запущенная лаунчером Noita работает.
+
+    Раз в poll_interval секунд сверяет save00 через scan_tree (только stat, без
+    чтения файлов). Снимок делается, когда файлы изменились с прошлого снимка,
+    запись затихла на settle секунд и с прошлого снимка (или запуска) прошло
+    не меньше interval секунд; после выхода игры — последний снимок, если было
+    что сохранять. Сам снимок идёт в background_io(), чтобы не отнимать диск у
+    игры. run(func) выполняет снимок вызовом func(progress): по умолчанию сразу
+    в потоке монитора, GUI ставит его в очередь операций. on_snapshot(name) и on_exit(returncode)
+    вызываются из рабочих потоков.
+    """
+
+    def __init__(
+        self,
+        process,
+        interval: float,
+        settle: float = 15.0,
+        poll_interval: float = 5.0,
+        run=None,
+        on_snapshot=None,
+        on_exit=None,
+    ):
+        self.process = process
+        self.interval = interval
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.run = run
+        self.on_snapshot = on_snapshot
+        self.on_exit = on_exit
+        self._stop = Event()
+        self._thread: Thread | None = None
+        # Состояние save00 на момент последнего снимка (или запуска игры)
+        self._snapshot_files = None
+
+    def start(self):
+        self._thread = Thread(target=self._run, name="session-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def wait(self):
+        """Дождаться выхода игры и последнего снимка."""
+        if self._thread is not None:
+            self._thread.join()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @staticmethod
+    def _scan():
+        try:
+            return scan_tree(NOITA_SAVE)
+        except OSError:
+            return None
+
+    def _run(self):
+        current = self._snapshot_files = self._scan()
+        changed_at = None
+        last_snapshot = time.monotonic()
+        while not self._stop.wait(self.poll_interval):
+            returncode = self.process.poll()
+            files = self._scan()
+            if files != current:
+                current = files
+                changed_at = time.monotonic()
+            dirty = current is not None and current != self._snapshot_files
+            if returncode is not None:
+                if dirty:
+                    self._snapshot(current)
+                if self.on_exit is not None:
+                    self.on_exit(returncode)
+                return
+            now = time.monotonic()
+            if dirty and now - changed_at >= self.settle and now - last_snapshot >= self.interval:
+                self._snapshot(current)
+                last_snapshot = now
+
+    def _snapshot(self, files):
+        self._snapshot_files = files
+
+        def _take(progress: Progress | None = None):
+            try:
+                with background_io():
+                    name = make_backup(
+                        generate_auto_name(SESSION_SNAPSHOT_PREFIX), skip_unchanged=True, progress=progress
+                    )
+            except BaseException:
+                # Снимок не сохранился (run может выполнить его позже, в очереди
+                # операций) — save00 снова считается несохранённым, и монитор
+                # повторит снимок через interval
+                if self._snapshot_files is files:
+                    self._snapshot_files = None
+                raise
+            if self.on_snapshot is not None:
+                self.on_snapshot(name)
+            return name
+
+        try:
+            if self.run is not None:
+                self.run(_take)
+            else:
+                _take()
+        except Exception:
+            # Неудачный снимок не останавливает наблюдение
+            self._snapshot_files = None
+
+
+def list_slots() -> dict[str, dict]:
+    """Описания всех слотов из индекса (новые слоты описываются сразу)."""
+    index = slot_index()
+    index.reconcile()
+    return index.entries()
+
+
+# ---------- Сравнение слотов ----------
+
+class _SlotView:
+    """Файлы слота или текущего save00 (slot_name=None) для сравнения и экспорта.
+
+    Список файлов слота берётся из его манифеста, без обхода папки; save00 и слоты
+    без манифеста обходятся scan_tree. Хэши считаются только по запросу; у слотов
+    store и folder с backup_hashes они уже есть в манифесте, у архивов есть CRC32
+    из каталога zip.
+    """
+
+    def __init__(self, slot_name: str | None):
+        self.name = slot_name
+        if slot_name is None:
+            self.root = NOITA_SAVE
+            if not self.root.exists():
+                raise RuntimeError(t("save_missing").format(path=self.root))
+        else:
+            self.root = slot_path(slot_name)
+            if not self.root.exists():
+                raise RuntimeError(t("slot_missing").format(path=self.root))
+        self.archive = slot_name is not None and is_archive_slot(self.root)
+        self.hashes: dict[str, str] = {}
+        self.crcs: dict[str, int] = {}
+        self.store = False
+        self._zip = None
+        if slot_name is None:
+            self.files, self.dirs = scan_tree(self.root)
+            return
+        if self.archive:
+            import zipfile
+            # Один открытый архив на всю операцию: каталог zip читается один раз
+            self._zip = zipfile.ZipFile(self.root)
+            infos = [info for info in self._zip.infolist() if not info.is_dir() and info.filename != SLOT_MANIFEST]
+            self.crcs = {info.filename: info.CRC for info in infos}
+            try:
+                manifest = json.loads(self._zip.read(SLOT_MANIFEST).decode("utf-8"))
+            except KeyError:
+                manifest = None
+        else:
+            manifest = read_manifest(self.root)
+        self.store = bool(manifest and manifest.get("format") == "store")
+        if manifest and "files" in manifest:
+            # Хэши из манифеста: у store всегда, у folder — если слот сохранён с backup_hashes
+            self.hashes = {rel: e["hash"] for rel, e in manifest["files"].items() if "hash" in e}
+        files = _manifest_files(manifest)
+        dirs = (manifest or {}).get("dirs", [])
+        if files is None and self.archive:
+            files = {
+                info.filename: (info.file_size, _zip_mtime_ns(info))
+                for info in infos
+            }
+            dirs = [info.filename.rstrip("/") for info in self._zip.infolist() if info.is_dir()]
+        elif files is None:
+            files, dirs = scan_tree(self.root)
+        self.files = files
+        self.dirs = dirs
+
+    def open(self, rel: str):
+        """Открыть файл слота для чтения: из папки, из хранилища объектов или из архива."""
+        if self.archive:
+            return self._zip.open(rel)
+        if self.store:
+            return open(_blob_path(self.hashes[rel]), "rb")
+        return open(self.root / rel, "rb")
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+
+    def identity(self, rel: str) -> tuple[int, int] | None:
+        """(устройство, inode) файла: жёсткие ссылки инкрементальных слотов совпадают без чтения."""
+        if self.archive or self.store:
+            return None
+        try:
+            st = os.stat(self.root / rel)
+        except OSError:
+            return None
+        return st.st_dev, st.st_ino
+
+    def digest(self, rel: str) -> str:
+        digest = self.hashes.get(rel)
+        if digest is not None:
+            return digest
+        if self.archive:
+            with self._zip.open(rel) as f:
+                digest = hash_stream(f)
+        else:
+            size, mtime_ns = self.files[rel]
+            digest = _cached_hash(self.root / rel, size, mtime_ns)
+        self.hashes[rel] = digest
+        return digest
+
+
+def _same_file(a: _SlotView, b: _SlotView, rel: str) -> bool:
+    identity = a.identity(rel)
+    return identity is not None and identity == b.identity(rel)
+
+
+def diff_slots(old: str | None, new: str | None, progress: Progress | None = None) -> list[dict]:
+    """Что изменится при переходе от old к new (имена слотов; None — текущий save00).
+
+    Возвращает отсортированные по пути записи {"path", "status", "old_size",
+    "new_size", "delta"}; status — "added", "removed" или "changed". Файлы с
+    одинаковыми размером и mtime_ns считаются совпадающими, как при загрузке слота;
+    хэши считаются только для файлов одного размера с разным mtime (или берутся из
+    манифестов). Папки не сравниваются.
+    """
+    with span(progress, "scan"):
+        a = _SlotView(old)
+        try:
+            b = _SlotView(new)
+        except BaseException:
+            a.close()
+            raise
+    try:
+        return _diff_sides(a, b, progress)
+    finally:
+        a.close()
+        b.close()
+
+
+def _diff_sides(a: _SlotView, b: _SlotView, progress: Progress | None) -> list[dict]:
+    changes: list[dict] = []
+
+    def _add(rel: str, status: str):
+        old_size = a.files[rel][0] if rel in a.files else None
+        new_size = b.files[rel][0] if rel in b.files else None
+        changes.append({
+            "path": rel,
+            "status": status,
+            "old_size": old_size,
+            "new_size": new_size,
+            "delta": (new_size or 0) - (old_size or 0),
+        })
+
+    unsure: list[str] = []
+    with span(progress, "compare"):
+        for rel in b.files.keys() - a.files.keys():
+            _add(rel, "added")
+        for rel in a.files.keys() - b.files.keys():
+            _add(rel, "removed")
+        for rel in a.files.keys() & b.files.keys():
+            (size_a, mtime_a), (size_b, mtime_b) = a.files[rel], b.files[rel]
+            if size_a != size_b:
+                _add(rel, "changed")
+            elif rel in a.hashes and rel in b.hashes:
+                if a.hashes[rel] != b.hashes[rel]:
+                    _add(rel, "changed")
+            elif rel in a.crcs and rel in b.crcs and a.crcs[rel] != b.crcs[rel]:
+                # Разный CRC32 — точно разное содержимое; одинаковый проверяем ниже, как обычно
+                _add(rel, "changed")
+            elif mtime_a != mtime_b:
+                unsure.append(rel)
+        unsure = [rel for rel in unsure if not _same_file(a, b, rel)]
+
+    if unsure:
+        differs: list[str] = []
+
+        def _check(rel: str):
+            if a.digest(rel) != b.digest(rel):
+                differs.append(rel)
+
+        if progress is not None:
+            progress.begin(sum(a.files[rel][0] for rel in unsure) * 2, len(unsure), "hash")
+        with span(progress, "hash"):
+            errors = run_parallel(_check, unsure, progress=progress, size_of=lambda rel: a.files[rel][0] * 2)
+        raise_copy_errors([(rel, exc) for rel, exc in errors])
+        for rel in differs:
+            _add(rel, "changed")
+    changes.sort(key=lambda c: c["path"])
+    return changes
+
+
+def diff_summary(changes: list[dict]) -> dict[str, int]:
+    """Число добавленных, удалённых и изменённых файлов и общий прирост в байтах."""
+    summary = {"added": 0, "removed": 0, "changed": 0, "delta": 0}
+    for change in changes:
+        summary[change["status"]] += 1
+        summary["delta"] += change["delta"]
+    return summary
+
+
+# ---------- Проверка целостности слотов ----------
+
+# Отметка в кэше хэшей для архива, все файлы которого прошли проверку CRC32
+_ARCHIVE_VERIFIED = "crc32"
+
+
+class HashCache:
+    """Постоянный кэш хэшей файлов слотов в SAVES_DIR/.index/hashes.json.
+
+    Ключ — устройство и inode файла, значение — размер, mtime_ns и хэш. Файл с
+    тем же inode, размером и mtime_ns не перечитывается, поэтому жёсткие ссылки
+    инкрементальных слотов хэшируются один раз на всю папку слотов.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.path = root / HASH_CACHE_FILE
+        self._lock = Lock()
+        self._entries: dict[str, list] = {}
+        self._dirty = False
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self._entries = data.get("files", {})
+        except Exception:
+            self._entries = {}
+
+    @staticmethod
+    def key(st: os.stat_result) -> str:
+        return f"{st.st_dev}:{st.st_ino}"
+
+    def get(self, st: os.stat_result) -> str | None:
+        with self._lock:
+            entry = self._entries.get(self.key(st))
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+        return None
+
+    def put(self, st: os.stat_result, digest: str):
+        with self._lock:
+            self._entries[self.key(st)] = [st.st_size, st.st_mtime_ns, digest]
+            self._dirty = True
+
+    def retain(self, keys: set[str]):
+        """Забыть файлы, которых больше нет ни в одном слоте."""
+        with self._lock:
+            stale = self._entries.keys() - keys
+            for key in stale:
+                del self._entries[key]
+            self._dirty = self._dirty or bool(stale)
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps({"version": 1, "files": self._entries}, separators=(",", ":"))
+            self._dirty = False
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            self.path.parent.mkdir(exist_ok=True)
+            tmp.write_text(data, encoding="utf-8")
+            os.replace(tmp, self.path)
+        except Exception:
+            pass
+
+
+_hash_cache_store: HashCache | None = None
+
+
+def hash_cache() -> HashCache:
+    """Кэш хэшей для текущей SAVES_DIR (пересоздаётся, если папку сменили)."""
+    global _hash_cache_store
+    if _hash_cache_store is None or _hash_cache_store.root != SAVES_DIR:
+        _hash_cache_store = HashCache(SAVES_DIR)
+    return _hash_cache_store
+
+
+def _hash_slot_files(root: Path, files: dict, progress: Progress | None = None) -> dict[str, str]:
+    """Хэши файлов только что записанного слота для его манифеста.
+
+    Скопированные через буфер файлы хэшируются ещё при копировании
+    (_copy_into_slot), взятые жёсткой ссылкой из прошлого слота уже есть в кэше
+    хэшей; читаются только файлы, которых в кэше нет (скопированные reflink и
+    другими быстрыми стратегиями).
+    """
+    if not config.get("backup_hashes", True):
+        return {}
+    cache = hash_cache()
+    hashes: dict[str, str] = {}
+
+    def _hash(rel: str):
+        path = root / rel
+        st = os.stat(path)
+        digest = cache.get(st)
+        if digest is None:
+            digest = hash_file(path)
+            cache.put(st, digest)
+        hashes[rel] = digest
+
+    with span(progress, "hash"):
+        raise_copy_errors([(root / rel, exc) for rel, exc in run_parallel(_hash, files)])
+        cache.save()
+    return hashes
+
+
+def _verify_archive(path: Path):
+    """Прочитать все файлы архива: zipfile сам сверяет CRC32 и бросает BadZipFile."""
+    import zipfile
+    buf = getattr(_hash_buffers, "buf", None)
+    if buf is None:
+        buf = _hash_buffers.buf = bytearray(HASH_CHUNK)
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            with zf.open(info) as f:
+                while f.readinto(buf):
+                    pass
+
+
+def verify_slots(
+    names: list[str] | None = None,
+    full: bool = False,
+    progress: Progress | None = None,
+) -> dict[str, dict]:
+    """Сверить файлы слотов с хэшами из их манифестов.
+
+    names — какие слоты проверять (None — все). Файлы всех слотов читаются
+    вместе в пуле потоков, каждый inode не больше одного раза. Без full файлы,
+    не менявшиеся с прошлого хэширования (тот же inode, размер и mtime_ns),
+    берутся из кэша хэшей; full перечитывает всё, чтобы найти порчу данных на
+    диске. Архивы проверяются по CRC32 из zip, слоты store — по объектам хранилища.
+
+    Возвращает {слот: {"files", "missing", "corrupt", "unhashed"}}: missing и
+    corrupt — списки путей, unhashed — сколько файлов не с чем сверить
+    (у них проверяется только размер).
+    """
+    check_all = names is None
+    if names is None:
+        names = list(list_slots())
+    report = {name: {"files": 0, "missing": [], "corrupt": [], "unhashed": 0} for name in names}
+    # (слот, путь в слоте, файл на диске, ожидаемый хэш, размер)
+    jobs: list[tuple[str, str, Path, str | None, int]] = []
+    with span(progress, "scan"):
+        for name in names:
+            path = slot_path(name)
+            if not path.exists():
+                report[name]["missing"].append("")
+                continue
+            if is_archive_slot(path):
+                jobs.append((name, "", path, _ARCHIVE_VERIFIED, path.stat().st_size))
+                continue
+            manifest = read_manifest(path)
+            if not manifest or "files" not in manifest:
+                # Слот без манифеста: сверять не с чем
+                files, _ = scan_tree(path)
+                report[name]["files"] = len(files)
+                report[name]["unhashed"] = len(files)
+                continue
+            store = manifest.get("format") == "store"
+            for rel, entry in manifest["files"].items():
+                target = _blob_path(entry["hash"]) if store else path / rel
+                jobs.append((name, rel, target, entry.get("hash"), entry["size"]))
+
+    cache = hash_cache()
+    lock = Lock()
+    seen: set[str] = set()
+    rehashed: set[str] = set()
+
+    def _check(job):
+        name, rel, target, expected, size = job
+        try:
+            st = os.stat(target)
+        except FileNotFoundError:
+            with lock:
+                report[name]["files"] += 1
+                report[name]["missing"].append(rel)
+            return
+        key = HashCache.key(st)
+        with lock:
+            report[name]["files"] += 1
+            seen.add(key)
+        if expected != _ARCHIVE_VERIFIED and st.st_size != size:
+            with lock:
+                report[name]["corrupt"].append(rel)
+            return
+        if expected is None:
+            with lock:
+                report[name]["unhashed"] += 1
+            return
+        digest = cache.get(st) if not full or key in rehashed else None
+        if digest is None:
+            # Повреждённый архив бросает BadZipFile или zlib.error — слот попадёт в corrupt
+            if expected == _ARCHIVE_VERIFIED:
+                _verify_archive(target)
+                digest = _ARCHIVE_VERIFIED
+            else:
+                digest = hash_file(target)
+            cache.put(st, digest)
+            with lock:
+                rehashed.add(key)
+        if digest != expected:
+            with lock:
+                report[name]["corrupt"].append(rel)
+
+    if progress is not None:
+        progress.begin(sum(job[4] for job in jobs), len(jobs), "verify")
+    try:
+        with span(progress, "verify"):
+            errors = run_parallel(_check, jobs, progress=progress, size_of=lambda job: job[4])
+    finally:
+        cache.save()
+    for (name, rel, *_), _exc in errors:
+        report[name]["corrupt"].append(rel)
+    if check_all:
+        cache.retain(seen)
+        cache.save()
+    for info in report.values():
+        info["missing"].sort()
+        info["corrupt"].sort()
+    return report
+
+
+# ---------- Экспорт и импорт слотов ----------
+
+EXPORT_EXT = ".tar.gz"
+# Кусок потока tar, который сжимается отдельным членом gzip в своём процессе
+EXPORT_CHUNK = 4 * 1024 * 1024
+# Манифест в экспорте читается целиком — больше этого он быть не может
+_EXPORT_MANIFEST_MAX = 64 * 1024 * 1024
+
+
+class ParallelGzipWriter:
+    """Файловый объект для записи .gz, сжимающий куски потока в пуле процессов.
+
+    Поток режется на куски EXPORT_CHUNK, каждый становится отдельным членом gzip.
+    Члены gzip подряд — обычный gzip, его читают gzip.open, tarfile и архиваторы.
+    В работе не больше двух кусков на процесс, поэтому память ограничена при любом
+    размере слота; готовые куски пишутся по порядку.
+    """
+
+    def __init__(self, fileobj, workers: int, level: int = 6):
+        import gzip
+        from collections import deque
+        from functools import partial
+        self.fileobj = fileobj
+        self.workers = workers
+        self._compress = partial(gzip.compress, compresslevel=level, mtime=0)
+        self._buf = bytearray()
+        self._pending = deque()
+        self._pool = None
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            self._pool = ProcessPoolExecutor(max_workers=workers)
+
+    def write(self, data) -> int:
+        self._buf += data
+        while len(self._buf) >= EXPORT_CHUNK:
+            chunk = bytes(self._buf[:EXPORT_CHUNK])
+            del self._buf[:EXPORT_CHUNK]
+            self._submit(chunk)
+        return len(data)
+
+    def _submit(self, chunk: bytes):
+        if self._pool is None:
+            self.fileobj.write(self._compress(chunk))
+            return
+        self._pending.append(self._pool.submit(self._compress, chunk))
+        while len(self._pending) > 2 * self.workers:
+            self.fileobj.write(self._pending.popleft().result())
+
+    def close(self):
+        """Дописать остаток и дождаться всех кусков."""
+        if self._buf:
+            self._submit(bytes(self._buf))
+            self._buf.clear()
+        while self._pending:
+            self.fileobj.write(self._pending.popleft().result())
+        self.abort()
+
+    def abort(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+class _HashingReader:
+    """Обёртка над файлом: считает хэш того, что через неё прочитали."""
+
+    def __init__(self, f):
+        import hashlib
+        self.f = f
+        self.hash = hashlib.blake2b(digest_size=20)
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.f.read(size)
+        self.hash.update(data)
+        return data
+
+
+def _export_workers(total_bytes: int) -> int:
+    chunks = max(1, -(-total_bytes // EXPORT_CHUNK))
+    return max(1, min(os.cpu_count() or 1, 8, chunks))
+
+
+def export_slot(slot_name: str, dst: Path, progress: Progress | None = None) -> Path:
+    """Упаковать слот в один файл .tar.gz (в любом формате хранения слота).
+
+    Файлы читаются потоком и по порядку путей, сжатие идёт кусками в пуле
+    процессов (ParallelGzipWriter). В конец архива пишется манифест с хэшами всех
+    файлов, по которому import_slot проверяет архив. Файл, не совпадающий с
+    хэшем из манифеста слота, прерывает экспорт.
+    """
+    import io
+    import tarfile
+    view = _SlotView(slot_name)
+    tmp = dst.with_name(f".{dst.name}.tmp")
+    writer = None
+    try:
+        total = sum(size for size, _ in view.files.values())
+        if progress is not None:
+            progress.begin(total, len(view.files), "export")
+        hashes: dict[str, str] = {}
+        with open(tmp, "wb") as raw:
+            writer = ParallelGzipWriter(raw, _export_workers(total))
+            with tarfile.open(
+                fileobj=writer, mode="w|", format=tarfile.PAX_FORMAT, bufsize=HASH_CHUNK, copybufsize=COPY_BUFFER
+            ) as tar:
+                for rel in sorted(view.files):
+                    if progress is not None:
+                        progress.check()
+                    size, mtime_ns = view.files[rel]
+                    info = tarfile.TarInfo(rel)
+                    info.size = size
+                    info.mtime = mtime_ns // 1_000_000_000
+                    info.mode = 0o644
+                    with view.open(rel) as f:
+                        reader = _HashingReader(f)
+                        tar.addfile(info, reader)
+                    digest = reader.hash.hexdigest()
+                    if view.hashes.get(rel, digest) != digest:
+                        raise RuntimeError(t("export_corrupt").format(path=rel))
+                    hashes[rel] = digest
+                    if progress is not None:
+                        progress.advance(size)
+                # Точные mtime_ns и хэши — в манифесте: tar хранит время в секундах
+                data = json.dumps(_folder_manifest(view.files, view.dirs, hashes), ensure_ascii=False).encode("utf-8")
+                info = tarfile.TarInfo(SLOT_MANIFEST)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(data))
+            writer.close()
+        os.replace(tmp, dst)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        try:
+            tmp.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+    finally:
+        view.close()
+    return dst
+
+
+def _member_rel(name: str) -> str:
+    """Путь файла из архива, если он безопасен: относительный и без «..»."""
+    parts = name.split("/")
+    if (
+        not name
+        or name.startswith("/")
+        or "\\" in name
+        or ":" in name
+        or any(part in ("", ".", "..") for part in parts)
+        or parts[0] in (PENDING_DIR, SLOT_MANIFEST)
+    ):
+        raise RuntimeError(t("import_invalid").format(reason=name))
+    return name
+
+
+def export_slot_name(path: Path) -> str:
+    """Имя слота по имени файла экспорта: «run.tar.gz» -> «run»."""
+    name = path.name
+    for ext in (EXPORT_EXT, ".tgz"):
+        if name.endswith(ext):
+            return name[: -len(ext)]
+    return path.stem
+
+
+def _extract_export(src: Path, tmp: Path, progress: Progress | None) -> tuple[dict | None, dict[str, tuple[int, str]]]:
+    """Распаковать файл экспорта в tmp потоком; вернуть манифест и {путь: (размер, хэш)}."""
+    import gzip
+    import tarfile
+    import zlib
+    manifest = None
+    found: dict[str, tuple[int, str]] = {}
+    try:
+        with open(src, "rb") as raw:
+            if progress is not None:
+                progress.begin(os.fstat(raw.fileno()).st_size, 0, "import")
+            read_pos = 0
+            with tarfile.open(fileobj=raw, mode="r:gz") as tar:
+                # Члены идут по порядку: данные каждого читаются до перехода к следующему,
+                # поэтому поток gzip не перематывается назад
+                for member in tar:
+                    if progress is not None:
+                        progress.check()
+                    if member.name == SLOT_MANIFEST and member.isfile():
+                        if member.size > _EXPORT_MANIFEST_MAX:
+                            raise RuntimeError(t("import_invalid").format(reason=member.name))
+                        manifest = json.loads(tar.extractfile(member).read().decode("utf-8"))
+                        continue
+                    rel = _member_rel(member.name.rstrip("/") if member.isdir() else member.name)
+                    if member.isdir():
+                        (tmp / rel).mkdir(parents=True, exist_ok=True)
+                        continue
+                    if not member.isfile():
+                        raise RuntimeError(t("import_invalid").format(reason=member.name))
+                    target = tmp / rel
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    reader = _HashingReader(tar.extractfile(member))
+                    with open(target, "wb") as f:
+                        while True:
+                            data = reader.read(COPY_BUFFER)
+                            if not data:
+                                break
+                            f.write(data)
+                    found[rel] = (member.size, reader.hash.hexdigest())
+                    if progress is not None:
+                        pos = raw.tell()
+                        progress.advance(pos - read_pos)
+                        read_pos = pos
+    except (tarfile.TarError, gzip.BadGzipFile, EOFError, zlib.error, UnicodeDecodeError, ValueError) as exc:
+        # Битый gzip или tar (в том числе не сошёлся CRC32 куска) или манифест не JSON
+        raise RuntimeError(t("import_invalid").format(reason=exc)) from exc
+    return manifest, found
+
+
+def import_slot(src: Path, slot_name: str | None = None, progress: Progress | None = None) -> str:
+    """Импортировать слот из файла export_slot и вернуть его имя.
+
+    Архив распаковывается потоком прямо во временную папку внутри SAVES_DIR
+    и после проверки по манифесту (список файлов, размеры, хэши) становится
+    папкой слота одним переименованием — второй копии данных нет. Слот
+    импортируется в формате folder с хэшами в манифесте.
+    """
+    slot_name = (slot_name or export_slot_name(src)).strip()
+    if not slot_name or slot_name.startswith(".") or any(c in slot_name for c in "/\\:"):
+        raise RuntimeError(t("import_invalid").format(reason=slot_name))
+    if slot_exists(slot_name):
+        raise RuntimeError(t("rename_exists").format(slot=slot_name))
+    SAVES_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = SAVES_DIR / f"{TEMP_PREFIX}import-{slot_name}"
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir()
+    try:
+        manifest, found = _extract_export(src, tmp, progress)
+        entries = manifest.get("files") if isinstance(manifest, dict) else None
+        if not isinstance(entries, dict):
+            raise RuntimeError(t("import_invalid").format(reason=SLOT_MANIFEST))
+        if entries.keys() != found.keys():
+            odd = sorted(entries.keys() ^ found.keys())
+            raise RuntimeError(t("import_invalid").format(reason=odd[0]))
+        files: dict[str, tuple[int, int]] = {}
+        hashes: dict[str, str] = {}
+        cache = hash_cache()
+        for rel, entry in entries.items():
+            size, digest = found[rel]
+            if (
+                not isinstance(entry, dict)
+                or not isinstance(entry.get("mtime_ns"), int)
+                or entry.get("size") != size
+                or entry.get("hash", digest) != digest
+            ):
+                raise RuntimeError(t("import_invalid").format(reason=rel))
+            path = tmp / rel
+            os.utime(path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+            files[rel] = (size, entry["mtime_ns"])
+            hashes[rel] = digest
+            # Хэш уже посчитан при распаковке — проверке слота читать файл не придётся
+            cache.put(os.stat(path), digest)
+        dirs = [_member_rel(rel) for rel in manifest.get("dirs", [])]
+        for rel in dirs:
+            (tmp / rel).mkdir(parents=True, exist_ok=True)
+        write_manifest(tmp, _folder_manifest(files, dirs, hashes))
+        cache.save()
+        tmp.rename(SAVES_DIR / slot_name)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    _index_backup(slot_name, files, "folder")
+    return slot_name
+
+
+# ---------- Журнал игры ----------
+
+# Признаки строк logger.txt (биты в LogFile.flags)
+LOG_WARNING = 1
+LOG_ERROR = 2
+LOG_ASSET = 4
+LOG_LUA = 8
+LOG_MOD = 16
+LOG_SESSION = 32
+
+# Постоянный индекс logger.txt: смещения строк и признаки (.bin) + описание (.json)
+LOG_INDEX_FILE = USER_DATA_DIR / "logger_index.json"
+# Версия разметки в индексе: при смене правил разбора старый индекс не используется
+LOG_INDEX_VERSION = 2
+# Заголовок сессии (в нижнем регистре): «Noita (Jan 25 2025) - 20251122-144257»
+LOG_SESSION_HEADER = rb"(?m)^noita \([^)\n]+\) - \S+"
+
+# Ключевые слова признаков (в нижнем регистре). Ищутся bytes.find по всему
+# блоку журнала: это в разы быстрее регулярных выражений со \b
+LOG_KEYWORDS = (
+    (LOG_ERROR, (b"error", b"exception", b"fatal", b"assert")),
+    (LOG_WARNING, (b"warning",)),
+    (
+        LOG_ASSET,
+        (
+            b"failed to load",
+            b"couldn't load",
+            b"could not load",
+            b"couldn't find",
+            b"could not find",
+            b"loadspriteto",
+            b"file not found",
+            b"doesn't exist",
+            b"does not exist",
+            b"unable to open",
+        ),
+    ),
+    (LOG_LUA, (b".lua", b"lua error", b"[lua]", b"lua:")),
+    (LOG_MOD, (b"mods/",)),
+)
+
+
+class LogFile:
+    """Постраничное чтение и разбор растущего текстового журнала (logger.txt).
+
+    update() разбирает только дописанные с прошлого вызова байты: запоминает
+    смещения начал строк, помечает строки битами LOG_* и делит журнал на сессии
+    по заголовкам «Noita (дата сборки) - версия». Первый вызов можно сделать в фоновом
+    потоке, а дальше вызывать по таймеру как tail -f. С index_file разобранная
+    часть сохраняется (save_index) и при следующем открытии не разбирается
+    заново, если файл с тех пор только дописывался. Строки читаются через seek
+    по смещениям; конец файла доступен через tail() ещё до окончания разбора.
+    Файл читается обычным open(): mmap в Windows не дал бы игре обрезать
+    logger.txt при следующем запуске.
+    """
+
+    CHUNK = 1024 * 1024
+    # Сколько байт перед концом разобранной части сверять, чтобы заметить перезапись файла
+    FINGERPRINT = 256
+
+    def __init__(self, path: Path, index_file: Path | None = None):
+        self.path = Path(path)
+        self.index_file = index_file
+        self._lock = Lock()
+        self._scan_lock = Lock()
+        self._loaded = index_file is None
+        self.exists = False
+        self._clear()
+
+    def _clear(self):
+        from array import array
+
+        with self._lock:
+            # Смещения начал строк; последнее — начало ещё не законченной строки
+            self._offsets = array("q", [0])
+            # Биты LOG_* для каждой законченной строки
+            self._flags = array("B")
+            self._sessions: list[dict] = []
+            self._tail = b""
+            self._size = 0
+            self.indexed = False
+
+    def update(self, cancel: Event | None = None, wait: bool = True) -> bool:
+        """Разобрать дописанное; True, если файл пересоздан или обрезан.
+
+        С wait=False сразу возвращает False, если разбор уже идёт в другом потоке.
+        """
+        if not self._scan_lock.acquire(blocking=wait):
+            return False
+        try:
+            if not self._loaded:
+                self._loaded = True
+                self._load_index()
+            try:
+                size = os.stat(self.path).st_size
+            except OSError:
+                was = self.exists or self._size
+                self.exists = False
+                self._clear()
+                return bool(was)
+            self.exists = True
+            reset = size < self._size or not self._same_prefix()
+            if reset:
+                self._clear()
+            with self._lock:
+                self._size = size
+            complete = self._scan(size, cancel)
+            with self._lock:
+                self.indexed = complete
+            return reset
+        finally:
+            self._scan_lock.release()
+
+    def _same_prefix(self) -> bool:
+        """Совпадает ли конец разобранной части с тем, что сейчас в файле."""
+        if not self._tail:
+            return True
+        end = self._offsets[-1]
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(end - len(self._tail))
+                return f.read(len(self._tail)) == self._tail
+        except OSError:
+            return False
+
+    def _scan(self, size: int, cancel: Event | None) -> bool:
+        pos = self._offsets[-1]
+        if pos >= size:
+            return True
+        complete = True
+        with open(self.path, "rb") as f:
+            while pos < size:
+                if cancel is not None and cancel.is_set():
+                    complete = False
+                    break
+                f.seek(pos)
+                chunk = f.read(min(self.CHUNK, size - pos))
+                if not chunk:
+                    break
+                end = chunk.rfind(b"\n") + 1
+                if not end:
+                    # Незаконченная строка: ждём перевода строки, если это не сверхдлинная строка
+                    if len(chunk) < self.CHUNK:
+                        break
+                    end = len(chunk)
+                self._parse(chunk[:end], pos)
+                pos += end
+            # Отпечаток конца разобранной части для _same_prefix()
+            begin = max(0, pos - self.FINGERPRINT)
+            f.seek(begin)
+            self._tail = f.read(pos - begin)
+        return complete
+
+    def _parse(self, body: bytes, base: int):
+        """Добавить строки из body (кончается переводом строки) начиная со смещения base."""
+        import operator
+        import re
+        from bisect import bisect_right
+        from itertools import accumulate, count
+
+        # Концы строк без цикла на Python: длины частей + перевод строки
+        parts = body.split(b"\n")
+        last = parts.pop()
+        ends = list(map(operator.add, accumulate(map(len, parts)), count(1)))
+        if last:
+            ends.append(len(body))
+        flags = bytearray(len(ends))
+        lower = body.lower()
+        for bit, keywords in LOG_KEYWORDS:
+            for keyword in keywords:
+                i = lower.find(keyword)
+                while i != -1:
+                    line = bisect_right(ends, i)
+                    flags[line] |= bit
+                    i = lower.find(keyword, ends[line]) if line < len(ends) - 1 else -1
+        # Заголовок сессии: строка вида «Noita (Jan 25 2025) - 20251122-144257»
+        for m in re.finditer(LOG_SESSION_HEADER, lower):
+            flags[bisect_right(ends, m.start())] |= LOG_SESSION
+
+        with self._lock:
+            first = len(self._flags)
+            self._offsets.extend(map(base.__add__, ends))
+            self._flags.frombytes(bytes(flags))
+            # Обходим только помеченные строки: их обычно немного
+            for m in re.finditer(rb"[^\x00]", flags):
+                k = m.start()
+                fl = flags[k]
+                if fl & LOG_SESSION:
+                    title = body[ends[k - 1] if k else 0 : ends[k]].decode("utf-8", errors="replace").strip()
+                    self._sessions.append({"line": first + k, "title": title, "errors": 0, "warnings": 0, "assets": 0})
+                elif not self._sessions:
+                    # Строки до первого заголовка — безымянная сессия с начала файла
+                    self._sessions.append({"line": 0, "title": "", "errors": 0, "warnings": 0, "assets": 0})
+                session = self._sessions[-1]
+                if fl & LOG_ERROR:
+                    session["errors"] += 1
+                elif fl & LOG_WARNING:
+                    session["warnings"] += 1
+                if fl & LOG_ASSET:
+                    session["assets"] += 1
+
+    def _load_index(self):
+        from array import array
+
+        bin_file = self.index_file.with_suffix(".bin")
+        try:
+            meta = json.loads(self.index_file.read_text(encoding="utf-8"))
+            if meta.get("version") != LOG_INDEX_VERSION or meta.get("path") != str(self.path.resolve()):
+                return
+            lines = meta["lines"]
+            data = bin_file.read_bytes()
+            offsets = array("q")
+            flags = array("B")
+            if len(data) != offsets.itemsize * (lines + 1) + lines:
+                return
+            offsets.frombytes(data[: offsets.itemsize * (lines + 1)])
+            flags.frombytes(data[offsets.itemsize * (lines + 1) :])
+            tail = bytes.fromhex(meta["tail"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        with self._lock:
+            self._offsets = offsets
+            self._flags = flags
+            self._sessions = meta.get("sessions", [])
+            self._tail = tail
+            self._size = offsets[-1]
+        # Файл перезаписан (новый запуск игры) — индекс не подходит
+        if not self._same_prefix():
+            self._clear()
+
+    def save_index(self):
+        """Сохранить разобранную часть в index_file (атомарно, .bin пишется первым)."""
+        if self.index_file is None:
+            return
+        with self._scan_lock:
+            with self._lock:
+                meta = {
+                    "version": LOG_INDEX_VERSION,
+                    "path": str(self.path.resolve()),
+                    "lines": len(self._flags),
+                    "tail": self._tail.hex(),
+                    "sessions": [dict(s) for s in self._sessions],
+                }
+                data = self._offsets.tobytes() + self._flags.tobytes()
+            bin_file = self.index_file.with_suffix(".bin")
+            try:
+                self.index_file.parent.mkdir(parents=True, exist_ok=True)
+                for path, write in (
+                    (bin_file, lambda tmp: tmp.write_bytes(data)),
+                    (self.index_file, lambda tmp: tmp.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")),
+                ):
+                    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+                    write(tmp)
+                    os.replace(tmp, path)
+            except OSError:
+                pass
+
+    @property
+    def size(self) -> int:
+        """Размер файла на момент последнего update()."""
+        with self._lock:
+            return self._size
+
+    def line_count(self) -> int:
+        """Число известных строк, включая незаконченную последнюю."""
+        with self._lock:
+            return len(self._offsets) - 1 + (1 if self._size > self._offsets[-1] else 0)
+
+    def parsed_lines(self) -> int:
+        """Число уже разобранных (законченных) строк."""
+        with self._lock:
+            return len(self._flags)
+
+    def line_flags(self, start: int, count: int) -> bytes:
+        """Биты LOG_* строк [start, start + count); для неразобранных строк — нули."""
+        with self._lock:
+            flags = self._flags[start : start + count].tobytes()
+        return flags + bytes(max(0, count - len(flags)))
+
+    def sessions(self) -> list[dict]:
+        """Сессии: {"line", "end", "title", "errors", "warnings", "assets"}; end не включается."""
+        total = self.line_count()
+        with self._lock:
+            result = [dict(s) for s in self._sessions]
+        for i, session in enumerate(result):
+            session["end"] = result[i + 1]["line"] if i + 1 < len(result) else total
+        return result
+
+    def read_lines(self, start: int, count: int) -> list[str]:
+        """Строки [start, start + count) из известной части файла."""
+        with self._lock:
+            last = len(self._offsets) - 1
+            start = max(0, min(start, last))
+            begin = self._offsets[start]
+            # Если диапазон доходит до конца, захватываем и незаконченную строку
+            stop = self._offsets[start + count] if start + count <= last else self._size
+        if stop <= begin:
+            return []
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(begin)
+                data = f.read(stop - begin)
+        except OSError:
+            return []
+        return data.decode("utf-8", errors="replace").splitlines()[:count]
+
+    def tail(self, count: int) -> list[str]:
+        """Последние count строк файла — чтением с конца, без индекса."""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                pos = f.tell()
+                data = b""
+                while pos > 0 and data.count(b"\n") <= count:
+                    step = min(64 * 1024, pos)
+                    pos -= step
+                    f.seek(pos)
+                    data = f.read(step) + data
+        except OSError:
+            return []
+        return data.decode("utf-8", errors="replace").splitlines()[-count:] if count else []
+
+    def find(
+        self,
+        mask: int = 0,
+        text: str = "",
+        start: int = 0,
+        end: int | None = None,
+        cancel: Event | None = None,
+    ) -> list[int]:
+        """Номера разобранных строк в [start, end) с любым из битов mask и/или текстом text.
+
+        Поиск текста без учёта регистра (для латиницы) идёт по байтам файла
+        блоками, без декодирования строк.
+        """
+        from bisect import bisect_right
+
+        with self._lock:
+            total = len(self._flags)
+            end = total if end is None else min(end, total)
+            start = max(0, min(start, end))
+            flags = self._flags[start:end]
+            offsets = self._offsets[start : end + 1]
+        if not text:
+            return [start + i for i, fl in enumerate(flags) if fl & mask] if mask else list(range(start, end))
+        needle = text.lower().encode("utf-8")
+        found = []
+        pos, stop = offsets[0], offsets[-1]
+        try:
+            f = open(self.path, "rb")
+        except OSError:
+            return []
+        with f:
+            while pos < stop:
+                if cancel is not None and cancel.is_set():
+                    break
+                f.seek(pos)
+                chunk = f.read(min(self.CHUNK, stop - pos))
+                if not chunk:
+                    break
+                cut = chunk.rfind(b"\n") + 1 or len(chunk)
+                lower = chunk[:cut].lower()
+                i = lower.find(needle)
+                while i != -1:
+                    line = bisect_right(offsets, pos + i) - 1
+                    if not mask or flags[line] & mask:
+                        found.append(start + line)
+                    # Следующее совпадение ищем со следующей строки
+                    i = lower.find(needle, offsets[line + 1] - pos)
+                pos += cut
+        return found
+
+
+# ---------- Журнал производительности ----------
+
+# perf.log: по строке JSON на операцию с её фазами; файл ротируется по размеру
+PERF_LOG_FILE = USER_DATA_DIR / "perf.log"
+PERF_LOG_MAX_BYTES = 1024 * 1024
+PERF_LOG_BACKUPS = 3
+
+_perf_logger = None
+_perf_lock = Lock()
+
+
+def _get_perf_logger():
+    global _perf_logger
+    with _perf_lock:
+        if _perf_logger is None:
+            import logging
+            from logging.handlers import RotatingFileHandler
+
+            USER_DATA_DIR.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(
+                PERF_LOG_FILE,
+                maxBytes=PERF_LOG_MAX_BYTES,
+                backupCount=PERF_LOG_BACKUPS,
+                encoding="utf-8",
+                delay=True,
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger("noita_launcher.perf")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _perf_logger = logger
+        return _perf_logger
+
+
+def log_operation(op: str, progress: Progress, status: str, duration: float, slot: str | None = None):
+    """Записать операцию и замеренные в progress фазы в perf.log (если включён perf_log)."""
+    if not config.get("perf_log", True):
+        return
+    record = {
+        "ts": round(time.time(), 3),
+        "op": op,
+        "slot": slot,
+        "status": status,
+        "duration": round(duration, 4),
+        **progress.trace(),
+    }
+    try:
+        _get_perf_logger().info(json.dumps(record, ensure_ascii=False))
+    except Exception:
+        pass
+
+
+def read_perf_log(limit: int = 500) -> list[dict]:
+    """Последние записи perf.log (вместе с ротированными файлами), новые первыми."""
+    paths = [PERF_LOG_FILE] + [
+        PERF_LOG_FILE.with_name(f"{PERF_LOG_FILE.name}.{i}") for i in range(1, PERF_LOG_BACKUPS + 1)
+    ]
+    records: list[dict] = []
+    for path in paths:
+        try:
+            lines = path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            continue
+        for line in reversed(lines):
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+            if len(records) >= limit:
+                return records
+    return records
+
+
+def percentile(values: list[float], q: float) -> float:
+    """q-й перцентиль (0..100) с линейной интерполяцией."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    pos = (len(values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def perf_summary(records: list[dict]) -> dict[str, dict]:
+    """Перцентили длительности успешных операций и их фаз.
+
+    {op: {"count", "p50", "p90", "p99", "phases": {phase: {"p50", "p90"}}}}
+    """
+    durations: dict[str, list[float]] = {}
+    phases: dict[str, dict[str, list[float]]] = {}
+    for rec in records:
+        if rec.get("status") != "done":
+            continue
+        op = rec.get("op", "")
+        durations.setdefault(op, []).append(rec.get("duration", 0.0))
+        per_op = phases.setdefault(op, {})
+        for sp in rec.get("spans", []):
+            per_op.setdefault(sp["phase"], []).append(sp["duration"])
+    summary = {}
+    for op, values in durations.items():
+        summary[op] = {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "phases": {
+                phase: {"p50": percentile(vals, 50), "p90": percentile(vals, 90)}
+                for phase, vals in phases.get(op, {}).items()
+            },
+        }
+    return summary
+
+
+# ---------- Очередь операций ----------
+
+# Приоритеты задач: меньше — раньше
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Ресурс рабочей папки игры; слоты — slot_resource(имя)
+SAVE_RESOURCE = "save00"
+
+# Ресурсы, занятые задачами в очереди и выполняющимися: {ресурс: число задач}
+_busy_resources: dict[str, int] = {}
+_busy_lock = Lock()
+
+
+def slot_resource(slot_name: str) -> str:
+    return f"slot:{slot_name}"
+
+
+def resource_busy(resource: str) -> bool:
+    with _busy_lock:
+        return resource in _busy_resources
+
+
+def _mark_busy(resources: dict[str, str], delta: int):
+    with _busy_lock:
+        for res in resources:
+            count = _busy_resources.get(res, 0) + delta
+            if count > 0:
+                _busy_resources[res] = count
+            else:
+                _busy_resources.pop(res, None)
+
+
+class Job:
+    """Задача очереди: функция, ресурсы с режимом доступа и Progress для индикатора и отмены."""
+
+    def __init__(self, job_id: int, title: str, func, resources, priority: int, progress, on_done, op=None, slot=None):
+        self.id = job_id
+        self.title = title
+        # Имя операции и слот для perf.log; задачи без op не журналируются
+        self.op = op
+        self.slot = slot
+        self.func = func
+        # {ресурс: "read" | "write"}
+        self.resources: dict[str, str] = dict(resources or {})
+        self.priority = priority
+        self.progress: Progress = progress if progress is not None else Progress()
+        self.on_done = on_done
+        # queued -> running -> done | failed | cancelled
+        self.state = "queued"
+        self.result = None
+        self.error: Exception | None = None
+
+    def conflicts(self, other: "Job") -> bool:
+        for res, mode in self.resources.items():
+            other_mode = other.resources.get(res)
+            if other_mode is not None and "write" in (mode, other_mode):
+                return True
+        return False
+
+
+class JobScheduler:
+    """Очередь операций со слотами вместо отдельного потока на каждую кнопку.
+
+    Задачи, пишущие в общий ресурс (save00 или слот), выполняются по очереди,
+    читающие — параллельно, не больше workers одновременно. Из готовых к запуску
+    первой берётся задача с меньшим priority; задача не обгоняет более раннюю,
+    с которой конфликтует. Отмена: задача из очереди снимается сразу, у
+    выполняющейся выставляется флаг в её Progress, и она прерывается между файлами.
+    on_done(job) и on_change() вызываются из рабочих потоков.
+    """
+
+    def __init__(self, workers: int = 2, on_change=None):
+        self.on_change = on_change
+        self._cond = Condition()
+        self._queue: list[Job] = []
+        self._running: list[Job] = []
+        self._next_id = 1
+        for i in range(max(1, workers)):
+            Thread(target=self._worker, name=f"job-{i}", daemon=True).start()
+
+    def submit(
+        self,
+        title: str,
+        func,
+        resources: dict[str, str] | None = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        progress: Progress | None = None,
+        on_done=None,
+        op: str | None = None,
+        slot: str | None = None,
+    ) -> Job:
+        with self._cond:
+            job = Job(self._next_id, title, func, resources, priority, progress, on_done, op, slot)
+            self._next_id += 1
+            self._queue.append(job)
+            # Занято с момента постановки: уборка старых слотов не тронет слот, ждущий загрузки
+            _mark_busy(job.resources, 1)
+            self._cond.notify_all()
+        self._changed()
+        return job
+
+    def cancel(self, job: Job):
+        with self._cond:
+            queued = job in self._queue
+            if queued:
+                self._queue.remove(job)
+                job.state = "cancelled"
+                job.error = OperationCancelled()
+                self._cond.notify_all()
+            job.progress.cancel()
+        if queued:
+            self._finish(job)
+
+    def jobs(self) -> list[Job]:
+        """Выполняющиеся задачи, затем очередь в порядке запуска."""
+        with self._cond:
+            return list(self._running) + sorted(self._queue, key=self._order)
+
+    def active(self) -> bool:
+        with self._cond:
+            return bool(self._running or self._queue)
+
+    @staticmethod
+    def _order(job: Job) -> tuple[int, int]:
+        return job.priority, job.id
+
+    def _pick(self) -> Job | None:
+        blocked = list(self._running)
+        for job in sorted(self._queue, key=self._order):
+            if not any(job.conflicts(other) for other in blocked):
+                return job
+            # Ждущая задача держит свои ресурсы: более поздние конфликтующие её не обгонят
+            blocked.append(job)
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._pick()
+                while job is None:
+                    self._cond.wait()
+                    job = self._pick()
+                self._queue.remove(job)
+                self._running.append(job)
+                job.state = "running"
+            self._changed()
+            started = time.perf_counter()
+            try:
+                job.result = job.func()
+                job.state = "done"
+            except OperationCancelled as exc:
+                job.error = exc
+                job.state = "cancelled"
+            except Exception as exc:
+                job.error = exc
+                job.state = "failed"
+            if job.op:
+                log_operation(job.op, job.progress, job.state, time.perf_counter() - started, job.slot)
+            with self._cond:
+                self._running.remove(job)
+                self._cond.notify_all()
+            self._finish(job)
+
+    def _finish(self, job: Job):
+        _mark_busy(job.resources, -1)
+        if job.on_done is not None:
+            try:
+                job.on_done(job)
+            except Exception:
+                pass
+        self._changed()
+
+    def _changed(self):
+        if self.on_change is not None:
+            try:
+                self.on_change()
+            except Exception:
+                pass
@@ -1,300 +1,311 @@
-import json
-import shutil
-import subprocess
-from threading import Thread
-from pathlib import Path
-from datetime import datetime
 import sys
-import os
-
-import tkinter as tk
-from tkinter import messagebox, simpledialog, filedialog, ttk
-
-# ---------- Конфиг ----------
-
-# Определяем базовую папку в зависимости от режима (frozen при сборке PyInstaller)
-if getattr(sys, "frozen", False):
-    BASE_DIR = Path(sys._MEIPASS)
-else:
-    BASE_DIR = Path(__file__).resolve().parent
-
-# Ресурсный конфиг, который может быть упакован рядом с exe
-PACKAGED_CONFIG = BASE_DIR / "config_gui.json"
-
-# Путь для пользовательских данных (в Windows используем %APPDATA%)
-USER_DATA_DIR = Path(os.getenv("APPDATA", Path.home())) / "noita_launcher"
-USER_DATA_DIR.mkdir(parents=True, exist_ok=True)
-
-# Файл конфигурации, в который мы читаем/пишем (пользовательский)
-CONFIG_FILE = USER_DATA_DIR / "config_gui.json"
-
-if not CONFIG_FILE.exists() and PACKAGED_CONFIG.exists():
-    try:
-        shutil.copy2(PACKAGED_CONFIG, CONFIG_FILE)
-    except Exception:
-        pass
-
-
-def load_config():
-    default = {
-        "noita_save_path": str(
-            Path.home()
-            / "AppData"
-            / "LocalLow"
-            / "Nolla_Games_Noita"
-            / "save00"
-        ),
-        "noita_exe_path": r"C:\Games\Noita\noita.exe",
-        "saves_dir": "saves",
-        # Формат имени по умолчанию для слота (используется datetime.strftime)
-        "save_name_format": "%Y-%m-%d_%H-%M-%S",
-        # Тема интерфейса: 'light' или 'dark'
-        "theme": "light",
-        "language": "ru",
-        # Подтверждать удаление слота
-        "confirm_on_delete": True,
-        # Авто-бэкап при запуске (пока заглушка, не используется)
-        "auto_backup_on_run": False,
-        "auto_backup_on_load": False,
-        # Максимум бэкапов (интерактивно не реализовано сейчас)
-        "max_backups": 0,
-    }
-    if CONFIG_FILE.exists():
-        try:
-            data = json.loads(CONFIG_FILE.read_text(encoding="utf-8"))
-            default.update(data)
-        except Exception:
-            pass
-    return default
-
-
-def save_config(cfg):
-    CONFIG_FILE.write_text(
-        json.dumps(cfg, indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
-
-
-config = load_config()
-
-NOITA_SAVE = Path(config["noita_save_path"])
-NOITA_EXE = config["noita_exe_path"]
-SAVES_DIR = Path(config["saves_dir"])
-SAVES_DIR.mkdir(exist_ok=True)
-TRANSLATIONS = {
-    "ru": {
-        "title": "Менеджер сохранений Noita",
-        "subtitle": "Резервные копии save00 и быстрый выбор слотов для Noita.",
-        "settings": "Настройки...",
-        "browse": "Выбрать",
-        "language": "Язык:",
-        "save_path": "Путь к save00:",
-        "exe_path": "Путь к Noita.exe:",
-        "saves_dir": "Папка для слотов:",
-        "open_logs": "Открыть журнал",
-        "slots_label": "Слоты:",
-        "rename_slot": "Переименовать",
-        "delete_slot": "Удалить",
-        "entry_label": "Имя для нового слота (опционально):",
-        "save_btn": "Сохранить текущий прогресс",
-        "load_btn": "Загрузить слот в save00",
-        "overwrite_btn": "Перезаписать слот",
-        "run_btn": "Запустить Noita с этим слотом",
-        "warning": "Предупреждение",
-        "confirm": "Подтверждение",
-        "error": "Ошибка",
-        "info": "Готово",
-        "select_slot": "Сначала выберите слот в списке.",
-        "save_missing": "Папка save00 не найдена:\n{path}",
-        "slot_missing": "Слот не найден:\n{path}",
-        "name_empty": "Имя не может быть пустым.",
-        "backup_done": "Слот сохранен: {slot}",
-        "load_done": "Слот \"{slot}\" восстановлен в save00.\nЗапустите Noita, чтобы продолжить.",
-        "overwrite_confirm": "Перезаписать слот \"{slot}\" текущим save00? Старые файлы будут заменены.",
-        "overwrite_done": "Слот \"{slot}\" обновлен.",
-        "delete_confirm": "Удалить слот \"{slot}\"? Действие необратимо.",
-        "rename_prompt": "Новое имя слота:",
-        "rename_title": "Переименовать слот",
-        "rename_exists": "Слот \"{slot}\" уже существует.",
-        "log_title": "Журнал",
-        "refresh": "Обновить",
-        "close": "Закрыть",
-        "noita_missing": "Noita.exe не найден:\n{path}\nУкажите путь в настройках.",
-        "run_done": "Слот \"{slot}\" восстановлен. Noita запускается.",
-        "auto_backup_fail": "Не удалось создать автокопию: {error}",
-        "save00_label": "Путь к текущему save00:",
-        "exe_label": "Путь к Noita.exe:",
-        "saves_dir_label": "Каталог для слотов:",
-        "format_label": "Шаблон имени слота (strftime):",
-        "format_example": "Пример:",
-        "theme_label": "Тема:",
-        "language_label": "Язык:",
-        "confirm_delete_label": "Спрашивать подтверждение перед удалением слотов",
-        "auto_backup_run_label": "Автобэкап перед запуском Noita",
-        "auto_backup_load_label": "Автобэкап перед загрузкой слота",
-        "max_backups_label": "Максимум автокопий (0 = без лимита):",
-        "reset_paths": "Сбросить пути по умолчанию",
-        "reset_other": "Сбросить оформление и опции",
-        "save_settings": "Сохранить",
-        "cancel": "Отмена",
-        "settings_saved": "Настройки сохранены.",
-        "paths_header": "Пути",
-        "list_header": "Слоты",
-        "actions_header": "Действия",
-        "status_idle": "Выберите слот или создайте новый.",
-        "status_saved": "Создан слот {slot}.",
-        "status_loaded": "Слот {slot} восстановлен.",
-        "status_deleted": "Слот {slot} удален.",
-        "status_renamed": "Слот переименован в {slot}.",
-        "status_updated": "Слот {slot} обновлен.",
-        "status_run": "Слот {slot} восстановлен, запуск Noita...",
-    },
-    "en": {
-        "title": "Noita Save Manager",
-        "subtitle": "Back up save00 and switch slots quickly for Noita.",
-        "settings": "Settings...",
-        "browse": "Browse",
-        "language": "Language:",
-        "save_path": "save00 path:",
-        "exe_path": "Noita.exe path:",
-        "saves_dir": "Slots folder:",
-        "open_logs": "Open logs",
-        "slots_label": "Slots:",
-        "rename_slot": "Rename",
-        "delete_slot": "Delete",
-        "entry_label": "Name for a new slot (optional):",
-        "save_btn": "Save current progress",
-        "load_btn": "Load slot into save00",
-        "overwrite_btn": "Overwrite slot",
-        "run_btn": "Launch Noita with this slot",
-        "warning": "Warning",
-        "confirm": "Confirm",
-        "error": "Error",
-        "info": "Done",
-        "select_slot": "Select a slot from the list first.",
-        "save_missing": "save00 folder not found:\n{path}",
-        "slot_missing": "Slot not found:\n{path}",
-        "name_empty": "Name cannot be empty.",
-        "backup_done": "Slot created: {slot}",
-        "load_done": "Slot \"{slot}\" restored to save00. Start Noita to continue.",
-        "overwrite_confirm": "Overwrite slot \"{slot}\" with current save00? Existing files will be replaced.",
-        "overwrite_done": "Slot \"{slot}\" updated.",
-        "delete_confirm": "Delete slot \"{slot}\"? This cannot be undone.",
-        "rename_prompt": "New slot name:",
-        "rename_title": "Rename slot",
-        "rename_exists": "Slot \"{slot}\" already exists.",
-        "log_title": "Logs",
-        "refresh": "Refresh",
-        "close": "Close",
-        "noita_missing": "Noita.exe not found:\n{path}\nUpdate the path in settings.",
-        "run_done": "Slot \"{slot}\" restored and Noita is launching.",
-        "auto_backup_fail": "Auto-backup failed: {error}",
-        "save00_label": "Path to current save00:",
-        "exe_label": "Path to Noita.exe:",
-        "saves_dir_label": "Directory for slots:",
-        "format_label": "Slot name pattern (strftime):",
-        "format_example": "Example:",
-        "theme_label": "Theme:",
-        "language_label": "Language:",
-        "confirm_delete_label": "Ask before deleting slots",
-        "auto_backup_run_label": "Auto-backup before launching Noita",
-        "auto_backup_load_label": "Auto-backup before loading slot",
-        "max_backups_label": "Max auto-backups (0 = unlimited):",
-        "reset_paths": "Reset paths to default",
-        "reset_other": "Reset look and options",
-        "save_settings": "Save",
-        "cancel": "Cancel",
-        "settings_saved": "Settings saved.",
-        "paths_header": "Paths",
-        "list_header": "Slots",
-        "actions_header": "Actions",
-        "status_idle": "Pick a slot or create a new one.",
-        "status_saved": "Slot {slot} created.",
-        "status_loaded": "Slot {slot} restored.",
-        "status_deleted": "Slot {slot} removed.",
-        "status_renamed": "Slot renamed to {slot}.",
-        "status_updated": "Slot {slot} updated.",
-        "status_run": "Slot {slot} restored, launching Noita...",
-        "status_saving": "Saving current save...",
-        "status_loading": "Loading slot...",
-        "status_overwrite": "Updating slot...",
-        "status_running": "Preparing slot and launching...",
-    },
-}
-
-def t(key: str) -> str:
-    lang = config.get("language", "ru")
-    return TRANSLATIONS.get(lang, TRANSLATIONS["en"]).get(
-        key, TRANSLATIONS["en"].get(key, key)
-    )
-
-
-
-
-# ---------- Логика слотов ----------
-
-def copy_dir(src: Path, dst: Path):
-    if dst.exists():
-        shutil.rmtree(dst)
-    shutil.copytree(src, dst)
-
-def cleanup_old_backups():
-    max_b = int(config.get("max_backups", 0) or 0)
-    if max_b <= 0 or not SAVES_DIR.exists():
-        return
-    dirs = [d for d in SAVES_DIR.iterdir() if d.is_dir()]
-    if len(dirs) <= max_b:
-        return
-    dirs.sort(key=lambda d: d.stat().st_mtime)
-    for d in dirs[:-max_b]:
-        try:
-            shutil.rmtree(d)
-        except Exception:
-            pass
+import time
 
-def generate_auto_name(prefix: str) -> str:
-    fmt = config.get("save_name_format", "%Y-%m-%d_%H-%M-%S")
-    try:
-        suffix = datetime.now().strftime(fmt)
-    except Exception:
-        suffix = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    return f"{prefix}{suffix}"
+# Точка отсчёта для --profile-startup: до импорта tkinter и ядра
+_STARTUP_T0 = time.perf_counter()
 
+from threading import Event, Thread
+from pathlib import Path
 
-def make_backup(slot_name: str | None = None) -> str:
-    """Сохранить текущий save00 в слот."""
-    global NOITA_SAVE, SAVES_DIR
+import tkinter as tk
+from tkinter import ttk
+
+import noita_core as core
+from noita_core import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    SAVE_RESOURCE,
+    Job,
+    LOG_ASSET,
+    LOG_ERROR,
+    LOG_LUA,
+    LOG_MOD,
+    LOG_WARNING,
+    JobScheduler,
+    LogFile,
+    Progress,
+    SavesWatcher,
+    SessionMonitor,
+    SlotPrewarmer,
+    config,
+    delete_slot,
+    diff_slots,
+    diff_summary,
+    export_slot,
+    export_slot_name,
+    import_slot,
+    init_user_data,
+    launch_noita,
+    make_backup,
+    recover_staging,
+    rename_slot,
+    restore_slot,
+    slot_exists,
+    slot_index,
+    perf_summary,
+    read_perf_log,
+    slot_resource,
+    span,
+    t,
+    verify_slots,
+)
+
+
+class StartupProfile:
+    """Длительность этапов запуска окна; печатается при --profile-startup."""
+
+    def __init__(self, started: float):
+        self.started = started
+        self._last = started
+        self.phases: list[tuple[str, float]] = []
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self) -> str:
+        lines = [f"{phase:<20}{seconds * 1000:9.1f} ms" for phase, seconds in self.phases]
+        lines.append(f"{'total':<20}{(self._last - self.started) * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+
+_STARTUP = StartupProfile(_STARTUP_T0)
+_STARTUP.mark("imports")
 
-    if not NOITA_SAVE.exists():
-        raise RuntimeError(t("save_missing").format(path=NOITA_SAVE))
+# ---------- GUI ----------
 
-    if not slot_name or slot_name.strip() == "":
-        # используем формат из config (strftime)
-        fmt = config.get("save_name_format", "%Y-%m-%d_%H-%M-%S")
+# Как часто интерфейс перечитывает счётчики прогресса
+PROGRESS_INTERVAL_MS = 200
+# Сколько операций из очереди могут идти одновременно (если не конфликтуют по ресурсам)
+JOB_WORKERS = 2
+# Как часто окно журнала проверяет, дописан ли logger.txt
+LOG_POLL_MS = 500
+# Пауза после выбора слота до прогрева: при листании стрелками слоты не читаются
+PREWARM_DELAY_MS = 400
+
+def format_size(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+def format_delta(delta: int) -> str:
+    return f"+{format_size(delta)}" if delta >= 0 else f"-{format_size(-delta)}"
+
+
+class SlotTable(ttk.Frame):
+    """Таблица слотов на ttk.Treeview с виртуальной прокруткой.
+
+    В Treeview живёт ровно столько строк, сколько видно на экране; при прокрутке
+    меняются только их значения. Сортировка и фильтр работают по данным в памяти
+    (записи индекса слотов), а не по файловой системе.
+    """
+
+    COLUMNS = ("name", "date", "size", "kind")
+
+    def __init__(self, master, on_select=None):
+        super().__init__(master)
+        self.on_select = on_select
+        self._entries: dict[str, dict] = {}
+        self._view: list[str] = []
+        self._offset = 0
+        self._rows = 1
+        self._selected: str | None = None
+        self._sort_key = "name"
+        self._sort_reverse = False
+        self._filter = ""
+        self._filter_job = None
+        self._rendering = False
+
+        filter_row = ttk.Frame(self)
+        filter_row.pack(fill="x", pady=(0, 4))
+        ttk.Label(filter_row, text=t("filter_label")).pack(side="left")
+        self.filter_var = tk.StringVar()
+        ttk.Entry(filter_row, textvariable=self.filter_var).pack(side="left", fill="x", expand=True, padx=(6, 0))
+        self.filter_var.trace_add("write", self._on_filter_change)
+
+        body = ttk.Frame(self)
+        body.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(body, columns=self.COLUMNS, show="headings", selectmode="browse", height=14)
+        for col, width, anchor in (("name", 260, "w"), ("date", 140, "w"), ("size", 90, "e"), ("kind", 110, "w")):
+            self.tree.heading(col, text=t(f"col_{col}"), command=lambda c=col: self.sort_by(c))
+            self.tree.column(col, width=width, anchor=anchor, stretch=(col == "name"))
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.vscroll = ttk.Scrollbar(body, orient="vertical", command=self._on_scrollbar)
+        self.vscroll.pack(side="right", fill="y")
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-self._rows))
+        self.tree.bind("<Next>", lambda e: self._move_selection(self._rows))
+
+    # --- данные ---
+
+    def set_entries(self, entries: dict[str, dict]):
+        """Заменить данные таблицы, сохранив выбор и позицию прокрутки."""
+        self._entries = entries
+        self._rebuild_view()
+
+    def selected(self) -> str | None:
+        return self._selected if self._selected in self._entries else None
+
+    def select(self, name: str):
+        self._selected = name
+        if name in self._view:
+            idx = self._view.index(name)
+            if not self._offset <= idx < self._offset + self._rows:
+                self._offset = max(0, idx - self._rows // 2)
+        self._render()
+
+    def sort_by(self, key: str):
+        if self._sort_key == key:
+            self._sort_reverse = not self._sort_reverse
+        else:
+            self._sort_key = key
+            # Даты и размеры удобнее смотреть от новых/больших
+            self._sort_reverse = key in ("date", "size")
+        self._rebuild_view()
+
+    def _sort_value(self, name: str):
+        info = self._entries.get(name, {})
+        if self._sort_key == "date":
+            return info.get("created", 0), name
+        if self._sort_key == "size":
+            return info.get("size", 0), name
+        if self._sort_key == "kind":
+            return info.get("kind", ""), name
+        return name.lower(), name
+
+    def _rebuild_view(self):
+        needle = self._filter.lower()
+        names = [n for n in self._entries if needle in n.lower()] if needle else list(self._entries)
+        names.sort(key=self._sort_value, reverse=self._sort_reverse)
+        self._view = names
+        self._offset = max(0, min(self._offset, len(names) - self._rows))
+        self._render()
+
+    # --- отрисовка ---
+
+    def _row_values(self, name: str) -> tuple:
+        info = self._entries.get(name, {})
+        if info.get("pending"):
+            return name, "…", "…", t(f"kind_{info.get('kind', 'manual')}")
+        created = info.get("created") or 0
+        date = time.strftime("%Y-%m-%d %H:%M", time.localtime(created)) if created else ""
+        return name, date, format_size(info.get("size", 0)), t(f"kind_{info.get('kind', 'manual')}")
+
+    def _render(self):
+        items = self.tree.get_children()
+        # Подгоняем число строк Treeview под видимую высоту
+        for iid in items[self._rows:]:
+            self.tree.delete(iid)
+        for i in range(len(items), self._rows):
+            self.tree.insert("", "end", iid=f"row{i}", values=("", "", "", ""))
+        selected_iid = None
+        for i in range(self._rows):
+            iid = f"row{i}"
+            pos = self._offset + i
+            if pos < len(self._view):
+                name = self._view[pos]
+                self.tree.item(iid, values=self._row_values(name), tags=())
+                if name == self._selected:
+                    selected_iid = iid
+            else:
+                self.tree.item(iid, values=("", "", "", ""), tags=("empty",))
+        # Программная смена выделения не должна менять выбранный слот
+        self._rendering = True
         try:
-            slot_name = datetime.now().strftime(fmt)
-        except Exception:
-            slot_name = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-
-    dst = SAVES_DIR / slot_name
-    copy_dir(NOITA_SAVE, dst)
-    cleanup_old_backups()
-    return slot_name
-
-
-def load_slot(slot_name: str):
-    global NOITA_SAVE, SAVES_DIR
-    src = SAVES_DIR / slot_name
-    if not src.exists():
-        raise RuntimeError(f"Слот не найден:\n{src}")
-    copy_dir(src, NOITA_SAVE)
-
-
-# ---------- GUI ----------
+            self.tree.selection_set(selected_iid or ())
+        finally:
+            self._rendering = False
+        total = max(len(self._view), 1)
+        self.vscroll.set(self._offset / total, min(1.0, (self._offset + self._rows) / total))
+
+    def _on_resize(self, event):
+        rowheight = int(ttk.Style(self).lookup("Treeview", "rowheight") or 20)
+        # Заголовок таблицы занимает примерно одну строку
+        rows = max(1, event.height // rowheight - 1)
+        if rows != self._rows:
+            self._rows = rows
+            self._offset = max(0, min(self._offset, len(self._view) - self._rows))
+            self._render()
+
+    # --- прокрутка и выбор ---
+
+    def scroll_by(self, delta: int):
+        new_offset = max(0, min(self._offset + delta, len(self._view) - self._rows))
+        if new_offset != self._offset:
+            self._offset = new_offset
+            self._render()
+        return "break"
+
+    def _on_wheel(self, event):
+        return self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_by(int(float(args[1]) * len(self._view)) - self._offset)
+        elif args[0] == "scroll":
+            step = self._rows if args[2] == "pages" else 1
+            self.scroll_by(int(args[1]) * step)
+
+    def _on_tree_select(self, _event):
+        if self._rendering:
+            return
+        sel = self.tree.selection()
+        if not sel:
+            return
+        pos = self._offset + self.tree.index(sel[0])
+        if pos < len(self._view):
+            self._selected = self._view[pos]
+            if self.on_select:
+                self.on_select(self._selected)
+
+    def _move_selection(self, delta: int):
+        if not self._view:
+            return "break"
+        if self._selected in self._view:
+            idx = self._view.index(self._selected) + delta
+        else:
+            idx = self._offset
+        idx = max(0, min(idx, len(self._view) - 1))
+        self._selected = self._view[idx]
+        if idx < self._offset:
+            self._offset = idx
+        elif idx >= self._offset + self._rows:
+            self._offset = idx - self._rows + 1
+        self._render()
+        if self.on_select:
+            self.on_select(self._selected)
+        return "break"
+
+    def _on_filter_change(self, *_):
+        # Фильтр применяем после короткой паузы в наборе
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(120, self._apply_filter)
+
+    def _apply_filter(self):
+        self._filter_job = None
+        self._filter = self.filter_var.get().strip()
+        self._offset = 0
+        self._rebuild_view()
 
 class NoitaLauncherApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, profile_startup: bool = False):
         super().__init__()
+        self._startup = _STARTUP
+        self._profile_startup = profile_startup
+        self._startup.mark("tk init")
 
         self.title(t("title"))
         self.geometry("1100x700")
@@ -303,20 +314,84 @@ class NoitaLauncherApp(tk.Tk):
         self.option_add("*TButton.Padding", 8)
         self.option_add("*TCombobox.Padding", 6)
         self.status_var = tk.StringVar(value=t("status_idle"))
+        self._describing = False
+        self._progress_job = None
+        self._queue_jobs: list[Job] = []
+        self.scheduler = JobScheduler(workers=JOB_WORKERS, on_change=lambda: self.after(0, self._refresh_queue))
         # Разрешаем менять размер окна — это позволит прокрутке работать корректно
         self.resizable(True, True)
+        self._watcher: SavesWatcher | None = None
+        # Автоснимки запущенной из лаунчера игры
+        self._session_monitor: SessionMonitor | None = None
+        # Прогрев выбранного слота в кэш до загрузки
+        self.prewarmer = SlotPrewarmer()
+        self._prewarm_job = None
+        self._started = False
 
         self.create_widgets()
-        # Применим тему из конфига сразу
+        config.subscribe(self._on_config_changed, ("noita_save_path", "noita_exe_path", "saves_dir"))
+        self._startup.mark("widgets")
+        # До первого кадра — только стили ttk; обход tk-виджетов, скан слотов и
+        # остальное делает _finish_startup, когда окно уже на экране
         try:
-            self.apply_theme(config.get("theme", "light"))
+            self.apply_theme(config.get("theme", "light"), walk=False)
         except Exception:
             pass
+        self._startup.mark("theme styles")
+        self.bind("<Map>", self._on_first_map, add="+")
+
+    def _on_first_map(self, event):
+        if event.widget is not self or self._started:
+            return
+        self._started = True
+        self.after(1, self._finish_startup)
+
+    def _finish_startup(self):
+        """Работа, не нужная для первого кадра: выполняется сразу после показа окна."""
+        startup = self._startup
+        self.update_idletasks()
+        startup.mark("first frame")
+        init_user_data()
+        # Прерванная загрузка слота могла оставить временные папки рядом с save00;
+        # их удаление может быть долгим, поэтому идёт в очереди — раньше любой загрузки
+        self.scheduler.submit(
+            t("job_recover"),
+            lambda: recover_staging(core.NOITA_SAVE),
+            {SAVE_RESOURCE: "write"},
+            op="recover",
+        )
+        startup.mark("user data, recovery")
+        try:
+            self._theme_tk_widgets(self, self._theme_colors(config.get("theme", "light")))
+        except Exception:
+            pass
+        startup.mark("theme walk")
         self.refresh_slots_list()
+        startup.mark("slot scan")
+        self.start_watcher()
+        startup.mark("watcher")
+        if self._profile_startup:
+            self._print_startup_profile()
+
+    def _print_startup_profile(self):
+        report = self._startup.report()
+        if sys.stdout is not None:
+            print(report, flush=True)
+            return
+        # Сборка --windowed: консоли нет, пишем рядом с конфигом
+        try:
+            (core.USER_DATA_DIR / "startup_profile.txt").write_text(report + "\n", encoding="utf-8")
+        except Exception:
+            pass
 
-    def create_widgets(self):
-        global config
+    def start_watcher(self):
+        """(Пере)запустить наблюдение за текущей SAVES_DIR."""
+        if self._watcher is not None:
+            self._watcher.stop()
+        self._watcher = SavesWatcher(core.SAVES_DIR, lambda: self.after(0, self.refresh_slots_list))
+        self._watcher.start()
 
+    def create_widgets(self):
         main_frame = ttk.Frame(self, padding=12)
         main_frame.pack(fill="both", expand=True)
 
@@ -361,19 +436,17 @@ class NoitaLauncherApp(tk.Tk):
         slots_section.pack(side="left", fill="both", expand=True, padx=(0, 8))
 
         ttk.Label(slots_section, text=t("slots_label")).pack(anchor="w")
-        list_container = ttk.Frame(slots_section)
-        list_container.pack(fill="both", expand=True, pady=(4, 6))
-
-        self.slots_listbox = tk.Listbox(list_container, height=14, activestyle="none", exportselection=False)
-        self.slots_listbox.pack(side="left", fill="both", expand=True)
-        vscroll = ttk.Scrollbar(list_container, orient="vertical", command=self.slots_listbox.yview)
-        vscroll.pack(side="right", fill="y")
-        self.slots_listbox.configure(yscrollcommand=vscroll.set)
+        self.slot_table = SlotTable(slots_section, on_select=self._on_slot_selected)
+        self.slot_table.pack(fill="both", expand=True, pady=(4, 6))
 
         list_actions = ttk.Frame(slots_section)
         list_actions.pack(fill="x", pady=(2, 0))
         ttk.Button(list_actions, text=t("rename_slot"), command=self.on_rename_slot).pack(side="left", padx=(0, 6))
-        ttk.Button(list_actions, text=t("delete_slot"), command=self.on_delete_slot).pack(side="left")
+        ttk.Button(list_actions, text=t("delete_slot"), command=self.on_delete_slot).pack(side="left", padx=(0, 6))
+        ttk.Button(list_actions, text=t("export_slot"), command=self.on_export_slot).pack(side="left", padx=(0, 6))
+        ttk.Button(list_actions, text=t("import_slot"), command=self.on_import_slot).pack(side="left")
+        ttk.Button(list_actions, text=t("verify_slots"), command=self.on_verify_slots).pack(side="right")
+        ttk.Button(list_actions, text=t("diff_slot"), command=self.open_diff_window).pack(side="right", padx=(0, 6))
 
         actions_section = ttk.Labelframe(content_frame, text=t("actions_header"), padding=10)
         actions_section.pack(side="left", fill="both", expand=True)
@@ -389,6 +462,11 @@ class NoitaLauncherApp(tk.Tk):
         ttk.Button(primary_buttons, text=t("overwrite_btn"), command=self.on_overwrite_slot).pack(fill="x", pady=2)
         ttk.Button(primary_buttons, text=t("run_btn"), command=self.on_run_with_slot).pack(fill="x", pady=2)
 
+        ttk.Label(actions_section, text=t("queue_label")).pack(anchor="w", pady=(10, 0))
+        self.queue_listbox = tk.Listbox(actions_section, height=5, activestyle="none", exportselection=False)
+        self.queue_listbox.pack(fill="both", expand=True, pady=(4, 4))
+        ttk.Button(actions_section, text=t("cancel_job"), command=self.on_cancel_job).pack(anchor="e")
+
         status_frame = ttk.Frame(self, padding=(8, 6))
         status_frame.pack(fill="x", side="bottom")
         ttk.Label(status_frame, textvariable=self.status_var, anchor="w", style="Status.TLabel").pack(
@@ -399,19 +477,18 @@ class NoitaLauncherApp(tk.Tk):
 
     def _choose_save_path(self):
         """Выбор директории save00 через диалог выбора папки."""
-        global config, NOITA_SAVE
+        from tkinter import filedialog
+
         path = filedialog.askdirectory(title=t("save00_label"))
         if not path:
             return
         config["noita_save_path"] = path
-        NOITA_SAVE = Path(path)
-        save_config(config)
-        self.label_save_path.config(text=f"{t('save00_label')} {path}")
-        self.refresh_slots_list()
+        config.save()
 
     def _choose_exe_path(self):
         """Выбор файла Noita.exe через диалог."""
-        global config, NOITA_EXE
+        from tkinter import filedialog
+
         path = filedialog.askopenfilename(
             title=t("exe_label"),
             filetypes=[("Noita", "*.exe"), ("All files", "*.*")]
@@ -419,23 +496,31 @@ class NoitaLauncherApp(tk.Tk):
         if not path:
             return
         config["noita_exe_path"] = path
-        NOITA_EXE = path
-        save_config(config)
-        self.label_exe_path.config(text=f"{t('exe_label')} {path}")
+        config.save()
 
     def _choose_saves_dir(self):
         """Выбор каталога, в котором лежат пользовательские слоты."""
-        global config, SAVES_DIR
+        from tkinter import filedialog
+
         path = filedialog.askdirectory(title=t("saves_dir_label"))
         if not path:
             return
         config["saves_dir"] = path
-        SAVES_DIR = Path(path)
-        SAVES_DIR.mkdir(exist_ok=True)
-        save_config(config)
-        self.label_saves_dir.config(text=f"{t('saves_dir_label')} {path}")
-        self.refresh_slots_list()
+        config.save()
 
+    def _on_config_changed(self, keys: set):
+        """Пути сменились (в настройках или выбором папки) — обновить подписи, слоты и наблюдение."""
+        if "noita_save_path" in keys:
+            self.label_save_path.config(text=f"{t('save00_label')} {config['noita_save_path']}")
+        if "noita_exe_path" in keys:
+            self.label_exe_path.config(text=f"{t('exe_label')} {config['noita_exe_path']}")
+        if "saves_dir" in keys:
+            self.label_saves_dir.config(text=f"{t('saves_dir_label')} {config['saves_dir']}")
+            core.SAVES_DIR.mkdir(parents=True, exist_ok=True)
+        if keys & {"noita_save_path", "saves_dir"}:
+            self.refresh_slots_list()
+        if "saves_dir" in keys:
+            self.start_watcher()
 
     # --- действия ---
 
@@ -457,67 +542,167 @@ class NoitaLauncherApp(tk.Tk):
             pass
         self.update_idletasks()
 
+    def _cancel_progress_poll(self):
+        if self._progress_job is not None:
+            self.after_cancel(self._progress_job)
+            self._progress_job = None
+
     def stop_progress(self, key: str | None = None, slot: str | None = None):
+        self._cancel_progress_poll()
+        if key:
+            self.set_status(key, slot=slot)
+        if self.scheduler.active():
+            # В очереди остались задачи — индикатор продолжает показывать их
+            self._progress_job = self.after(PROGRESS_INTERVAL_MS, self._poll_progress)
+            return
         try:
             self.progress.stop()
-            self.progress.configure(value=0)
+            self.progress.configure(value=0, mode="indeterminate")
         except Exception:
             pass
-        if key:
-            self.set_status(key, slot=slot)
         self.update_idletasks()
 
-    def run_async(self, worker, *, on_success=None, on_error=None, final_status=None, slot=None):
-        """Run blocking work in a thread so the progress bar animates."""
-
-        def runner():
-            try:
-                result = worker()
-            except Exception as exc:
-
-                def handle_error():
-                    if on_error:
-                        on_error(exc)
-                    else:
-                        messagebox.showerror(t("error"), str(exc))
-                    self.stop_progress("status_idle")
-
-                self.after(0, handle_error)
-                return
-
-            def handle_success():
+    def _poll_progress(self):
+        """Показать прогресс первой выполняющейся задачи: не чаще PROGRESS_INTERVAL_MS."""
+        self._progress_job = None
+        running = [job for job in self.scheduler.jobs() if job.state == "running"]
+        if running:
+            job = running[0]
+            snap = job.progress.snapshot()
+            if snap["total_bytes"] > 0:
+                if str(self.progress.cget("mode")) != "determinate":
+                    self.progress.stop()
+                    self.progress.configure(mode="determinate", maximum=100)
+                self.progress.configure(value=snap["fraction"] * 100)
+                eta = int(snap["eta"])
+                detail = t("progress_detail").format(
+                    percent=int(snap["fraction"] * 100),
+                    speed=f"{snap['speed'] / (1024 * 1024):.1f}",
+                    eta=f"{eta // 60}:{eta % 60:02d}",
+                )
+                self.status_var.set(f"{job.title} {detail}")
+        self._progress_job = self.after(PROGRESS_INTERVAL_MS, self._poll_progress)
+
+    def _refresh_queue(self):
+        """Перерисовать список задач очереди (вызывается при каждом изменении очереди)."""
+        self._queue_jobs = self.scheduler.jobs()
+        self.queue_listbox.delete(0, tk.END)
+        for job in self._queue_jobs:
+            self.queue_listbox.insert(tk.END, f"{job.title} — {t('job_' + job.state)}")
+
+    def on_cancel_job(self):
+        """Отменить выбранную в очереди задачу, а если ничего не выбрано — выполняющуюся."""
+        selection = self.queue_listbox.curselection()
+        if selection and selection[0] < len(self._queue_jobs):
+            job = self._queue_jobs[selection[0]]
+        elif self._queue_jobs:
+            job = self._queue_jobs[0]
+        else:
+            return
+        self.scheduler.cancel(job)
+
+    def run_async(
+        self,
+        worker,
+        *,
+        title: str,
+        resources: dict[str, str] | None = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        on_success=None,
+        on_error=None,
+        final_status=None,
+        slot=None,
+        progress=None,
+        op: str | None = None,
+    ) -> Job:
+        """Поставить блокирующую работу в очередь операций.
+
+        resources — {ресурс: "read" | "write"}, по ним очередь решает, что можно
+        выполнять одновременно. Progress задачи даёт проценты, скорость, ETA и отмену.
+        op — имя операции для perf.log (фазы берутся из Progress.span).
+        """
+        from tkinter import messagebox
+
+        def on_done(job: Job):
+            self.after(0, handle, job)
+
+        def handle(job: Job):
+            self._cancel_progress_poll()
+            if job.state == "cancelled":
+                self.stop_progress("status_cancelled")
+            elif job.state == "failed":
+                if on_error:
+                    on_error(job.error)
+                else:
+                    messagebox.showerror(t("error"), str(job.error))
+                self.stop_progress("status_idle")
+            else:
                 if on_success:
-                    on_success(result)
+                    on_success(job.result)
                 self.stop_progress(final_status, slot=slot)
 
-            self.after(0, handle_success)
-
-        Thread(target=runner, daemon=True).start()
+        # Операции диск нужнее: прогрев не должен отнимать у неё чтение
+        self.prewarmer.cancel()
+        job = self.scheduler.submit(title, worker, resources, priority, progress, on_done, op=op, slot=slot)
+        if self._progress_job is None:
+            self._progress_job = self.after(PROGRESS_INTERVAL_MS, self._poll_progress)
+        return job
 
     # --- ???????? ---
     def get_selected_slot(self) -> str | None:
-        sel = self.slots_listbox.curselection()
-        if not sel:
-            return None
-        return self.slots_listbox.get(sel[0])
+        return self.slot_table.selected()
+
+    def _on_slot_selected(self, name: str):
+        """Прочитать выбранный слот в кэш заранее, если пользователь на нём задержался."""
+        self.prewarmer.cancel()
+        if self._prewarm_job is not None:
+            self.after_cancel(self._prewarm_job)
+            self._prewarm_job = None
+        if config.get("prewarm_slots", True):
+            self._prewarm_job = self.after(PREWARM_DELAY_MS, self._start_prewarm, name)
+
+    def _start_prewarm(self, name: str):
+        self._prewarm_job = None
+        # Пока идут операции или игра запущена, диск им нужнее
+        if self.scheduler.active():
+            return
+        if self._session_monitor is not None and self._session_monitor.running:
+            return
+        if name == self.get_selected_slot() and slot_exists(name):
+            self.prewarmer.start(name)
 
     def refresh_slots_list(self):
-        global SAVES_DIR
-        self.slots_listbox.delete(0, tk.END)
-        if not SAVES_DIR.exists():
-            SAVES_DIR.mkdir(exist_ok=True)
-        slots = sorted(
-            [d.name for d in SAVES_DIR.iterdir() if d.is_dir()]
-        )
-        for s in slots:
-            self.slots_listbox.insert(tk.END, s)
+        """Обновить таблицу слотов из индекса; описание новых слотов — в фоне."""
+        if not core.SAVES_DIR.exists():
+            core.SAVES_DIR.mkdir(parents=True, exist_ok=True)
+        index = slot_index()
+        index.reconcile(describe=False)
+        self.slot_table.set_entries(index.entries())
+        if index.has_pending() and not self._describing:
+            self._describing = True
+
+            def describe():
+                try:
+                    index.describe_pending()
+                finally:
+                    self.after(0, self._on_described)
+
+            Thread(target=describe, daemon=True).start()
+
+    def _on_described(self):
+        self._describing = False
+        self.slot_table.set_entries(slot_index().entries())
 
     def on_save_current(self):
-        name = self.slot_name_entry.get().strip() or None
+        # Имя выбирается сразу: по нему очередь блокирует слот
+        from tkinter import messagebox
+
+        name = self.slot_name_entry.get().strip() or core.generate_auto_name("")
         self.start_progress("status_saving", slot=name)
+        progress = Progress()
 
         def worker():
-            return make_backup(name)
+            return make_backup(name, progress=progress)
 
         def on_success(slot):
             self.slot_name_entry.delete(0, tk.END)
@@ -525,19 +710,29 @@ class NoitaLauncherApp(tk.Tk):
             self.set_status("status_saved", slot)
             messagebox.showinfo(t("info"), t("backup_done").format(slot=slot))
 
-        self.run_async(worker, on_success=on_success)
+        self.run_async(
+            worker,
+            title=t("job_save").format(slot=name),
+            op="save",
+            slot=name,
+            resources={SAVE_RESOURCE: "read", slot_resource(name): "write"},
+            on_success=on_success,
+            progress=progress,
+        )
 
     def on_load_slot(self):
+        from tkinter import messagebox
+
         slot = self.get_selected_slot()
         if not slot:
             messagebox.showwarning(t("warning"), t("select_slot"))
             return
         self.start_progress("status_loading", slot=slot)
+        progress = Progress()
 
         def worker():
-            if config.get("auto_backup_on_load"):
-                make_backup(generate_auto_name("auto_load_"))
-            load_slot(slot)
+            auto = "auto_load_" if config.get("auto_backup_on_load") else None
+            restore_slot(slot, auto_backup=auto, progress=progress)
             return slot
 
         def on_success(_):
@@ -547,9 +742,20 @@ class NoitaLauncherApp(tk.Tk):
         def on_error(err):
             messagebox.showerror(t("error"), str(err))
 
-        self.run_async(worker, on_success=on_success, on_error=on_error)
+        self.run_async(
+            worker,
+            title=t("job_load").format(slot=slot),
+            op="load",
+            slot=slot,
+            resources={SAVE_RESOURCE: "write", slot_resource(slot): "read"},
+            on_success=on_success,
+            on_error=on_error,
+            progress=progress,
+        )
 
     def on_overwrite_slot(self):
+        from tkinter import messagebox
+
         slot = self.get_selected_slot()
         if not slot:
             messagebox.showwarning(t("warning"), t("select_slot"))
@@ -562,9 +768,10 @@ class NoitaLauncherApp(tk.Tk):
             return
 
         self.start_progress("status_overwrite", slot=slot)
+        progress = Progress()
 
         def worker():
-            make_backup(slot)
+            make_backup(slot, progress=progress)
             return slot
 
         def on_success(_):
@@ -574,11 +781,18 @@ class NoitaLauncherApp(tk.Tk):
 
         self.run_async(
             worker,
+            title=t("job_overwrite").format(slot=slot),
+            op="overwrite",
+            slot=slot,
+            resources={SAVE_RESOURCE: "read", slot_resource(slot): "write"},
             on_success=on_success,
             on_error=lambda e: messagebox.showerror(t("error"), str(e)),
+            progress=progress,
         )
 
     def on_delete_slot(self):
+        from tkinter import messagebox
+
         slot = self.get_selected_slot()
         if not slot:
             messagebox.showwarning(t("warning"), t("select_slot"))
@@ -591,21 +805,36 @@ class NoitaLauncherApp(tk.Tk):
             ):
                 return
 
-        try:
-            target = SAVES_DIR / slot
-            if target.exists():
-                shutil.rmtree(target)
+        def on_success(_):
             self.refresh_slots_list()
-            self.set_status("status_deleted", slot)
-        except Exception as e:
-            messagebox.showerror(t("error"), str(e))
+
+        progress = Progress()
+
+        def worker():
+            with span(progress, "delete"):
+                delete_slot(slot)
+
+        self.run_async(
+            worker,
+            title=t("job_delete").format(slot=slot),
+            op="delete",
+            progress=progress,
+            resources={slot_resource(slot): "write"},
+            on_success=on_success,
+            final_status="status_deleted",
+            slot=slot,
+        )
 
     def on_rename_slot(self):
+        from tkinter import messagebox
+
         slot = self.get_selected_slot()
         if not slot:
             messagebox.showwarning(t("warning"), t("select_slot"))
             return
 
+        from tkinter import simpledialog
+
         new_name = simpledialog.askstring(t("rename_title"), t("rename_prompt"), initialvalue=slot)
         if new_name is None:
             return
@@ -615,115 +844,824 @@ class NoitaLauncherApp(tk.Tk):
             messagebox.showwarning(t("warning"), t("name_empty"))
             return
 
-        src = SAVES_DIR / slot
-        dst = SAVES_DIR / new_name
-        if dst.exists():
+        if slot_exists(new_name):
             messagebox.showerror(t("error"), t("rename_exists").format(slot=new_name))
             return
 
-        try:
-            src.rename(dst)
+        def on_success(_):
             self.refresh_slots_list()
-            try:
-                idx = list(sorted([d.name for d in SAVES_DIR.iterdir() if d.is_dir()])).index(new_name)
-                self.slots_listbox.selection_clear(0, tk.END)
-                self.slots_listbox.selection_set(idx)
-                self.slots_listbox.see(idx)
-            except Exception:
-                pass
-            self.set_status("status_renamed", new_name)
-        except Exception as e:
-            messagebox.showerror(t("error"), str(e))
+            self.slot_table.select(new_name)
+
+        progress = Progress()
+
+        def worker():
+            with span(progress, "rename"):
+                rename_slot(slot, new_name)
+
+        self.run_async(
+            worker,
+            title=t("job_rename").format(slot=slot),
+            op="rename",
+            progress=progress,
+            resources={slot_resource(slot): "write", slot_resource(new_name): "write"},
+            on_success=on_success,
+            final_status="status_renamed",
+            slot=new_name,
+        )
+
+    def on_export_slot(self):
+        from tkinter import messagebox
+
+        slot = self.get_selected_slot()
+        if not slot:
+            messagebox.showwarning(t("warning"), t("select_slot"))
+            return
+
+        from tkinter import filedialog
+
+        path = filedialog.asksaveasfilename(
+            title=t("export_slot"),
+            initialfile=f"{slot}{core.EXPORT_EXT}",
+            defaultextension=core.EXPORT_EXT,
+            filetypes=[(t("export_filetype"), f"*{core.EXPORT_EXT}"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+        self.start_progress("job_export", slot=slot)
+        progress = Progress()
+
+        def on_success(dst):
+            messagebox.showinfo(t("info"), t("export_done").format(slot=slot, path=dst))
+
+        self.run_async(
+            lambda: export_slot(slot, Path(path), progress=progress),
+            title=t("job_export").format(slot=slot),
+            op="export",
+            slot=slot,
+            resources={slot_resource(slot): "read"},
+            on_success=on_success,
+            final_status="status_idle",
+            progress=progress,
+        )
+
+    def on_import_slot(self):
+        from tkinter import filedialog, messagebox, simpledialog
+
+        path = filedialog.askopenfilename(
+            title=t("import_slot"),
+            filetypes=[(t("export_filetype"), f"*{core.EXPORT_EXT} *.tgz"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+        name = simpledialog.askstring(t("import_slot"), t("import_prompt"), initialvalue=export_slot_name(Path(path)))
+        if name is None:
+            return
+        name = name.strip()
+        if name == "":
+            messagebox.showwarning(t("warning"), t("name_empty"))
+            return
+        if slot_exists(name):
+            messagebox.showerror(t("error"), t("rename_exists").format(slot=name))
+            return
+        self.start_progress("job_import", slot=name)
+        progress = Progress()
+
+        def on_success(slot):
+            self.refresh_slots_list()
+            self.slot_table.select(slot)
+            messagebox.showinfo(t("info"), t("import_done").format(slot=slot))
+
+        self.run_async(
+            lambda: import_slot(Path(path), name, progress=progress),
+            title=t("job_import").format(slot=name),
+            op="import",
+            slot=name,
+            resources={slot_resource(name): "write"},
+            on_success=on_success,
+            final_status="status_idle",
+            progress=progress,
+        )
+
+    def on_verify_slots(self):
+        from tkinter import messagebox
+
+        full = messagebox.askyesnocancel(t("confirm"), t("verify_full_prompt"))
+        if full is None:
+            return
+        names = slot_index().names()
+        self.start_progress("job_verify")
+        progress = Progress()
+
+        def on_success(report):
+            damaged = [name for name, info in report.items() if info["missing"] or info["corrupt"]]
+            unhashed = sum(info["unhashed"] for info in report.values())
+            lines = [t("verify_ok").format(count=len(report))] if not damaged else [
+                t("verify_damaged").format(count=len(damaged))
+            ]
+            for name in damaged[:15]:
+                info = report[name]
+                lines.append(t("verify_slot_line").format(
+                    slot=name, missing=len(info["missing"]), corrupt=len(info["corrupt"])
+                ))
+            if unhashed:
+                lines.append(t("verify_unhashed").format(count=unhashed))
+            if damaged:
+                messagebox.showwarning(t("warning"), "\n".join(lines))
+            else:
+                messagebox.showinfo(t("info"), "\n".join(lines))
+
+        self.run_async(
+            lambda: verify_slots(full=full, progress=progress),
+            title=t("job_verify"),
+            op="verify",
+            resources={slot_resource(name): "read" for name in names},
+            priority=PRIORITY_BACKGROUND,
+            on_success=on_success,
+            final_status="status_idle",
+            progress=progress,
+        )
+
+    def open_diff_window(self):
+        """Что изменится между выбранным слотом и save00 (или другим слотом).
+
+        Сравнение идёт по манифестам слотов в очереди операций; хэши считаются
+        только для файлов одного размера с разным временем изменения.
+        """
+        from tkinter import messagebox
+
+        slot = self.get_selected_slot()
+        if not slot:
+            messagebox.showwarning(t("warning"), t("select_slot"))
+            return
+        live = "save00"
+        others = sorted(name for name in slot_index().names() if name != slot)
+
+        win = tk.Toplevel(self)
+        win.title(t("diff_title"))
+        win.geometry("760x520")
+        win.minsize(560, 360)
+
+        container = ttk.Frame(win, padding=8)
+        container.pack(fill="both", expand=True)
+
+        top = ttk.Frame(container)
+        top.pack(fill="x")
+        ttk.Label(top, text=t("diff_with")).pack(side="left")
+        other_var = tk.StringVar(value=live)
+        other_box = ttk.Combobox(top, textvariable=other_var, values=[live] + others, state="readonly", width=36)
+        other_box.pack(side="left", padx=(6, 6))
+        # По умолчанию — что сделает «Загрузить»: от другой стороны к выбранному слоту
+        state = {"reverse": False, "job": None, "seq": 0}
+
+        header_var = tk.StringVar()
+        ttk.Label(container, textvariable=header_var).pack(anchor="w", pady=(8, 4))
+
+        body = ttk.Frame(container)
+        body.pack(fill="both", expand=True)
+        tree = ttk.Treeview(
+            body, columns=("status", "path", "old_size", "new_size", "delta"), show="headings", height=14
+        )
+        for col, key, width, anchor in (
+            ("status", "col_status", 90, "w"),
+            ("path", "col_path", 320, "w"),
+            ("old_size", "col_old_size", 90, "e"),
+            ("new_size", "col_new_size", 90, "e"),
+            ("delta", "col_delta", 100, "e"),
+        ):
+            tree.heading(col, text=t(key))
+            tree.column(col, width=width, anchor=anchor, stretch=(col == "path"))
+        tree.pack(side="left", fill="both", expand=True)
+        vscroll = ttk.Scrollbar(body, orient="vertical", command=tree.yview)
+        vscroll.pack(side="right", fill="y")
+        tree.configure(yscrollcommand=vscroll.set)
+
+        summary_var = tk.StringVar()
+        ttk.Label(container, textvariable=summary_var).pack(anchor="w", pady=(6, 6))
+
+        def _sides() -> tuple[str | None, str | None]:
+            other = other_var.get()
+            other = None if other == live else other
+            return (slot, other) if state["reverse"] else (other, slot)
+
+        def _show(changes: list[dict]):
+            if not win.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            for change in changes:
+                tree.insert(
+                    "", "end",
+                    values=(
+                        t(f"diff_{change['status']}"),
+                        change["path"],
+                        "" if change["old_size"] is None else format_size(change["old_size"]),
+                        "" if change["new_size"] is None else format_size(change["new_size"]),
+                        format_delta(change["delta"]),
+                    ),
+                )
+            if not changes:
+                summary_var.set(t("diff_same"))
+                return
+            summary = diff_summary(changes)
+            summary["delta"] = format_delta(summary["delta"])
+            summary_var.set(t("diff_summary").format(**summary))
+
+        def _compare(_event=None):
+            if state["job"] is not None:
+                self.scheduler.cancel(state["job"])
+            old, new = _sides()
+            header_var.set(t("diff_header").format(old=old or live, new=new or live))
+            summary_var.set("")
+            tree.delete(*tree.get_children())
+            resources = {SAVE_RESOURCE if name is None else slot_resource(name): "read" for name in (old, new)}
+            progress = Progress()
+            # Результат устаревшего сравнения (сменили сторону, пока оно шло) не показываем
+            state["seq"] += 1
+            seq = state["seq"]
+            self.start_progress("job_diff", slot=slot)
+            state["job"] = self.run_async(
+                lambda: diff_slots(old, new, progress=progress),
+                title=t("job_diff").format(slot=slot),
+                op="diff",
+                slot=slot,
+                resources=resources,
+                on_success=lambda changes: seq == state["seq"] and _show(changes),
+                final_status="status_idle",
+                progress=progress,
+            )
+
+        def _swap():
+            state["reverse"] = not state["reverse"]
+            _compare()
+
+        def _on_destroy(event):
+            if event.widget is win and state["job"] is not None:
+                self.scheduler.cancel(state["job"])
+
+        other_box.bind("<<ComboboxSelected>>", _compare)
+        win.bind("<Destroy>", _on_destroy)
+        ttk.Button(top, text=t("diff_swap"), command=_swap).pack(side="left")
+
+        btn_frame = ttk.Frame(container)
+        btn_frame.pack(fill="x")
+        ttk.Button(btn_frame, text=t("close"), command=win.destroy).pack(side="right")
+
+        self.apply_theme(config.get("theme", "light"), root_widget=win)
+        _compare()
 
     def open_logs_window(self):
-        log_file = Path("logger.txt")
+        """logger.txt постранично: в Text только видимые строки, разбор журнала идёт в фоне.
+
+        Фильтр по признакам, сессия и поиск превращают окно в список номеров
+        подходящих строк; двойной щелчок по строке открывает её в полном журнале.
+        """
+        from tkinter import font as tkfont
+
+        log = LogFile(Path("logger.txt"), index_file=core.LOG_INDEX_FILE)
+        cancel = Event()
 
         win = tk.Toplevel(self)
         win.title(t("log_title"))
-        win.geometry("760x520")
-        win.minsize(520, 320)
+        win.geometry("860x560")
+        win.minsize(560, 340)
 
         container = ttk.Frame(win)
         container.pack(fill="both", expand=True)
-        container.rowconfigure(1, weight=1)
+        container.rowconfigure(2, weight=1)
         container.columnconfigure(0, weight=1)
 
         btn_frame = ttk.Frame(container)
-        btn_frame.grid(row=0, column=0, sticky="we", padx=6, pady=6)
+        btn_frame.grid(row=0, column=0, sticky="we", padx=6, pady=(6, 3))
+
+        filter_frame = ttk.Frame(container)
+        filter_frame.grid(row=1, column=0, sticky="we", padx=6, pady=(3, 6))
 
         text_frame = ttk.Frame(container)
-        text_frame.grid(row=1, column=0, sticky="nsew", padx=6, pady=(0, 6))
+        text_frame.grid(row=2, column=0, sticky="nsew", padx=6, pady=(0, 6))
         text_frame.rowconfigure(0, weight=1)
         text_frame.columnconfigure(0, weight=1)
 
         txt = tk.Text(text_frame, wrap="none", font=("Consolas", 10), undo=False)
         txt.grid(row=0, column=0, sticky="nsew")
-
-        vscroll = ttk.Scrollbar(text_frame, orient="vertical", command=txt.yview)
-        vscroll.grid(row=0, column=1, sticky="ns")
-        hscroll = ttk.Scrollbar(text_frame, orient="horizontal", command=txt.xview)
-        hscroll.grid(row=1, column=0, sticky="we")
-        txt.configure(yscrollcommand=vscroll.set, xscrollcommand=hscroll.set)
-
-        def _load_logs():
+        txt.tag_configure("error", foreground="#e5534b")
+        txt.tag_configure("warning", foreground="#d4a72c")
+        txt.tag_configure("target", underline=True)
+        line_height = max(1, tkfont.Font(font=txt["font"]).metrics("linespace"))
+
+        filters = (
+            ("log_filter_all", 0),
+            ("log_filter_errors", LOG_ERROR),
+            ("log_filter_problems", LOG_ERROR | LOG_WARNING),
+            ("log_filter_assets", LOG_ASSET),
+            ("log_filter_lua", LOG_LUA),
+            ("log_filter_mods", LOG_MOD),
+        )
+        follow_var = tk.BooleanVar(value=True)
+        goto_var = tk.StringVar()
+        search_var = tk.StringVar()
+        info_var = tk.StringVar()
+        sessions: list[dict] = []
+        # view — номера отфильтрованных строк (None — весь файл), covered — до какой
+        # строки файла фильтр уже применён; search — номер последнего поиска
+        state = {
+            "first": 0,
+            "key": None,
+            "view": None,
+            "covered": 0,
+            "search": 0,
+            "search_cancel": None,
+            "results": {},
+            "mark": None,
+            "debounce": None,
+            "updating": False,
+            "force": False,
+        }
+
+        def _rows() -> int:
+            return max(1, (txt.winfo_height() - 4) // line_height)
+
+        def _total() -> int:
+            view = state["view"]
+            return log.line_count() if view is None else len(view)
+
+        def _update_bar(total: int, rows: int):
+            first = state["first"]
+            if total:
+                vscroll.set(first / total, min(1.0, (first + rows) / total))
+            else:
+                vscroll.set(0.0, 1.0)
+            if state["view"] is not None:
+                info_var.set(t("log_matches").format(count=total))
+            else:
+                key = "log_lines" if log.indexed or not log.exists else "log_indexing"
+                info_var.set(t(key).format(first=first + 1, count=total))
+
+        def _visible(first: int, rows: int) -> tuple[list[str], list[int]]:
+            """Тексты видимых строк и биты LOG_* для каждой."""
+            view = state["view"]
+            if view is None:
+                if follow_var.get() and not log.indexed:
+                    # Пока журнал разбирается, конец файла читаем с хвоста
+                    return log.tail(rows), [0] * rows
+                return log.read_lines(first, rows), list(log.line_flags(first, rows))
+            lines, flags = [], []
+            for n in view[first : first + rows]:
+                text = log.read_lines(n, 1)
+                lines.append(f"{n + 1:>8}  {text[0] if text else ''}")
+                flags.append(log.line_flags(n, 1)[0])
+            return lines, flags
+
+        def _render():
+            rows = _rows()
+            total = _total()
+            if follow_var.get():
+                state["first"] = total - rows
+            state["first"] = max(0, min(state["first"], total - rows))
+            if not log.exists:
+                lines, flags = [t("log_missing")], [0]
+            else:
+                lines, flags = _visible(state["first"], rows)
             txt.config(state="normal")
             txt.delete("1.0", tk.END)
-            if log_file.exists():
+            txt.insert(tk.END, "\n".join(lines))
+            for row, fl in enumerate(flags[: len(lines)], start=1):
+                if fl & LOG_ERROR:
+                    txt.tag_add("error", f"{row}.0", f"{row}.end")
+                elif fl & (LOG_WARNING | LOG_ASSET):
+                    txt.tag_add("warning", f"{row}.0", f"{row}.end")
+            mark = state["mark"]
+            if state["view"] is None and mark is not None and 0 <= mark - state["first"] < len(lines):
+                row = mark - state["first"] + 1
+                txt.tag_add("target", f"{row}.0", f"{row}.end")
+            txt.config(state="disabled")
+            _update_bar(total, rows)
+
+        def _scroll_to(first: int):
+            rows = _rows()
+            total = _total()
+            state["first"] = max(0, min(first, total - rows))
+            # Докрутили до конца — снова следим за дописываемыми строками
+            follow_var.set(log.indexed and state["first"] >= total - rows)
+            _render()
+
+        def _yview(*args):
+            rows = _rows()
+            if args[0] == "moveto":
+                _scroll_to(int(float(args[1]) * _total()))
+            elif args[0] == "scroll":
+                step = rows if args[2] == "pages" else 1
+                _scroll_to(state["first"] + int(args[1]) * step)
+
+        def _on_wheel(event):
+            if event.num == 4:
+                delta = -3
+            elif event.num == 5:
+                delta = 3
+            else:
+                delta = -3 * (event.delta // 120 or (1 if event.delta > 0 else -1))
+            _scroll_to(state["first"] + delta)
+            return "break"
+
+        def _on_key(event):
+            rows = _rows()
+            moves = {"Up": -1, "Down": 1, "Prior": -rows, "Next": rows}
+            if event.keysym in moves:
+                _scroll_to(state["first"] + moves[event.keysym])
+            elif event.keysym == "Home":
+                _scroll_to(0)
+            elif event.keysym == "End":
+                follow_var.set(True)
+                _render()
+            else:
+                return None
+            return "break"
+
+        def _clear_filter():
+            filter_box.current(0)
+            session_box.current(0)
+            search_var.set("")
+            _cancel_search()
+            state["view"] = None
+
+        def _goto(_event=None):
+            try:
+                line = int(goto_var.get())
+            except ValueError:
+                return
+            _clear_filter()
+            _jump(line - 1)
+
+        def _jump(line: int):
+            state["mark"] = line
+            _scroll_to(line - _rows() // 2)
+
+        def _open_line(event):
+            view = state["view"]
+            if view is None:
+                return None
+            row = int(txt.index(f"@{event.x},{event.y}").split(".")[0]) - 1
+            if state["first"] + row >= len(view):
+                return None
+            line = view[state["first"] + row]
+            _clear_filter()
+            _jump(line)
+            return "break"
+
+        def _session_range() -> tuple[int, int | None]:
+            """Границы выбранной сессии; None в конце — сессия последняя и ещё растёт."""
+            i = session_box.current()
+            if i <= 0 or i > len(sessions):
+                return 0, None
+            session = sessions[i - 1]
+            return session["line"], None if i == len(sessions) else session["end"]
+
+        def _refresh_sessions():
+            sessions[:] = log.sessions()
+            values = [t("log_all_sessions")]
+            for i, session in enumerate(sessions, start=1):
+                counts = t("log_session_counts").format(**session)
+                values.append(f"{i}. {session['title'] or '—'}  ({counts})")
+            current = session_box.current()
+            session_box.configure(values=values)
+            session_box.current(current if 0 <= current < len(values) else 0)
+
+        def _cancel_search():
+            if state["search_cancel"] is not None:
+                state["search_cancel"].set()
+                state["search_cancel"] = None
+            state["search"] += 1
+
+        def _apply_filter(_event=None):
+            _cancel_search()
+            mask = filters[max(0, filter_box.current())][1]
+            text = search_var.get().strip()
+            start, end = _session_range()
+            if not mask and not text:
+                state["view"] = None
+                if session_box.current() > 0:
+                    state["mark"] = start
+                    _scroll_to(start)
+                else:
+                    _render()
+                return
+            covered = log.parsed_lines() if end is None else end
+            if not text:
+                state["view"] = log.find(mask, "", start, covered)
+                state["covered"] = covered
+                follow_var.set(False)
+                _scroll_to(0)
+                return
+            # Поиск текста читает файл — в отдельном потоке, результат забирает _collect
+            search, stop = state["search"], Event()
+            state["search_cancel"] = stop
+
+            def _search():
+                found = log.find(mask, text, start, covered, cancel=stop)
+                if search == state["search"]:
+                    state["results"][search] = (found, covered)
+
+            info_var.set(t("log_searching"))
+            Thread(target=_search, daemon=True).start()
+            win.after(50, _collect, search)
+
+        def _collect(search: int):
+            if cancel.is_set() or search != state["search"]:
+                state["results"].pop(search, None)
+                return
+            result = state["results"].pop(search, None)
+            if result is None:
+                win.after(50, _collect, search)
+                return
+            state["view"], state["covered"] = result
+            state["search_cancel"] = None
+            follow_var.set(False)
+            _scroll_to(0)
+
+        def _debounced_search(_event=None):
+            if state["debounce"] is not None:
+                win.after_cancel(state["debounce"])
+            state["debounce"] = win.after(300, _search_now)
+
+        def _search_now(_event=None):
+            state["debounce"] = None
+            _apply_filter()
+
+        def _extend_view():
+            """Досчитать фильтр по строкам, дописанным в открытую сессию."""
+            view = state["view"]
+            if view is None or state["search_cancel"] is not None or _session_range()[1] is not None:
+                return
+            parsed = log.parsed_lines()
+            if parsed <= state["covered"]:
+                return
+            mask = filters[max(0, filter_box.current())][1]
+            view.extend(log.find(mask, search_var.get().strip(), state["covered"], parsed))
+            state["covered"] = parsed
+
+        def _refresh():
+            state["force"] = True
+            if not state["updating"]:
+                _start_update()
+
+        def _poll():
+            if cancel.is_set():
+                return
+            if not state["updating"]:
+                _start_update()
+            win.after(LOG_POLL_MS, _poll)
+
+        def _start_update():
+            """Разобрать дописанное в фоне: пересозданный или обрезанный файл разбирается заново целиком."""
+            state["updating"] = True
+
+            def work():
                 try:
-                    txt.insert(tk.END, log_file.read_text(encoding="utf-8"))
+                    reset = log.update(cancel=cancel, wait=False)
                 except Exception:
-                    txt.insert(tk.END, "Could not read logger.txt.")
-            else:
-                txt.insert(tk.END, "logger.txt not found.")
-            txt.config(state="disabled")
+                    reset = False
+                try:
+                    win.after(0, _updated, reset)
+                except Exception:
+                    # Окно уже закрыто
+                    pass
+
+            Thread(target=work, name="log-update", daemon=True).start()
 
-        ttk.Button(btn_frame, text=t("refresh"), command=_load_logs).pack(side="left", padx=4)
+        def _updated(reset: bool):
+            state["updating"] = False
+            if cancel.is_set():
+                return
+            force, state["force"] = state["force"], False
+            key = (log.exists, log.indexed, log.size)
+            if reset:
+                state["key"] = key
+                state["first"] = 0
+                state["mark"] = None
+                _refresh_sessions()
+                _apply_filter()
+            elif force or key != state["key"]:
+                state["key"] = key
+                _refresh_sessions()
+                _extend_view()
+                rows = _rows()
+                total = _total()
+                if force or follow_var.get() or state["first"] + rows >= total - 1:
+                    _render()
+                else:
+                    _update_bar(total, rows)
+
+        def _build_index():
+            log.update(cancel=cancel)
+            log.save_index()
+
+        def _on_destroy(event):
+            if event.widget is win:
+                cancel.set()
+                _cancel_search()
+                # Разобранная часть пригодится при следующем открытии
+                Thread(target=log.save_index, daemon=True).start()
+
+        vscroll = ttk.Scrollbar(text_frame, orient="vertical", command=_yview)
+        vscroll.grid(row=0, column=1, sticky="ns")
+        hscroll = ttk.Scrollbar(text_frame, orient="horizontal", command=txt.xview)
+        hscroll.grid(row=1, column=0, sticky="we")
+        txt.configure(xscrollcommand=hscroll.set)
+
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            txt.bind(sequence, _on_wheel)
+        txt.bind("<Key>", _on_key)
+        txt.bind("<Double-Button-1>", _open_line)
+        txt.bind("<Configure>", lambda _e: _render())
+        win.bind("<Destroy>", _on_destroy)
+
+        ttk.Button(btn_frame, text=t("refresh"), command=_refresh).pack(side="left", padx=4)
+        ttk.Checkbutton(btn_frame, text=t("log_follow"), variable=follow_var, command=_render).pack(side="left", padx=4)
+        ttk.Label(btn_frame, text=t("log_goto")).pack(side="left", padx=(12, 4))
+        goto_entry = ttk.Entry(btn_frame, textvariable=goto_var, width=10)
+        goto_entry.pack(side="left")
+        goto_entry.bind("<Return>", _goto)
+        ttk.Label(btn_frame, textvariable=info_var).pack(side="left", padx=8)
         ttk.Button(btn_frame, text=t("close"), command=win.destroy).pack(side="right", padx=4)
 
+        filter_box = ttk.Combobox(filter_frame, state="readonly", width=20, values=[t(key) for key, _ in filters])
+        filter_box.current(0)
+        filter_box.pack(side="left", padx=4)
+        filter_box.bind("<<ComboboxSelected>>", _apply_filter)
+        session_box = ttk.Combobox(filter_frame, state="readonly", width=50)
+        session_box.pack(side="left", padx=4)
+        session_box.bind("<<ComboboxSelected>>", _apply_filter)
+        ttk.Label(filter_frame, text=t("log_search")).pack(side="left", padx=(12, 4))
+        search_entry = ttk.Entry(filter_frame, textvariable=search_var)
+        search_entry.pack(side="left", fill="x", expand=True, padx=(0, 4))
+        search_entry.bind("<KeyRelease>", _debounced_search)
+        search_entry.bind("<Return>", _search_now)
+        _refresh_sessions()
+
         self.apply_theme(config.get("theme", "light"), root_widget=win)
-        _load_logs()
+        # Первый проход по файлу — в фоне; окно сразу показывает хвост через tail()
+        Thread(target=_build_index, daemon=True).start()
+        txt.focus_set()
+        _render()
+        win.after(LOG_POLL_MS, _poll)
+
+    def open_perf_window(self):
+        """Последние операции из perf.log с разбивкой по фазам и перцентили."""
+        win = tk.Toplevel(self)
+        win.title(t("perf_title"))
+        win.geometry("820x600")
+        win.minsize(600, 420)
+
+        container = ttk.Frame(win, padding=8)
+        container.pack(fill="both", expand=True)
+
+        ttk.Label(container, text=t("perf_recent")).pack(anchor="w")
+        recent = ttk.Treeview(
+            container, columns=("date", "op", "slot", "status", "duration"), show="headings", height=10
+        )
+        for col, key, width in (
+            ("date", "col_date", 140),
+            ("op", "col_op", 100),
+            ("slot", "col_name", 220),
+            ("status", "col_status", 90),
+            ("duration", "col_duration", 90),
+        ):
+            recent.heading(col, text=t(key))
+            recent.column(col, width=width, anchor="w")
+        recent.pack(fill="both", expand=True, pady=(4, 8))
+
+        ttk.Label(container, text=t("perf_phases")).pack(anchor="w")
+        phases = ttk.Treeview(container, columns=("phase", "duration", "size", "files"), show="headings", height=6)
+        for col, key in (("phase", "col_phase"), ("duration", "col_duration"), ("size", "col_size"), ("files", "col_files")):
+            phases.heading(col, text=t(key))
+            phases.column(col, width=120, anchor="w")
+        phases.pack(fill="x", pady=(4, 8))
+
+        ttk.Label(container, text=t("perf_summary")).pack(anchor="w")
+        summary = tk.Text(container, height=8, wrap="none", font=("Consolas", 10))
+        summary.pack(fill="x", pady=(4, 8))
+
+        records: list[dict] = []
+
+        def _load():
+            records[:] = read_perf_log()
+            recent.delete(*recent.get_children())
+            for i, rec in enumerate(records):
+                date = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(rec.get("ts", 0)))
+                recent.insert(
+                    "", "end", iid=str(i),
+                    values=(date, rec.get("op", ""), rec.get("slot") or "", rec.get("status", ""), f"{rec.get('duration', 0):.3f}"),
+                )
+            lines = []
+            for op, stats in sorted(perf_summary(records).items()):
+                lines.append(
+                    f"{op:<10} n={stats['count']:<4} p50 {stats['p50']:.3f}s  p90 {stats['p90']:.3f}s  p99 {stats['p99']:.3f}s"
+                )
+                for phase, ph in stats["phases"].items():
+                    lines.append(f"    {phase:<16} p50 {ph['p50']:.3f}s  p90 {ph['p90']:.3f}s")
+            summary.config(state="normal")
+            summary.delete("1.0", tk.END)
+            summary.insert(tk.END, "\n".join(lines))
+            summary.config(state="disabled")
+
+        def _show_phases(_event=None):
+            phases.delete(*phases.get_children())
+            sel = recent.selection()
+            if not sel:
+                return
+            for sp in records[int(sel[0])].get("spans", []):
+                phases.insert(
+                    "", "end",
+                    values=(sp["phase"], f"{sp['duration']:.3f}", format_size(sp.get("bytes", 0)), sp.get("files", 0)),
+                )
+
+        recent.bind("<<TreeviewSelect>>", _show_phases)
+
+        btn_frame = ttk.Frame(container)
+        btn_frame.pack(fill="x")
+        ttk.Button(btn_frame, text=t("refresh"), command=_load).pack(side="left")
+        ttk.Button(btn_frame, text=t("close"), command=win.destroy).pack(side="right")
+
+        self.apply_theme(config.get("theme", "light"), root_widget=win)
+        _load()
 
     def on_run_with_slot(self):
-        global NOITA_EXE
+        from tkinter import messagebox
 
         slot = self.get_selected_slot()
         if not slot:
             messagebox.showwarning(t("warning"), t("select_slot"))
             return
 
-        exe_path = Path(NOITA_EXE)
+        exe_path = Path(core.NOITA_EXE)
         if not exe_path.exists():
             messagebox.showerror(t("error"), t("noita_missing").format(path=exe_path))
             return
 
         self.start_progress("status_running", slot=slot)
+        progress = Progress()
 
         def worker():
-            if config.get("auto_backup_on_run"):
-                make_backup(generate_auto_name("auto_run_"))
-            load_slot(slot)
-            try:
-                subprocess.Popen(
-                    [str(exe_path)],
-                    cwd=str(exe_path.parent),
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                )
-            except Exception as proc_err:
-                raise RuntimeError(f"Failed to start Noita: {proc_err}")
-            return slot
-
-        def on_success(_):
+            auto = "auto_run_" if config.get("auto_backup_on_run") else None
+            restore_slot(slot, auto_backup=auto, progress=progress)
+            progress.check()
+            with span(progress, "spawn"):
+                return launch_noita()
+
+        def on_success(process):
+            self.start_session_monitor(process)
             self.set_status("status_run", slot)
             messagebox.showinfo(t("info"), t("run_done").format(slot=slot))
 
         self.run_async(
             worker,
+            title=t("job_run").format(slot=slot),
+            op="launch",
+            slot=slot,
+            resources={SAVE_RESOURCE: "write", slot_resource(slot): "read"},
             on_success=on_success,
             on_error=lambda e: messagebox.showerror(t("error"), str(e)),
+            progress=progress,
+        )
+
+    def start_session_monitor(self, process):
+        """Следить за запущенной игрой и делать автоснимки save00 через очередь операций."""
+        if self._session_monitor is not None:
+            self._session_monitor.stop()
+            self._session_monitor = None
+        if not config.get("session_snapshots", True):
+            return
+
+        def run(func):
+            def on_done(job: Job):
+                if job.state == "failed":
+                    self.after(0, lambda: self.status_var.set(f"{t('error')}: {job.error}"))
+
+            progress = Progress()
+            self.scheduler.submit(
+                t("job_snapshot"),
+                lambda: func(progress),
+                {SAVE_RESOURCE: "read"},
+                PRIORITY_BACKGROUND,
+                progress,
+                on_done,
+                op="snapshot",
+            )
+
+        try:
+            minutes = float(config.get("session_snapshot_minutes", 10))
+        except (TypeError, ValueError):
+            minutes = 10.0
+        self._session_monitor = SessionMonitor(
+            process,
+            interval=max(1.0, minutes) * 60,
+            run=run,
+            on_snapshot=lambda name: self.after(0, self.set_status, "status_snapshot", name),
+            on_exit=lambda _code: self.after(0, self.set_status, "status_noita_exited"),
         )
+        self._session_monitor.start()
+
     def open_settings_window(self):
-        global config, NOITA_SAVE, NOITA_EXE, SAVES_DIR
+        from datetime import datetime
+        from tkinter import filedialog, messagebox
 
         win = tk.Toplevel(self)
         win.title(t("settings"))
@@ -810,8 +1748,55 @@ class NoitaLauncherApp(tk.Tk):
         max_backups_spin.grid(row=row, column=1, sticky="w", pady=(8, 2))
         max_backups_spin.set(str(config.get("max_backups", 0)))
 
+        row += 1
+        tiered_var = tk.BooleanVar(value=config.get("retention_tiered", False))
+        ttk.Checkbutton(frame, text=t("retention_tiered_label"), variable=tiered_var).grid(row=row, column=0, columnspan=3, sticky="w")
+
+        row += 1
+        ttk.Label(frame, text=t("retention_tiers_label")).grid(row=row, column=0, sticky="w", pady=(2, 2))
+        tiers_frame = ttk.Frame(frame)
+        tiers_frame.grid(row=row, column=1, columnspan=2, sticky="w", pady=(2, 2))
+        tier_spins = {}
+        for key, limit in (("retention_all_hours", 168), ("retention_hourly_days", 60), ("retention_daily_days", 3650)):
+            spin = ttk.Spinbox(tiers_frame, from_=0, to=limit, width=6)
+            spin.pack(side="left", padx=(0, 8))
+            spin.set(str(config.get(key, 0)))
+            tier_spins[key] = spin
+
+        row += 1
+        ttk.Label(frame, text=t("retention_max_mb_label")).grid(row=row, column=0, sticky="w", pady=(2, 2))
+        budget_spin = ttk.Spinbox(frame, from_=0, to=10**6, increment=100, width=10)
+        budget_spin.grid(row=row, column=1, sticky="w", pady=(2, 2))
+        budget_spin.set(str(config.get("retention_max_mb", 0)))
+
+        row += 1
+        ttk.Label(frame, text=t("slot_storage_label")).grid(row=row, column=0, sticky="w", pady=(4, 2))
+        storage_combo = ttk.Combobox(frame, values=["folder", "store", "archive"], state="readonly", width=10)
+        storage_combo.grid(row=row, column=1, sticky="w", pady=(4, 2))
+        storage_combo.set(config.get("slot_storage", "folder"))
+
+        row += 1
+        incremental_var = tk.BooleanVar(value=config.get("incremental_backups", False))
+        ttk.Checkbutton(frame, text=t("incremental_label"), variable=incremental_var).grid(row=row, column=0, columnspan=3, sticky="w")
+
+        row += 1
+        hashes_var = tk.BooleanVar(value=config.get("backup_hashes", True))
+        ttk.Checkbutton(frame, text=t("backup_hashes_label"), variable=hashes_var).grid(row=row, column=0, columnspan=3, sticky="w")
+
+        row += 1
+        prewarm_var = tk.BooleanVar(value=config.get("prewarm_slots", True))
+        ttk.Checkbutton(frame, text=t("prewarm_label"), variable=prewarm_var).grid(row=row, column=0, columnspan=3, sticky="w")
+
+        row += 1
+        snapshots_var = tk.BooleanVar(value=config.get("session_snapshots", True))
+        ttk.Checkbutton(frame, text=t("session_snapshots_label"), variable=snapshots_var).grid(row=row, column=0, sticky="w")
+        snapshot_spin = ttk.Spinbox(frame, from_=1, to=240, width=10)
+        snapshot_spin.grid(row=row, column=1, sticky="w")
+        snapshot_spin.set(str(config.get("session_snapshot_minutes", 10)))
+
         row += 1
         ttk.Button(frame, text=t("open_logs"), command=self.open_logs_window).grid(row=row, column=0, sticky="w", pady=(8, 0))
+        ttk.Button(frame, text=t("perf_title"), command=self.open_perf_window).grid(row=row, column=1, sticky="w", pady=(8, 0))
 
         def _on_format_change(*_):
             try:
@@ -842,36 +1827,55 @@ class NoitaLauncherApp(tk.Tk):
             auto_backup_var.set(False)
             auto_backup_load_var.set(False)
             max_backups_spin.set("0")
+            tiered_var.set(False)
+            for key, spin in tier_spins.items():
+                spin.set(str(core.CONFIG_SCHEMA[key][0]))
+            budget_spin.set("0")
+            storage_combo.set("folder")
+            incremental_var.set(False)
+            hashes_var.set(True)
+            prewarm_var.set(True)
+            snapshots_var.set(True)
+            snapshot_spin.set("10")
             self.apply_theme("light", root_widget=win)
 
         def save_settings():
-            global config, NOITA_SAVE, NOITA_EXE, SAVES_DIR
-
-            config["noita_save_path"] = save_entry.get().strip()
-            config["noita_exe_path"] = exe_entry.get().strip()
-            config["saves_dir"] = saves_entry.get().strip()
-            config["save_name_format"] = format_var.get().strip() or "%Y-%m-%d_%H-%M-%S"
-            config["theme"] = theme_combo.get()
-            config["language"] = lang_combo.get()
-            config["confirm_on_delete"] = bool(confirm_var.get())
-            config["auto_backup_on_run"] = bool(auto_backup_var.get())
-            config["auto_backup_on_load"] = bool(auto_backup_load_var.get())
             try:
-                config["max_backups"] = int(max_backups_spin.get())
-            except Exception:
-                config["max_backups"] = 0
-
-            NOITA_SAVE = Path(config["noita_save_path"])
-            NOITA_EXE = config["noita_exe_path"]
-            SAVES_DIR = Path(config["saves_dir"])
-            SAVES_DIR.mkdir(exist_ok=True)
-
-            save_config(config)
-
-            self.label_save_path.config(text=f"{t('save00_label')} {config['noita_save_path']}")
-            self.label_exe_path.config(text=f"{t('exe_label')} {config['noita_exe_path']}")
-            self.label_saves_dir.config(text=f"{t('saves_dir_label')} {config['saves_dir']}")
-            self.refresh_slots_list()
+                max_backups = max(0, int(max_backups_spin.get()))
+            except ValueError:
+                max_backups = 0
+            try:
+                snapshot_minutes = max(1, int(snapshot_spin.get()))
+            except ValueError:
+                snapshot_minutes = 10
+            retention = {}
+            for key, spin in (*tier_spins.items(), ("retention_max_mb", budget_spin)):
+                try:
+                    retention[key] = max(0, int(spin.get()))
+                except ValueError:
+                    retention[key] = core.CONFIG_SCHEMA[key][0]
+            # Одним обновлением: подписчики получают все изменившиеся ключи сразу
+            config.update(
+                noita_save_path=save_entry.get().strip(),
+                noita_exe_path=exe_entry.get().strip(),
+                saves_dir=saves_entry.get().strip(),
+                save_name_format=format_var.get().strip() or "%Y-%m-%d_%H-%M-%S",
+                theme=theme_combo.get(),
+                language=lang_combo.get(),
+                confirm_on_delete=bool(confirm_var.get()),
+                auto_backup_on_run=bool(auto_backup_var.get()),
+                auto_backup_on_load=bool(auto_backup_load_var.get()),
+                max_backups=max_backups,
+                slot_storage=storage_combo.get() or "folder",
+                incremental_backups=bool(incremental_var.get()),
+                backup_hashes=bool(hashes_var.get()),
+                prewarm_slots=bool(prewarm_var.get()),
+                session_snapshots=bool(snapshots_var.get()),
+                session_snapshot_minutes=snapshot_minutes,
+                retention_tiered=bool(tiered_var.get()),
+                **retention,
+            )
+            config.save()
 
             try:
                 self.apply_theme(config.get("theme", "light"))
@@ -893,26 +1897,38 @@ class NoitaLauncherApp(tk.Tk):
         ttk.Button(bottom_btns, text=t("save_settings"), command=save_settings).pack(side="right")
 
         self.apply_theme(config.get("theme", "light"), root_widget=win)
-    def apply_theme(self, theme_name: str, root_widget=None):
-        """Apply a more complete light/dark theme to ttk and tk widgets."""
+    @staticmethod
+    def _theme_colors(theme: str) -> dict[str, str]:
+        if theme == "dark":
+            return {
+                "bg": "#0f1624",
+                "fg": "#e9efff",
+                "btn_bg": "#1c2537",
+                "entry_bg": "#1c2537",
+                "accent": "#2c3a55",
+                "disabled_fg": "#8d96a9",
+            }
+        return {
+            "bg": "#f6f8fb",
+            "fg": "#10121a",
+            "btn_bg": "#e3e8f2",
+            "entry_bg": "#ffffff",
+            "accent": "#d5deef",
+            "disabled_fg": "#8a92a3",
+        }
+
+    def apply_theme(self, theme_name: str, root_widget=None, walk: bool = True):
+        """Apply a more complete light/dark theme to ttk and tk widgets.
+
+        walk=False configures only ttk styles and the window background; plain tk
+        widgets are recolored later by _theme_tk_widgets (used to show the first frame sooner).
+        """
         target = root_widget or self
         style = ttk.Style(target)
         theme = theme_name or config.get("theme", "light")
-
-        if theme == "dark":
-            bg = "#0f1624"
-            fg = "#e9efff"
-            btn_bg = "#1c2537"
-            entry_bg = "#1c2537"
-            accent = "#2c3a55"
-            disabled_fg = "#8d96a9"
-        else:
-            bg = "#f6f8fb"
-            fg = "#10121a"
-            btn_bg = "#e3e8f2"
-            entry_bg = "#ffffff"
-            accent = "#d5deef"
-            disabled_fg = "#8a92a3"
+        colors = self._theme_colors(theme)
+        bg, fg, btn_bg = colors["bg"], colors["fg"], colors["btn_bg"]
+        entry_bg, accent, disabled_fg = colors["entry_bg"], colors["accent"], colors["disabled_fg"]
 
         try:
             # Use a theme that respects custom colors
@@ -937,6 +1953,10 @@ class NoitaLauncherApp(tk.Tk):
             style.configure("TEntry", fieldbackground=entry_bg, foreground=fg)
             style.configure("TCombobox", fieldbackground=entry_bg, foreground=fg)
             style.configure("TSpinbox", fieldbackground=entry_bg, foreground=fg)
+            style.configure("Treeview", background=entry_bg, fieldbackground=entry_bg, foreground=fg)
+            style.configure("Treeview.Heading", background=btn_bg, foreground=fg)
+            style.map("Treeview", background=[("selected", accent)], foreground=[("selected", fg)])
+            style.map("Treeview.Heading", background=[("active", accent)])
 
             # Hover/active states
             style.map("TButton", background=[("active", accent), ("pressed", accent)])
@@ -953,46 +1973,59 @@ class NoitaLauncherApp(tk.Tk):
             except Exception:
                 pass
 
-            # Walk widgets and adjust colors for Tk widgets that don't follow ttk styles
-            def _recurse(widget):
+            if walk:
+                self._theme_tk_widgets(target, colors)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _theme_tk_widgets(target, colors: dict[str, str]):
+        """Walk widgets and adjust colors for Tk widgets that don't follow ttk styles."""
+        bg, fg, btn_bg = colors["bg"], colors["fg"], colors["btn_bg"]
+        entry_bg, accent = colors["entry_bg"], colors["accent"]
+
+        def _recurse(widget):
+            try:
+                widget.configure(bg=bg)
+            except Exception:
+                pass
+
+            for child in widget.winfo_children():
+                cls = child.winfo_class()
                 try:
-                    widget.configure(bg=bg)
+                    if cls == "Text":
+                        child.configure(
+                            bg=entry_bg,
+                            fg=fg,
+                            insertbackground=fg,
+                            selectbackground=accent,
+                            selectforeground=fg,
+                        )
+                    elif cls == "Listbox":
+                        child.configure(
+                            bg=entry_bg,
+                            fg=fg,
+                            selectbackground=accent,
+                            selectforeground=fg,
+                        )
+                    elif cls == "Canvas":
+                        child.configure(bg=bg, highlightbackground=bg, highlightcolor=bg)
+                    elif cls == "Button":
+                        child.configure(bg=btn_bg, fg=fg, activebackground=accent)
+                    elif cls == "Entry":
+                        child.configure(bg=entry_bg, fg=fg, insertbackground=fg)
                 except Exception:
                     pass
+                _recurse(child)
 
-                for child in widget.winfo_children():
-                    cls = child.winfo_class()
-                    try:
-                        if cls == "Text":
-                            child.configure(
-                                bg=entry_bg,
-                                fg=fg,
-                                insertbackground=fg,
-                                selectbackground=accent,
-                                selectforeground=fg,
-                            )
-                        elif cls == "Listbox":
-                            child.configure(
-                                bg=entry_bg,
-                                fg=fg,
-                                selectbackground=accent,
-                                selectforeground=fg,
-                            )
-                        elif cls == "Canvas":
-                            child.configure(bg=bg, highlightbackground=bg, highlightcolor=bg)
-                        elif cls == "Button":
-                            child.configure(bg=btn_bg, fg=fg, activebackground=accent)
-                        elif cls == "Entry":
-                            child.configure(bg=entry_bg, fg=fg, insertbackground=fg)
-                    except Exception:
-                        pass
-                    _recurse(child)
-
-            _recurse(target)
-        except Exception:
-            pass
+        _recurse(target)
 
 
 if __name__ == "__main__":
-    app = NoitaLauncherApp()
+    # Экспорт сжимает в пуле процессов; в собранном exe дочерний процесс должен
+    # остановиться здесь, а не открыть ещё одно окно
+    from multiprocessing import freeze_support
+
+    freeze_support()
+    app = NoitaLauncherApp(profile_startup="--profile-startup" in sys.argv[1:])
     app.mainloop()
@@ -0,0 +1,53 @@
+"""Разбор logger.txt на приложенном к репозиторию журнале."""
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import noita_core as core  # noqa: E402
+
+
+class BundledLoggerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.path = self.tmp / "logger.txt"
+        # Журнал игры заканчивается строкой без перевода — дописываем его, как сделала бы игра
+        shutil.copyfile(ROOT / "logger.txt", self.path)
+        with open(self.path, "ab") as f:
+            f.write(b"\n")
+        self.log = core.LogFile(self.path)
+        self.log.update()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_session_header(self):
+        sessions = self.log.sessions()
+        self.assertEqual(len(sessions), 1)
+        self.assertEqual(sessions[0]["line"], 0)
+        self.assertEqual(sessions[0]["title"], "Noita (Jan 25 2025) - 20251122-144257")
+        self.assertTrue(self.log.line_flags(0, 1)[0] & core.LOG_SESSION)
+
+    def test_asset_lines(self):
+        flags = self.log.line_flags(0, self.log.line_count())
+        assets = [i for i, fl in enumerate(flags) if fl & core.LOG_ASSET]
+        # LoadImage, LoadSpriteTo и обе строки «Unable to open text csv file»
+        self.assertEqual(assets, [2, 3, 4, 5])
+        self.assertTrue(flags[3] & core.LOG_ERROR)
+        self.assertEqual(self.log.sessions()[0]["assets"], 4)
+
+    def test_second_session(self):
+        with open(self.path, "ab") as f:
+            f.write(b"Noita (Feb 02 2025) - 20260101-000000\n-----\nWarning: test\n")
+        self.log.update()
+        sessions = self.log.sessions()
+        self.assertEqual([s["title"] for s in sessions][1], "Noita (Feb 02 2025) - 20260101-000000")
+        self.assertEqual(sessions[1]["warnings"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()